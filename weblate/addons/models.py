@@ -200,10 +200,12 @@ def pre_update(sender, component, **kwargs):
 
 @receiver(vcs_pre_commit)
 def pre_commit(sender, translation, author, **kwargs):
+    """Run pre commit addons, returns whether any of them was executed."""
     addons = Addon.objects.filter_event(translation.component, EVENT_PRE_COMMIT)
     for addon in addons:
         translation.log_debug("running pre_commit addon: %s", addon.name)
         addon.addon.pre_commit(translation, author)
+    return bool(addons)
 
 
 @receiver(vcs_post_commit)
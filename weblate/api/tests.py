@@ -686,6 +686,7 @@ class MetricsAPITest(APIBaseTest):
         self.authenticate()
         response = self.client.get(reverse("api:metrics"))
         self.assertEqual(response.data["projects"], 1)
+        self.assertIn("weblate", response.data["machinery"])
 
     def test_forbidden(self):
         response = self.client.get(reverse("api:metrics"))
@@ -57,6 +57,7 @@ from weblate.auth.models import User
 from weblate.checks.models import Check
 from weblate.formats.exporters import EXPORTERS
 from weblate.lang.models import Language
+from weblate.machinery import MACHINE_TRANSLATION_SERVICES
 from weblate.screenshots.models import Screenshot
 from weblate.trans.models import (
     Change,
@@ -681,6 +682,10 @@ class Metrics(APIView):
                 ).count(),
                 "suggestions": Suggestion.objects.count(),
                 "celery_queues": get_queue_stats(),
+                "machinery": {
+                    mtid: service.get_stats()
+                    for mtid, service in MACHINE_TRANSLATION_SERVICES.items()
+                },
                 "name": settings.SITE_TITLE,
             }
         )
@@ -62,6 +62,72 @@ class ChecksLoader(ClassLoader):
     def target(self):
         return {k: v for k, v in self.items() if v.target}
 
+    def update_translation(self, translation):
+        """Update checks for all strings in a translation.
+
+        The existing checks are loaded by single query, the checks are run over
+        all strings at once and the changes are stored in bulk. Batch checks are
+        not updated here, these are run on the project level.
+        """
+        from weblate.checks.models import Check
+
+        translation.component.preload_sources()
+        items = []
+        for unit in translation.unit_set.all():
+            unit.translation = translation
+            items.append((unit.get_source_plurals(), unit.get_target_plurals(), unit))
+
+        if translation.is_source:
+            checks = self.source
+            meth = "check_source_batch"
+        else:
+            checks = self.target
+            meth = "check_target_batch"
+
+        # Run all checks
+        triggered = set()
+        for check, check_obj in checks.items():
+            if check_obj.batch_update:
+                continue
+            for unit in getattr(check_obj, meth)(items):
+                triggered.add((unit.pk, check))
+
+        # Compare with existing checks
+        existing = {
+            (unit_id, check): pk
+            for pk, unit_id, check in Check.objects.filter(
+                unit__translation=translation
+            ).values_list("pk", "unit_id", "check")
+        }
+        create = [
+            Check(unit_id=unit_id, check=check, ignore=False)
+            for unit_id, check in triggered
+            if (unit_id, check) not in existing
+        ]
+        delete = [
+            pk
+            for (unit_id, check), pk in existing.items()
+            if (unit_id, check) not in triggered
+            and not (check in checks and checks[check].batch_update)
+        ]
+
+        if create:
+            Check.objects.bulk_create(create, batch_size=500, ignore_conflicts=True)
+        if delete:
+            Check.objects.filter(pk__in=delete).delete()
+
+        # Update failing checks flag
+        if create or delete:
+            units = translation.unit_set.all()
+            units.filter(has_failing_check=False).filter(check__ignore=False).update(
+                has_failing_check=True
+            )
+            units.filter(has_failing_check=True).exclude(check__ignore=False).update(
+                has_failing_check=False
+            )
+
+        return len(create), len(delete)
+
 
 # Initialize checks list
 CHECKS = ChecksLoader("CHECK_LIST")
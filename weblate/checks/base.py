@@ -67,6 +67,29 @@ class Check:
             return False
         return self.check_target_unit(sources, targets, unit)
 
+    def check_target_batch(self, items):
+        """Check target strings for multiple units.
+
+        The items are (sources, targets, unit) tuples, returns list of units
+        where check fires. Checks can override this to share state between
+        the units.
+        """
+        return [
+            unit
+            for sources, targets, unit in items
+            if self.check_target(sources, targets, unit)
+        ]
+
+    def check_source_batch(self, items):
+        """Check source strings for multiple units.
+
+        The items are (sources, targets, unit) tuples, returns list of units
+        where check fires.
+        """
+        return [
+            unit for sources, targets, unit in items if self.check_source(sources, unit)
+        ]
+
     def check_target_unit_with_flag(self, sources, targets, unit):
         """Check flag value."""
         raise NotImplementedError()
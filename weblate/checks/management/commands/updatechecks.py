@@ -17,6 +17,9 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 
+from django.db import transaction
+
+from weblate.checks import CHECKS
 from weblate.trans.management.commands import WeblateLangCommand
 
 
@@ -24,11 +27,21 @@ class Command(WeblateLangCommand):
     help = "updates checks for units"
 
     def handle(self, *args, **options):
-        translations = {}
-        for unit in self.iterate_units(*args, **options):
-            unit.run_checks()
-            if unit.translation.id not in translations:
-                translations[unit.translation.id] = unit.translation
+        translations = list(self.get_translations(**options))
+        projects = {}
+        for translation in translations:
+            self.stdout.write("Processing {}".format(translation))
+            with transaction.atomic():
+                CHECKS.update_translation(translation)
+            project = translation.component.project
+            projects[project.id] = project
+
+        # Batch checks are run on the project level
+        for project in projects.values():
+            project.run_target_checks()
+            project.run_source_checks()
+            project.update_unit_flags()
 
-        for translation in translations.values():
+        for translation in translations:
             translation.invalidate_cache()
+        self.stdout.write("Operation completed")
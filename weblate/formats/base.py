@@ -203,9 +203,13 @@ class TranslationFormat:
     def load(cls, storefile):
         raise NotImplementedError()
 
+    def get_plural_formula(self):
+        """Return plural formula defined in the file."""
+        return None
+
     def get_plural(self, language):
         """Return matching plural object."""
-        return language.plural
+        return language.get_plural_for_formula(self.get_plural_formula())
 
     @cached_property
     def has_template(self):
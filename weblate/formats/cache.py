@@ -0,0 +1,109 @@
+#
+# Copyright © 2012 - 2020 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <https://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Disk cache of parsed translation files."""
+
+import os
+import pickle
+from tempfile import mkstemp
+
+from django.conf import settings
+
+import weblate
+from weblate.utils.data import data_dir
+from weblate.utils.hash import calculate_fingerprint, hash_to_checksum
+
+
+class StoreCache:
+    """Size bounded disk cache of parsed stores.
+
+    The entries are pickled together with their key and the least recently
+    used ones are removed once the cache grows over the size limit. The files
+    are replaced atomically, so the cache can be shared by several processes.
+    """
+
+    suffix = ".pickle"
+
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+
+    def get_filename(self, key):
+        return os.path.join(
+            self.path,
+            hash_to_checksum(calculate_fingerprint(weblate.GIT_VERSION, *key))
+            + self.suffix,
+        )
+
+    def get(self, key):
+        """Return cached value or None if it is not present."""
+        filename = self.get_filename(key)
+        try:
+            with open(filename, "rb") as handle:
+                cached_key, value = pickle.load(handle)
+            # Mark as recently used
+            os.utime(filename)
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+            return None
+        if cached_key != key:
+            return None
+        return value
+
+    def set(self, key, value):
+        """Store value in the cache."""
+        os.makedirs(self.path, exist_ok=True)
+        handle, name = mkstemp(dir=self.path)
+        try:
+            with os.fdopen(handle, "wb") as temp:
+                pickle.dump((key, value), temp, pickle.HIGHEST_PROTOCOL)
+            os.replace(name, self.get_filename(key))
+        except OSError:
+            if os.path.exists(name):
+                os.unlink(name)
+            return
+        self.cleanup()
+
+    def cleanup(self):
+        """Remove least recently used entries over the size limit."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.path):
+            if not entry.name.endswith(self.suffix):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+        entries.sort()
+        for _mtime, size, path in entries:
+            if total <= self.size:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+
+
+def get_store_cache():
+    """Return store cache or None if it is disabled."""
+    if not settings.STORE_CACHE_SIZE:
+        return None
+    return StoreCache(data_dir("cache", "stores"), settings.STORE_CACHE_SIZE)
@@ -18,9 +18,12 @@
 #
 """Exporter using translate-toolkit."""
 
-from django.http import HttpResponse
+from itertools import islice
+
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
+from lxml import etree
 from translate.misc.multistring import multistring
 from translate.storage.csvl10n import csvfile
 from translate.storage.mo import mofile
@@ -39,6 +42,9 @@ from weblate.utils.site import get_site_url
 # Map to remove control characters except newlines and tabs
 _CHARMAP = dict.fromkeys(x for x in range(32) if x not in (9, 10, 13))
 
+# Number of units serialized at once when streaming
+EXPORT_CHUNK_SIZE = 1000
+
 EXPORTERS = {}
 
 
@@ -67,6 +73,8 @@ class BaseExporter:
     name = ""
     verbose = ""
     set_id = False
+    # Whether the storage can be serialized in chunks of units
+    streaming = False
 
     def __init__(
         self, project=None, language=None, url=None, translation=None, fieldnames=None
@@ -167,27 +175,74 @@ class BaseExporter:
 
         self.storage.addunit(output)
 
-    def get_response(self, filetemplate="{project}-{language}.{extension}"):
-        filename = filetemplate.format(
+    def get_filename(self, filetemplate):
+        return filetemplate.format(
             project=self.project.slug,
             language=self.language.code,
             extension=self.extension,
         )
 
+    def get_response(self, filetemplate="{project}-{language}.{extension}"):
         response = HttpResponse(
             content_type="{0}; charset=utf-8".format(self.content_type)
         )
-        response["Content-Disposition"] = "attachment; filename={0}".format(filename)
+        response["Content-Disposition"] = "attachment; filename={0}".format(
+            self.get_filename(filetemplate)
+        )
 
         # Save to response
         response.write(self.serialize())
 
         return response
 
+    def get_streaming_response(
+        self, units, filetemplate="{project}-{language}.{extension}"
+    ):
+        response = StreamingHttpResponse(
+            self.iterate_serialized(units.iterator(chunk_size=EXPORT_CHUNK_SIZE)),
+            content_type="{0}; charset=utf-8".format(self.content_type),
+        )
+        response["Content-Disposition"] = "attachment; filename={0}".format(
+            self.get_filename(filetemplate)
+        )
+        return response
+
     def serialize(self):
         """Return storage content."""
         return TTKitFormat.serialize(self.storage)
 
+    def serialize_skeleton(self):
+        """Return content to write before and after the units."""
+        return self.serialize(), b""
+
+    def serialize_units(self, skeleton, base):
+        """Return content of units added to the storage after base."""
+        return self.serialize()[len(skeleton[0]) :]
+
+    def remove_units(self, base):
+        """Remove units added to the storage after base."""
+        del self.storage.units[base:]
+
+    def iterate_serialized(self, units):
+        """Serialize units in chunks.
+
+        The storage holds only a single chunk of units at a time and its
+        content is generated as soon as the chunk is added.
+        """
+        skeleton = self.serialize_skeleton()
+        yield skeleton[0]
+        base = len(self.storage.units)
+        units = iter(units)
+        while True:
+            chunk = list(islice(units, EXPORT_CHUNK_SIZE))
+            if not chunk:
+                break
+            for unit in chunk:
+                self.add_unit(unit)
+            yield self.serialize_units(skeleton, base)
+            self.remove_units(base)
+        yield skeleton[1]
+
     def store_flags(self, output, flags):
         return
 
@@ -199,6 +254,7 @@ class PoExporter(BaseExporter):
     extension = "po"
     verbose = _("gettext PO")
     storage_class = pofile
+    streaming = True
 
     def store_flags(self, output, flags):
         for flag in flags.items():
@@ -225,12 +281,33 @@ class PoExporter(BaseExporter):
 class XMLExporter(BaseExporter):
     """Wrapper for XML based exporters to strip control characters."""
 
+    streaming = True
+
     def string_filter(self, text):
         return text.translate(_CHARMAP)
 
     def add(self, unit, word):
         unit.settarget(word, self.language.code)
 
+    def serialize_skeleton(self):
+        # Split the document at the position of units
+        marker = etree.Comment("weblate-units")
+        self.storage.body.append(marker)
+        head, tail = self.serialize().split(etree.tostring(marker))
+        self.storage.body.remove(marker)
+        return head, tail
+
+    def serialize_units(self, skeleton, base):
+        return b"".join(
+            etree.tostring(unit.xmlelement, encoding="utf-8", pretty_print=True)
+            for unit in self.storage.units[base:]
+        )
+
+    def remove_units(self, base):
+        for unit in self.storage.units[base:]:
+            self.storage.body.remove(unit.xmlelement)
+        super().remove_units(base)
+
 
 @register_exporter
 class PoXliffExporter(XMLExporter):
@@ -283,6 +360,7 @@ class MoExporter(PoExporter):
     extension = "mo"
     verbose = _("gettext MO")
     storage_class = mofile
+    streaming = False
 
     def __init__(
         self, project=None, language=None, url=None, translation=None, fieldnames=None
@@ -342,6 +420,7 @@ class CSVExporter(CVSBaseExporter):
     content_type = "text/csv"
     extension = "csv"
     verbose = _("CSV")
+    streaming = True
 
     def string_filter(self, text):
         """Avoid Excel interpreting text as formula.
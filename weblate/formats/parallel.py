@@ -0,0 +1,158 @@
+#
+# Copyright © 2012 - 2020 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <https://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Parsing of translation files in separate processes."""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from weblate.formats.models import FILE_FORMATS
+
+# Template stores parsed in the worker process
+TEMPLATE_CACHE = {}
+
+
+class ParsedUnit:
+    """Picklable snapshot of translation unit.
+
+    It provides the same interface as TranslationUnit for reading, what is
+    enough to synchronize database with the file.
+    """
+
+    __slots__ = (
+        "id_hash",
+        "source",
+        "target",
+        "context",
+        "flags",
+        "locations",
+        "notes",
+        "previous_source",
+        "content_hash",
+        "readonly",
+        "translated",
+        "fuzzy",
+        "approved",
+        "has_template",
+    )
+
+    def __init__(self, unit):
+        self.id_hash = unit.id_hash
+        self.source = unit.source
+        self.target = unit.target
+        self.context = unit.context
+        self.flags = unit.flags
+        self.locations = unit.locations
+        self.notes = unit.notes
+        self.previous_source = unit.previous_source
+        self.content_hash = unit.content_hash
+        self.readonly = unit.is_readonly()
+        self.translated = unit.is_translated()
+        self.fuzzy = self.get_flag(unit.is_fuzzy)
+        self.approved = self.get_flag(unit.is_approved)
+        self.has_template = unit.template is not None
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    @staticmethod
+    def get_flag(method):
+        """Evaluate state flag, None means the format does not store it."""
+        value = bool(method(False))
+        if value != bool(method(True)):
+            return None
+        return value
+
+    @property
+    def template(self):
+        """Template presence marker, the content is not needed for sync."""
+        return True if self.has_template else None
+
+    def is_readonly(self):
+        return self.readonly
+
+    def is_translated(self):
+        return self.translated
+
+    def is_fuzzy(self, fallback=False):
+        if self.fuzzy is None:
+            return fallback
+        return self.fuzzy
+
+    def is_approved(self, fallback=False):
+        if self.approved is None:
+            return fallback
+        return self.approved
+
+
+class ParsedStore:
+    """Picklable snapshot of translation file content."""
+
+    def __init__(self, store):
+        self.plural_formula = store.get_plural_formula()
+        self.content_units = [ParsedUnit(unit) for unit in store.content_units]
+
+    def get_plural(self, language):
+        """Return matching plural object."""
+        return language.get_plural_for_formula(self.plural_formula)
+
+
+def parse_store(file_format, filename, template, language_code, is_template):
+    """Parse translation file into ParsedStore.
+
+    This is executed in the worker process, so it should not access the database.
+    Returns None on failure, the caller is expected to parse the file again
+    to handle the error.
+    """
+    format_cls = FILE_FORMATS[file_format]
+    template_store = None
+    try:
+        if template:
+            key = (file_format, template)
+            if key not in TEMPLATE_CACHE:
+                TEMPLATE_CACHE[key] = format_cls.parse(template)
+            template_store = TEMPLATE_CACHE[key]
+        store = format_cls.parse(
+            filename,
+            template_store,
+            language_code=language_code,
+            is_template=is_template,
+        )
+        return ParsedStore(store)
+    except Exception:
+        return None
+
+
+def parse_parallel(jobs, processes):
+    """Parse translation files in the process pool.
+
+    Jobs are tuples of arguments to parse_store, the results are yielded in
+    the same order. Only limited number of results is kept in memory.
+    """
+    with ProcessPoolExecutor(processes) as executor:
+        pending = deque()
+        for job in jobs:
+            pending.append(executor.submit(parse_store, *job))
+            if len(pending) > 2 * processes:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,69 @@
+#
+# Copyright © 2012 - 2020 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <https://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Store cache tests."""
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from weblate.formats.cache import StoreCache
+from weblate.formats.parallel import ParsedStore
+from weblate.formats.ttkit import PoFormat
+from weblate.trans.tests.utils import get_test_file
+
+TEST_PO = get_test_file("cs.po")
+
+
+class StoreCacheTest(TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.cache = StoreCache(os.path.join(self.tempdir, "stores"), 100000)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_store(self):
+        key = ("po", "hash", "cs", False)
+        self.assertIsNone(self.cache.get(key))
+        store = PoFormat(TEST_PO)
+        self.cache.set(key, ParsedStore(store))
+        parsed = self.cache.get(key)
+        self.assertEqual(parsed.plural_formula, store.get_plural_formula())
+        self.assertEqual(
+            [unit.target for unit in parsed.content_units],
+            [unit.target for unit in store.content_units],
+        )
+        self.assertIsNone(self.cache.get(("po", "other", "cs", False)))
+
+    def test_invalid(self):
+        key = ("po", "hash", "cs", False)
+        os.makedirs(self.cache.path)
+        with open(self.cache.get_filename(key), "wb") as handle:
+            handle.write(b"invalid")
+        self.assertIsNone(self.cache.get(key))
+
+    def test_cleanup(self):
+        self.cache.size = 1000
+        for i in range(10):
+            self.cache.set(("po", i), "x" * 400)
+            os.utime(self.cache.get_filename(("po", i)), (i, i))
+        self.assertEqual(len(os.listdir(self.cache.path)), 2)
+        self.assertIsNone(self.cache.get(("po", 0)))
+        self.assertEqual(self.cache.get(("po", 9)), "x" * 400)
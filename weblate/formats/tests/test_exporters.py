@@ -115,7 +115,23 @@ class PoExporterTest(BaseTestCase):
             unit.get_comments = empty_get_comments
         exporter = self.get_exporter(lang, translation=translation)
         exporter.add_unit(unit)
-        return self.check_export(exporter)
+        result = self.check_export(exporter)
+        if exporter.streaming:
+            self.check_streaming(
+                self.get_exporter(lang, translation=translation), unit, result
+            )
+        return result
+
+    def check_streaming(self, exporter, unit, expected):
+        result = b"".join(exporter.iterate_serialized([unit]))
+        storage_class = exporter.storage_class
+        self.assertEqual(
+            [(item.source, item.target) for item in storage_class.parsestring(result)],
+            [
+                (item.source, item.target)
+                for item in storage_class.parsestring(expected)
+            ],
+        )
 
     def test_unit(self):
         self.check_unit(source="xxx", target="yyy")
@@ -0,0 +1,71 @@
+#
+# Copyright © 2012 - 2020 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <https://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Parallel parsing tests."""
+
+import pickle
+from unittest import TestCase
+
+from weblate.formats.parallel import ParsedStore, parse_parallel, parse_store
+from weblate.formats.ttkit import PoFormat
+from weblate.trans.tests.utils import get_test_file
+
+TEST_PO = get_test_file("cs.po")
+TEST_HE_CLDR = get_test_file("he-cldr.po")
+
+
+class ParallelParseTest(TestCase):
+    def assert_same_units(self, parsed, store):
+        units = list(store.content_units)
+        self.assertEqual(len(parsed.content_units), len(units))
+        for parsed_unit, unit in zip(parsed.content_units, units):
+            self.assertEqual(parsed_unit.id_hash, unit.id_hash)
+            self.assertEqual(parsed_unit.source, unit.source)
+            self.assertEqual(parsed_unit.target, unit.target)
+            self.assertEqual(parsed_unit.context, unit.context)
+            self.assertEqual(parsed_unit.content_hash, unit.content_hash)
+            self.assertEqual(parsed_unit.is_translated(), unit.is_translated())
+            self.assertEqual(parsed_unit.is_fuzzy(), unit.is_fuzzy())
+            self.assertEqual(parsed_unit.template, unit.template)
+
+    def test_pickle(self):
+        store = PoFormat(TEST_PO)
+        parsed = pickle.loads(pickle.dumps(ParsedStore(store)))
+        self.assert_same_units(parsed, store)
+        self.assertEqual(parsed.plural_formula, store.get_plural_formula())
+
+    def test_parse(self):
+        parsed = parse_store("po", TEST_PO, None, "cs", False)
+        self.assert_same_units(parsed, PoFormat(TEST_PO))
+
+    def test_parse_error(self):
+        self.assertIsNone(
+            parse_store("po", get_test_file("missing.po"), None, "cs", False)
+        )
+
+    def test_parallel(self):
+        jobs = [
+            ("po", TEST_PO, None, "cs", False),
+            ("po", TEST_HE_CLDR, None, "he", False),
+            ("po", TEST_PO, None, "cs", False),
+        ]
+        results = list(parse_parallel(jobs, 2))
+        self.assertEqual(len(results), 3)
+        self.assert_same_units(results[0], PoFormat(TEST_PO))
+        self.assert_same_units(results[1], PoFormat(TEST_HE_CLDR))
+        self.assertIn("n == 1", results[1].plural_formula)
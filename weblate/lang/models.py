@@ -454,6 +454,32 @@ class Language(models.Model):
     def plural(self):
         return self.plural_set.filter(source=Plural.SOURCE_DEFAULT)[0]
 
+    def get_plural_for_formula(self, formula):
+        """Return plural object matching gettext plural formula.
+
+        Falls back to default plural for missing or invalid formula and creates
+        new plural object if none matches.
+        """
+        if not formula:
+            return self.plural
+        try:
+            number, equation = Plural.parse_formula(formula)
+        except ValueError:
+            return self.plural
+
+        # Find matching one
+        for plural in self.plural_set.iterator():
+            if plural.same_plural(number, equation):
+                return plural
+
+        # Create new one
+        return Plural.objects.create(
+            language=self,
+            source=Plural.SOURCE_GETTEXT,
+            number=number,
+            equation=equation,
+        )
+
 
 class PluralQuerySet(models.QuerySet):
     def order(self):
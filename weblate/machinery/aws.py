@@ -29,6 +29,7 @@ class AWSTranslation(MachineTranslation):
 
     name = "AWS"
     max_score = 88
+    request_limit = 600
 
     def __init__(self):
         super().__init__()
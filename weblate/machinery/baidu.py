@@ -34,6 +34,8 @@ class BaiduTranslation(MachineTranslation):
 
     name = "Baidu"
     max_score = 90
+    # Standard edition allows single query per second
+    request_limit = 60
 
     # Map codes used by Baidu to codes used by Weblate
     language_map = {
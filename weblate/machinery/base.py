@@ -20,10 +20,15 @@
 
 
 import random
+from email.utils import parsedate_to_datetime
 from hashlib import md5
+from time import monotonic, sleep, time
 
+from django.conf import settings
 from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from django.utils.translation import gettext as _
 from requests.exceptions import HTTPError
 
 from weblate.logger import LOGGER
@@ -33,6 +38,23 @@ from weblate.utils.requests import request
 from weblate.utils.search import Comparer
 from weblate.utils.site import get_site_url
 
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half-open"
+
+STATS = ("requests", "errors", "time")
+
+
+def increment_cache(key, value=1, timeout=None):
+    """Increment value in the cache, returns new value."""
+    try:
+        # Try to increase cache key
+        return cache.incr(key, value)
+    except ValueError:
+        # No such key, so set it
+        cache.set(key, value, timeout)
+        return value
+
 
 class MachineTranslationError(Exception):
     """Generic Machine translation error."""
@@ -51,6 +73,18 @@ class MachineTranslation:
     default_languages = []
     cache_translations = True
     language_map = {}
+    # Whether the service can be queried from other threads
+    concurrent = True
+    # Limits for number of strings and their length in single batch request
+    batch_max_items = 1
+    batch_max_size = 5000
+    # Number of requests allowed in given period in seconds (0 for unlimited),
+    # can be overridden by MT_REQUEST_LIMITS
+    request_limit = 0
+    request_period = 60
+    # Circuit breaker opens after given number of consecutive failures
+    circuit_failures = 5
+    circuit_timeout = 300
 
     @classmethod
     def get_rank(cls):
@@ -60,13 +94,30 @@ class MachineTranslation:
         """Create new machine translation object."""
         self.mtid = self.name.lower().replace(" ", "-")
         self.rate_limit_cache = "{}-rate-limit".format(self.mtid)
+        self.bucket_cache = "{}-bucket".format(self.mtid)
         self.languages_cache = "{}-languages".format(self.mtid)
+        self.circuit_cache = "{}-circuit".format(self.mtid)
+        self.failures_cache = "{}-failures".format(self.mtid)
+        self.probe_cache = "{}-probe".format(self.mtid)
         self.comparer = Comparer()
         self.supported_languages = None
         self.supported_languages_error = None
 
+    def get_stats_cache(self, name):
+        return "{}-stats-{}".format(self.mtid, name)
+
     def delete_cache(self):
-        cache.delete_many([self.rate_limit_cache, self.languages_cache])
+        cache.delete_many(
+            [
+                self.rate_limit_cache,
+                self.bucket_cache,
+                self.languages_cache,
+                self.circuit_cache,
+                self.failures_cache,
+                self.probe_cache,
+            ]
+            + [self.get_stats_cache(name) for name in STATS]
+        )
 
     def get_identifier(self):
         return self.mtid
@@ -118,6 +169,18 @@ class MachineTranslation:
         """
         raise NotImplementedError()
 
+    def download_translations_batch(self, source, language, texts, units, user):
+        """Download translations for several strings at once.
+
+        Should return list of results as returned by download_translations
+        in the same order as texts. Services supporting translating several
+        strings in single request should override this and set batch limits.
+        """
+        return [
+            self.download_translations(source, language, text, unit, user)
+            for text, unit in zip(texts, units)
+        ]
+
     def convert_language(self, language):
         """Convert language to service specific code."""
         if language in self.language_map:
@@ -170,8 +233,113 @@ class MachineTranslation:
     def is_rate_limited(self):
         return cache.get(self.rate_limit_cache, False)
 
-    def set_rate_limit(self):
-        return cache.set(self.rate_limit_cache, True, 1800)
+    def set_rate_limit(self, timeout=1800):
+        return cache.set(self.rate_limit_cache, True, timeout)
+
+    def get_retry_after(self, exc):
+        """Return number of seconds to wait from Retry-After header or None."""
+        try:
+            value = exc.response.headers["Retry-After"]
+        except (AttributeError, KeyError):
+            return None
+        if value.isdigit():
+            return max(1, int(value))
+        try:
+            retry = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(1, int((retry - timezone.now()).total_seconds()))
+
+    def get_request_limit(self):
+        return settings.MT_REQUEST_LIMITS.get(self.mtid, self.request_limit)
+
+    def get_request_delay(self, requests):
+        """Return time in seconds the request limit allows given requests in."""
+        limit = self.get_request_limit()
+        if not limit:
+            return 0
+        return requests * self.request_period / limit
+
+    def consume_request(self, wait=False):
+        """Take token from the request limit bucket shared through the cache.
+
+        The bucket holds up to request_limit tokens and is continuously
+        refilled over request_period. It is implemented using generic cell
+        rate algorithm, the cache holds theoretical arrival time of the next
+        request in milliseconds, which is increased atomically.
+
+        With wait, the token is reserved and the call sleeps until it is
+        available instead of failing on empty bucket.
+        """
+        limit = self.get_request_limit()
+        if not limit:
+            return True
+        interval = int(1000 * self.request_period / limit)
+        now = int(1000 * time())
+        arrival = increment_cache(self.bucket_cache, interval)
+        if arrival - interval < now:
+            # The bucket is full, start counting from now
+            cache.set(self.bucket_cache, now + interval, None)
+            return True
+        if arrival - now > 1000 * self.request_period:
+            if wait:
+                # Keep the reserved token and wait for the bucket to refill
+                sleep((arrival - now) / 1000 - self.request_period)
+                return True
+            # The bucket is empty, return the token
+            try:
+                cache.decr(self.bucket_cache, interval)
+            except ValueError:
+                pass
+            return False
+        return True
+
+    def get_circuit_state(self):
+        """Return state of the circuit breaker.
+
+        The circuit is opened after circuit_failures consecutive failures and
+        half-opened after circuit_timeout to probe whether service works again.
+        """
+        if cache.get(self.circuit_cache):
+            return CIRCUIT_OPEN
+        if cache.get(self.failures_cache, 0) >= self.circuit_failures:
+            return CIRCUIT_HALF_OPEN
+        return CIRCUIT_CLOSED
+
+    def is_circuit_open(self):
+        """Check whether circuit breaker blocks requests.
+
+        Single request is allowed in half-open state.
+        """
+        state = self.get_circuit_state()
+        if state == CIRCUIT_HALF_OPEN:
+            return not cache.add(self.probe_cache, True, self.circuit_timeout)
+        return state == CIRCUIT_OPEN
+
+    def record_request(self, start, failed):
+        """Record request duration and update circuit breaker state."""
+        increment_cache(self.get_stats_cache("requests"))
+        increment_cache(self.get_stats_cache("time"), int(1000 * (time() - start)))
+        if failed:
+            increment_cache(self.get_stats_cache("errors"))
+            if increment_cache(self.failures_cache) >= self.circuit_failures:
+                cache.set(self.circuit_cache, True, self.circuit_timeout)
+                cache.delete(self.probe_cache)
+        elif cache.get(self.failures_cache):
+            cache.delete_many([self.failures_cache, self.probe_cache])
+
+    def get_stats(self):
+        """Return request statistics used in metrics."""
+        stats = cache.get_many([self.get_stats_cache(name) for name in STATS])
+        requests = stats.get(self.get_stats_cache("requests"), 0)
+        time_spent = stats.get(self.get_stats_cache("time"), 0)
+        return {
+            "requests": requests,
+            "errors": stats.get(self.get_stats_cache("errors"), 0),
+            "latency": time_spent // requests if requests else 0,
+            "circuit": self.get_circuit_state(),
+            "rate_limited": bool(self.is_rate_limited()),
+        }
 
     def is_rate_limit_error(self, exc):
         if not isinstance(exc, HTTPError):
@@ -192,52 +360,145 @@ class MachineTranslation:
             self.mtid, calculate_hash(source, language), calculate_hash(None, text)
         )
 
-    def translate(self, language, text, unit, user, source=None):
-        """Return list of machine translations."""
-        self.get_supported_languages()
-
-        if source is None:
-            language = self.convert_language(language)
-            source = self.convert_language(
-                unit.translation.component.project.source_language.code
-            )
-
-        if not text or self.is_rate_limited() or source == language:
-            return []
+    def get_language_pair(self, source, language):
+        """Return supported language pair or None.
 
-        if not self.is_supported(source, language):
+        Falls back to language codes without country code.
+        """
+        while source != language:
+            if self.is_supported(source, language):
+                return source, language
             # Try without country code
             source = source.replace("-", "_")
             if "_" in source:
                 source = source.split("_")[0]
-                return self.translate(language, text, unit, user, source)
+                continue
             language = language.replace("-", "_")
             if "_" in language:
                 language = language.split("_")[0]
-                return self.translate(language, text, unit, user, source)
+                continue
             if self.supported_languages_error:
                 raise MachineTranslationError(repr(self.supported_languages_error))
-            return []
+            break
+        return None
+
+    def get_batches(self, positions, texts):
+        """Split positions of texts to batches obeying service limits."""
+        batch = []
+        size = 0
+        for pos in positions:
+            length = len(texts[pos])
+            if batch and (
+                len(batch) >= self.batch_max_items
+                or size + length > self.batch_max_size
+            ):
+                yield batch
+                batch = []
+                size = 0
+            batch.append(pos)
+            size += length
+        if batch:
+            yield batch
+
+    def count_requests(self, items):
+        """Return maximal number of requests needed to translate the items."""
+        texts = [text for text, _unit in items]
+        return sum(1 for _batch in self.get_batches(range(len(texts)), texts))
+
+    def translate(self, language, text, unit, user, source=None):
+        """Return list of machine translations."""
+        return self.translate_batch(language, [(text, unit)], user, source)[0]
 
-        cache_key = self.translate_cache_key(source, language, text)
-        if cache_key:
-            result = cache.get(cache_key)
-            if result is not None:
-                return result
+    def translate_batch(
+        self, language, items, user, source=None, deadline=None, wait=False
+    ):
+        """Return lists of machine translations for (text, unit) items.
 
-        try:
-            result = list(
-                self.download_translations(source, language, text, unit, user)
+        No further requests are made after the deadline (monotonic time).
+        Requests over the request limit raise MachineTranslationError unless
+        wait is set, in which case they wait for the bucket to refill.
+        """
+        results = [[] for _item in items]
+        texts = [text for text, _unit in items]
+        if not any(texts):
+            return results
+
+        self.get_supported_languages()
+
+        if source is None:
+            language = self.convert_language(language)
+            source = self.convert_language(
+                items[0][1].translation.component.project.source_language.code
+            )
+
+        if self.is_rate_limited():
+            return results
+
+        pair = self.get_language_pair(source, language)
+        if pair is None:
+            return results
+        source, language = pair
+
+        # Fetch cached translations in bulk
+        cache_keys = {
+            pos: self.translate_cache_key(source, language, text)
+            for pos, text in enumerate(texts)
+            if text
+        }
+        cached = cache.get_many([key for key in cache_keys.values() if key])
+        pending = []
+        for pos, cache_key in cache_keys.items():
+            if cache_key in cached:
+                results[pos] = cached[cache_key]
+            else:
+                pending.append(pos)
+
+        if pending and self.is_circuit_open():
+            raise MachineTranslationError(
+                _("The service is temporarily disabled after repeated failures.")
             )
-            if cache_key:
-                cache.set(cache_key, result, 7 * 86400)
-            return result
-        except Exception as exc:
-            if self.is_rate_limit_error(exc):
-                self.set_rate_limit()
 
-            self.report_error(exc, "Failed to fetch translations from %s")
-            raise MachineTranslationError(self.get_error_message(exc))
+        for batch in self.get_batches(pending, texts):
+            if deadline is not None and monotonic() > deadline:
+                break
+            if not self.consume_request(wait):
+                raise MachineTranslationError(
+                    _("The request limit of the service has been exceeded.")
+                )
+            start = time()
+            try:
+                if len(batch) == 1:
+                    pos = batch[0]
+                    translations = [
+                        self.download_translations(
+                            source, language, texts[pos], items[pos][1], user
+                        )
+                    ]
+                else:
+                    translations = self.download_translations_batch(
+                        source,
+                        language,
+                        [texts[pos] for pos in batch],
+                        [items[pos][1] for pos in batch],
+                        user,
+                    )
+                update = {}
+                for pos, result in zip(batch, translations):
+                    results[pos] = list(result)
+                    if cache_keys[pos]:
+                        update[cache_keys[pos]] = results[pos]
+            except Exception as exc:
+                self.record_request(start, True)
+                if self.is_rate_limit_error(exc):
+                    self.set_rate_limit(self.get_retry_after(exc) or 1800)
+
+                self.report_error(exc, "Failed to fetch translations from %s")
+                raise MachineTranslationError(self.get_error_message(exc))
+            self.record_request(start, False)
+            if update:
+                cache.set_many(update, 7 * 86400)
+
+        return results
 
     def get_error_message(self, exc):
         return "{0}: {1}".format(exc.__class__.__name__, str(exc))
@@ -33,6 +33,9 @@ class DeepLTranslation(MachineTranslation):
     # This seems to be currently best MT service, so score it a bit
     # better than other ones.
     max_score = 91
+    batch_max_items = 50
+    batch_max_size = 30000
+    request_limit = 300
 
     def __init__(self):
         """Check configuration."""
@@ -65,3 +68,29 @@ class DeepLTranslation(MachineTranslation):
                 "service": self.name,
                 "source": text,
             }
+
+    def download_translations_batch(self, source, language, texts, units, user):
+        """Download translations for several strings in single request."""
+        response = self.request(
+            "post",
+            DEEPL_API,
+            data={
+                "auth_key": settings.MT_DEEPL_KEY,
+                "text": texts,
+                "source_lang": source,
+                "target_lang": language,
+            },
+        )
+        payload = response.json()
+
+        return [
+            [
+                {
+                    "text": translation["text"],
+                    "quality": self.max_score,
+                    "service": self.name,
+                    "source": text,
+                }
+            ]
+            for text, translation in zip(texts, payload["translations"])
+        ]
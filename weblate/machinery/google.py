@@ -36,6 +36,9 @@ class GoogleTranslation(MachineTranslation):
 
     name = "Google Translate"
     max_score = 90
+    batch_max_items = 128
+    batch_max_size = 5000
+    request_limit = 600
 
     # Map old codes used by Google to new ones used by Weblate
     language_map = {"he": "iw", "jv": "jw", "nb": "no"}
@@ -89,6 +92,36 @@ class GoogleTranslation(MachineTranslation):
             "source": text,
         }
 
+    def download_translations_batch(self, source, language, texts, units, user):
+        """Download translations for several strings in single request."""
+        response = self.request(
+            "post",
+            GOOGLE_API_ROOT,
+            data={
+                "key": settings.MT_GOOGLE_KEY,
+                "q": texts,
+                "source": source,
+                "target": language,
+                "format": "text",
+            },
+        )
+        payload = response.json()
+
+        if "error" in payload:
+            raise MachineTranslationError(payload["error"]["message"])
+
+        return [
+            [
+                {
+                    "text": translation["translatedText"],
+                    "quality": self.max_score,
+                    "service": self.name,
+                    "source": text,
+                }
+            ]
+            for text, translation in zip(texts, payload["data"]["translations"])
+        ]
+
     def get_error_message(self, exc):
         if hasattr(exc, "read"):
             content = exc.read()
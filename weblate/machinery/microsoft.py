@@ -34,6 +34,9 @@ class MicrosoftCognitiveTranslation(MachineTranslation):
     """Microsoft Cognitive Services Translator API support."""
 
     name = "Microsoft Translator"
+    batch_max_items = 100
+    batch_max_size = 5000
+    request_limit = 300
 
     language_map = {
         "zh-hant": "zh-CHT",
@@ -123,6 +126,12 @@ class MicrosoftCognitiveTranslation(MachineTranslation):
 
     def download_translations(self, source, language, text, unit, user):
         """Download list of possible translations from a service."""
+        return self.download_translations_batch(source, language, [text], [unit], user)[
+            0
+        ]
+
+    def download_translations_batch(self, source, language, texts, units, user):
+        """Download translations for several strings in single request."""
         args = {
             "api-version": "3.0",
             "from": source,
@@ -130,14 +139,22 @@ class MicrosoftCognitiveTranslation(MachineTranslation):
             "category": "general",
         }
         response = self.request(
-            "post", self.get_url("translate"), params=args, json=[{"Text": text[:5000]}]
+            "post",
+            self.get_url("translate"),
+            params=args,
+            json=[{"Text": text[:5000]} for text in texts],
         )
         # Microsoft tends to use utf-8-sig instead of plain utf-8
         response.encoding = response.apparent_encoding
         payload = response.json()
-        yield {
-            "text": payload[0]["translations"][0]["text"],
-            "quality": self.max_score,
-            "service": self.name,
-            "source": text,
-        }
+        return [
+            [
+                {
+                    "text": translation["translations"][0]["text"],
+                    "quality": self.max_score,
+                    "service": self.name,
+                    "source": text,
+                }
+            ]
+            for text, translation in zip(texts, payload)
+        ]
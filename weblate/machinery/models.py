@@ -74,6 +74,12 @@ class WeblateConf(AppConf):
     NETEASE_KEY = None
     NETEASE_SECRET = None
 
+    # Time limit for machine translation service to respond
+    SERVICE_DEADLINE = 10
+
+    # Number of requests per minute allowed for the services
+    REQUEST_LIMITS = {}
+
     # List of machine translations
     SERVICES = (
         "weblate.machinery.weblatetm.WeblateTranslation",
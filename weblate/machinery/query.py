@@ -0,0 +1,144 @@
+#
+# Copyright © 2012 - 2020 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <https://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Concurrent querying of several machine translation services."""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from time import monotonic
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils.translation import gettext as _
+
+from weblate.machinery.base import MachineTranslationError
+
+# Shared pool, the worker threads keep their HTTP sessions between queries
+EXECUTOR = ThreadPoolExecutor()
+
+
+def query_service(service, language, items, user, deadline=None, wait=False):
+    """Query single service, errors are returned as MachineTranslationError."""
+    try:
+        return service.translate_batch(
+            language, items, user, deadline=deadline, wait=wait
+        )
+    except MachineTranslationError as error:
+        return error
+    except Exception as error:
+        service.report_error(error, "Failed to fetch translations from %s")
+        return MachineTranslationError(service.get_error_message(error))
+
+
+def query_service_thread(service, language, items, user, deadline, wait):
+    try:
+        return query_service(service, language, items, user, deadline, wait)
+    finally:
+        close_old_connections()
+
+
+def iterate_batch_translations(
+    services, language, items, user, executor=EXECUTOR, wait=False
+):
+    """Query machine translation services concurrently.
+
+    The items are (text, unit) tuples. Yields tuples of service and list of
+    translations for every item (or MachineTranslationError) in the order the
+    services respond. Services are given MT_SERVICE_DEADLINE for every request
+    they need to make, the ones not responding in time are reported as failed.
+
+    With wait, used for background processing, the services wait for their
+    request limits instead of failing and the deadline is extended by the time
+    the limit allows the requests in.
+    """
+    # Load related objects needed by the services in current thread
+    for _text, unit in items:
+        unit.translation.component.project.source_language
+
+    pending = {}
+    for service in services:
+        if not service.concurrent:
+            continue
+        requests = service.count_requests(items)
+        timeout = settings.MT_SERVICE_DEADLINE * requests
+        if wait:
+            timeout += service.get_request_delay(requests)
+        deadline = monotonic() + timeout
+        future = executor.submit(
+            query_service_thread, service, language, items, user, deadline, wait
+        )
+        pending[future] = (service, deadline)
+
+    # Services accessing the database are queried in current thread
+    for service in services:
+        if not service.concurrent:
+            yield service, query_service(service, language, items, user, wait=wait)
+
+    while pending:
+        deadline = min(deadline for _service, deadline in pending.values())
+        done = wait_futures(
+            pending, timeout=max(0, deadline - monotonic()), return_when=FIRST_COMPLETED
+        )[0]
+        for future in done:
+            yield pending.pop(future)[0], future.result()
+
+        now = monotonic()
+        for future, (service, deadline) in list(pending.items()):
+            if deadline > now:
+                continue
+            del pending[future]
+            future.cancel()
+            yield service, MachineTranslationError(
+                _("The service did not respond in time.")
+            )
+
+
+def get_batch_translations(
+    services, language, items, user, executor=EXECUTOR, wait=False
+):
+    """Return merged translations for every item and errors.
+
+    The translations are ordered by quality and rank of the service.
+    """
+    translations = [[] for _item in items]
+    errors = {}
+    for service, result in iterate_batch_translations(
+        services, language, items, user, executor, wait
+    ):
+        if isinstance(result, MachineTranslationError):
+            errors[service.name] = str(result)
+            continue
+        rank = service.get_rank()
+        for pos, item_result in enumerate(result):
+            translations[pos].extend(
+                (item["quality"], rank, item) for item in item_result
+            )
+    for item_translations in translations:
+        item_translations.sort(key=lambda item: item[:2], reverse=True)
+    return (
+        [[item for _quality, _rank, item in result] for result in translations],
+        errors,
+    )
+
+
+def get_translations(services, language, text, unit, user):
+    """Return merged translations from services and errors."""
+    translations, errors = get_batch_translations(
+        services, language, [(text, unit)], user
+    )
+    return translations[0], errors
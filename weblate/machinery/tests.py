@@ -17,9 +17,12 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 
+from time import monotonic, sleep, time
+from unittest.mock import patch
 
 import responses
 from botocore.stub import ANY, Stubber
+from django.core.cache import cache
 from django.test import TestCase
 from django.test.utils import override_settings
 
@@ -27,7 +30,12 @@ from weblate.checks.tests.test_checks import MockUnit
 from weblate.machinery.apertium import ApertiumAPYTranslation
 from weblate.machinery.aws import AWSTranslation
 from weblate.machinery.baidu import BAIDU_API, BaiduTranslation
-from weblate.machinery.base import MachineTranslationError
+from weblate.machinery.base import (
+    CIRCUIT_CLOSED,
+    CIRCUIT_HALF_OPEN,
+    CIRCUIT_OPEN,
+    MachineTranslationError,
+)
 from weblate.machinery.deepl import DeepLTranslation
 from weblate.machinery.dummy import DummyTranslation
 from weblate.machinery.glosbe import GlosbeTranslation
@@ -39,6 +47,7 @@ from weblate.machinery.microsoftterminology import (
 )
 from weblate.machinery.mymemory import MyMemoryTranslation
 from weblate.machinery.netease import NETEASE_API_ROOT, NeteaseSightTranslation
+from weblate.machinery.query import get_translations
 from weblate.machinery.saptranslationhub import SAPTranslationHub
 from weblate.machinery.tmserver import AMAGAMA_LIVE, AmagamaTranslation
 from weblate.machinery.weblatetm import WeblateTranslation
@@ -250,6 +259,14 @@ MICROSOFT_RESPONSE = [{"translations": [{"text": "Svět.", "to": "cs"}]}]
 MS_SUPPORTED_LANG_RESP = {"translation": {"cs": "data", "en": "data", "es": "data"}}
 
 
+class SlowDummy(DummyTranslation):
+    name = "Slow Dummy"
+
+    def download_translations(self, source, language, text, unit, user):
+        sleep(0.5)
+        return super().download_translations(source, language, text, unit, user)
+
+
 class MachineTranslationTest(TestCase):
     """Testing of machine translation core."""
 
@@ -293,6 +310,46 @@ class MachineTranslationTest(TestCase):
             [],
         )
 
+    def test_get_translations(self):
+        services = [self.get_machine(DummyTranslation), self.get_machine(SlowDummy)]
+        translations, errors = get_translations(
+            services, "cs", "Hello, world!", MockUnit(), None
+        )
+        self.assertEqual(len(translations), 4)
+        self.assertEqual(errors, {})
+
+    @override_settings(MT_SERVICE_DEADLINE=0.1)
+    def test_get_translations_deadline(self):
+        services = [self.get_machine(DummyTranslation), self.get_machine(SlowDummy)]
+        translations, errors = get_translations(
+            services, "cs", "Hello, world!", MockUnit(), None
+        )
+        self.assertEqual(len(translations), 2)
+        self.assertEqual(list(errors), ["Slow Dummy"])
+
+    def test_translate_batch_deadline(self):
+        machine = self.get_machine(SlowDummy)
+        items = [("Hello, world!", MockUnit())] * 3
+        translations = machine.translate_batch(
+            "cs", items, None, deadline=monotonic() + 0.1
+        )
+        # No more requests are made after the deadline
+        self.assertEqual([len(result) for result in translations], [2, 0, 0])
+
+    @override_settings(MT_DEEPL_KEY="KEY")
+    def test_count_requests(self):
+        machine = self.get_machine(DeepLTranslation)
+        items = [("Hello", MockUnit())] * 120
+        self.assertEqual(machine.count_requests(items), 3)
+        self.assertEqual(self.get_machine(DummyTranslation).count_requests(items), 120)
+
+    @override_settings(MT_REQUEST_LIMITS={"dummy": 30})
+    def test_request_delay(self):
+        machine = self.get_machine(DummyTranslation)
+        self.assertEqual(machine.get_request_delay(15), 30)
+        machine = self.get_machine(SlowDummy)
+        self.assertEqual(machine.get_request_delay(15), 0)
+
     def assert_translate(self, machine, lang="cs", word="world", empty=False):
         translation = machine.translate(lang, word, MockUnit(), None)
         self.assertIsInstance(translation, list)
@@ -340,6 +397,45 @@ class MachineTranslationTest(TestCase):
         )
         self.assert_translate(machine, empty=True)
 
+    @responses.activate
+    def test_glosbe_retry_after(self):
+        machine = self.get_machine(GlosbeTranslation)
+        responses.add(
+            responses.GET,
+            "https://glosbe.com/gapi/translate",
+            json=GLOSBE_JSON,
+            status=429,
+            headers={"Retry-After": "120"},
+        )
+        with self.assertRaises(MachineTranslationError):
+            self.assert_translate(machine, empty=True)
+        self.assertTrue(machine.is_rate_limited())
+        self.assertEqual(machine.get_stats()["errors"], 1)
+
+    @responses.activate
+    def test_glosbe_circuit(self):
+        machine = self.get_machine(GlosbeTranslation)
+        responses.add(
+            responses.GET, "https://glosbe.com/gapi/translate", body="", status=500
+        )
+        for _i in range(machine.circuit_failures):
+            with self.assertRaises(MachineTranslationError):
+                self.assert_translate(machine, empty=True)
+        self.assertEqual(machine.get_circuit_state(), CIRCUIT_OPEN)
+        # No requests are made with open circuit
+        responses.reset()
+        with self.assertRaises(MachineTranslationError):
+            self.assert_translate(machine, empty=True)
+        self.assertEqual(len(responses.calls), 0)
+        # Successful probe in half-open state closes the circuit
+        cache.delete(machine.circuit_cache)
+        self.assertEqual(machine.get_circuit_state(), CIRCUIT_HALF_OPEN)
+        responses.add(
+            responses.GET, "https://glosbe.com/gapi/translate", json=GLOSBE_JSON
+        )
+        self.assert_translate(machine)
+        self.assertEqual(machine.get_circuit_state(), CIRCUIT_CLOSED)
+
     @override_settings(MT_MYMEMORY_EMAIL="test@weblate.org")
     @responses.activate
     def test_mymemory(self):
@@ -711,6 +807,61 @@ class MachineTranslationTest(TestCase):
         )
         self.assert_translate(machine, lang="de", word="Hello")
 
+    @override_settings(MT_DEEPL_KEY="KEY")
+    @responses.activate
+    def test_deepl_batch(self):
+        machine = self.get_machine(DeepLTranslation, True)
+        responses.add(
+            responses.POST,
+            "https://api.deepl.com/v1/translate",
+            json={"translations": [{"text": "Hallo"}, {"text": "Welt"}]},
+        )
+        items = [("Hello", MockUnit()), ("World", MockUnit())]
+        translations = machine.translate_batch("de", items, None)
+        self.assertEqual(len(responses.calls), 1)
+        self.assertEqual(
+            [result[0]["text"] for result in translations], ["Hallo", "Welt"]
+        )
+        responses.reset()
+        # Fetch from cache
+        self.assertEqual(machine.translate_batch("de", items, None), translations)
+        self.assertEqual(len(responses.calls), 0)
+
+    @override_settings(MT_DEEPL_KEY="KEY", MT_REQUEST_LIMITS={"deepl": 2})
+    @responses.activate
+    def test_deepl_request_limit(self):
+        machine = self.get_machine(DeepLTranslation)
+        responses.add(
+            responses.POST, "https://api.deepl.com/v1/translate", json=DEEPL_RESPONSE
+        )
+        self.assert_translate(machine, lang="de", word="Hello")
+        self.assert_translate(machine, lang="de", word="Hello")
+        # The bucket is empty now
+        with self.assertRaises(MachineTranslationError):
+            self.assert_translate(machine, lang="de", word="Hello", empty=True)
+        self.assertEqual(len(responses.calls), 2)
+        # Token is refilled after period / limit seconds
+        cache.set(machine.bucket_cache, int(1000 * time()) + 30000)
+        self.assert_translate(machine, lang="de", word="Hello")
+        self.assertEqual(len(responses.calls), 3)
+
+    @override_settings(MT_DEEPL_KEY="KEY", MT_REQUEST_LIMITS={"deepl": 2})
+    @responses.activate
+    def test_deepl_request_limit_wait(self):
+        machine = self.get_machine(DeepLTranslation)
+        responses.add(
+            responses.POST, "https://api.deepl.com/v1/translate", json=DEEPL_RESPONSE
+        )
+        items = [("Hello", MockUnit())]
+        with patch("weblate.machinery.base.sleep") as mock_sleep:
+            for _i in range(3):
+                translations = machine.translate_batch("de", items, None, wait=True)
+                self.assertTrue(translations[0])
+        # The last request waits for the bucket to refill
+        self.assertEqual(len(responses.calls), 3)
+        self.assertEqual(mock_sleep.call_count, 1)
+        self.assertGreater(mock_sleep.call_args[0][0], 0)
+
     @override_settings(MT_DEEPL_KEY="KEY")
     @responses.activate
     def test_cache(self):
@@ -31,6 +31,7 @@ class WeblateTranslation(MachineTranslation):
     name = "Weblate"
     rank_boost = 1
     cache_translations = False
+    concurrent = False
 
     def is_supported(self, source, language):
         """Any language is supported."""
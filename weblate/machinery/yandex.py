@@ -32,6 +32,7 @@ class YandexTranslation(MachineTranslation):
 
     name = "Yandex"
     max_score = 90
+    request_limit = 300
 
     def __init__(self):
         """Check configuration."""
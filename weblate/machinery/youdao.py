@@ -34,6 +34,7 @@ class YoudaoTranslation(MachineTranslation):
 
     name = "Youdao Zhiyun"
     max_score = 90
+    request_limit = 60
 
     # Map codes used by Youdao to codes used by Weblate
     language_map = {"zh_Hans": "zh-CHS", "zh": "zh-CHS", "en": "EN"}
@@ -30,6 +30,7 @@ class WeblateMemory(MachineTranslation):
     name = "Weblate Translation Memory"
     rank_boost = 2
     cache_translations = False
+    concurrent = False
 
     def convert_language(self, language):
         return Language.objects.get(code=language)
@@ -19,6 +19,7 @@
 
 
 import argparse
+from time import time
 
 from django.core.management.base import CommandError
 
@@ -52,7 +53,14 @@ class Command(BaseCommand):
                 )
             }
 
+        start = time()
         try:
-            Memory.objects.import_file(None, options["file"], langmap)
+            count = Memory.objects.import_file(None, options["file"], langmap)
         except MemoryImportError as error:
             raise CommandError("Import failed: {}".format(error))
+        elapsed = time() - start
+        self.stdout.write(
+            "Imported {} entries in {:.1f} seconds ({:.0f} entries per second)".format(
+                count, elapsed, count / elapsed if elapsed else count
+            )
+        )
@@ -0,0 +1,56 @@
+# Generated by Django 3.0.4 on 2020-03-24 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("memory", "0006_memory_update")]
+
+    operations = [
+        migrations.AddField(
+            model_name="memory",
+            name="source_length",
+            field=models.IntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name="memory",
+            name="index_0",
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name="memory",
+            name="index_1",
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name="memory",
+            name="index_2",
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name="memory",
+            name="index_3",
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name="memory",
+            name="index_4",
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name="memory",
+            name="index_5",
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name="memory",
+            name="index_6",
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name="memory",
+            name="index_7",
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+    ]
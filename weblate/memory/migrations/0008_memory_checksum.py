@@ -0,0 +1,44 @@
+# Generated by Django 3.0.4 on 2020-03-25 09:12
+
+from django.db import migrations, models
+
+from weblate.memory.utils import get_checksum
+
+
+def fill_checksum(apps, schema_editor):
+    Memory = apps.get_model("memory", "Memory")
+    db_alias = schema_editor.connection.alias
+    seen = set()
+    update = []
+    delete = []
+    for memory in Memory.objects.using(db_alias).order_by("id").iterator():
+        memory.checksum = get_checksum(memory)
+        if memory.checksum in seen:
+            delete.append(memory.pk)
+        else:
+            seen.add(memory.checksum)
+            update.append(memory)
+        if len(update) >= 1000:
+            Memory.objects.using(db_alias).bulk_update(update, ["checksum"])
+            update = []
+        if len(delete) >= 1000:
+            Memory.objects.using(db_alias).filter(pk__in=delete).delete()
+            delete = []
+    if update:
+        Memory.objects.using(db_alias).bulk_update(update, ["checksum"])
+    if delete:
+        Memory.objects.using(db_alias).filter(pk__in=delete).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("memory", "0007_memory_index")]
+
+    operations = [
+        migrations.AddField(
+            model_name="memory",
+            name="checksum",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_checksum, migrations.RunPython.noop, elidable=True),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 3.0.4 on 2020-03-25 09:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("memory", "0008_memory_checksum")]
+
+    operations = [
+        migrations.AlterField(
+            model_name="memory",
+            name="checksum",
+            field=models.BigIntegerField(default=0, unique=True),
+        )
+    ]
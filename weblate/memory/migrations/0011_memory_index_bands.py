@@ -0,0 +1,71 @@
+# Generated by Django 3.0.4 on 2020-03-30 09:12
+
+from django.db import migrations, models
+
+from weblate.memory.utils import INDEX_FIELDS, get_index
+
+
+def fill_index(apps, schema_editor):
+    Memory = apps.get_model("memory", "Memory")
+    db_alias = schema_editor.connection.alias
+    fields = ["source_length"] + INDEX_FIELDS
+    update = []
+    for memory in Memory.objects.using(db_alias).only("source").iterator():
+        memory.source_length = len(memory.source)
+        for field, value in zip(INDEX_FIELDS, get_index(memory.source)):
+            setattr(memory, field, value)
+        update.append(memory)
+        if len(update) >= 1000:
+            Memory.objects.using(db_alias).bulk_update(update, fields)
+            update = []
+    if update:
+        Memory.objects.using(db_alias).bulk_update(update, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("memory", "0010_pendingmemory")]
+
+    operations = [
+        migrations.AddField(
+            model_name="memory",
+            name="index_8",
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name="memory",
+            name="index_9",
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name="memory",
+            name="index_10",
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name="memory",
+            name="index_11",
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name="memory",
+            name="index_12",
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name="memory",
+            name="index_13",
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name="memory",
+            name="index_14",
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name="memory",
+            name="index_15",
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(fill_index, migrations.RunPython.noop, elidable=True),
+    ]
@@ -23,12 +23,12 @@ import os
 from functools import reduce
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.utils.encoding import force_str
 from django.utils.translation import gettext as _
 from django.utils.translation import pgettext
-from translate.misc.xml_helpers import getXMLlang, getXMLspace
-from translate.storage.tmx import tmxfile
+from lxml import etree
+from translate.misc.xml_helpers import getText, getXMLlang, getXMLspace
 from weblate_schemas import load_schema
 
 from jsonschema import validate
@@ -39,6 +39,11 @@ from weblate.memory.utils import (
     CATEGORY_PRIVATE_OFFSET,
     CATEGORY_SHARED,
     CATEGORY_USER_OFFSET,
+    INDEX_FIELDS,
+    get_checksum,
+    get_index,
+    get_length_range,
+    get_lookup_index,
 )
 from weblate.utils.errors import report_error
 
@@ -47,14 +52,37 @@ class MemoryImportError(Exception):
     pass
 
 
-def get_node_data(unit, node):
-    """Generic implementation of LISAUnit.gettarget."""
-    # The language should be present as xml:lang, but in some
-    # cases it's there only as lang
-    return (
-        getXMLlang(node) or node.get("lang"),
-        unit.getNodeText(node, getXMLspace(unit.xmlelement, "preserve")),
-    )
+def parse_tmx(fileobj):
+    """Iteratively parse TMX file.
+
+    Yields source language code from the header followed by list of
+    (language, text) tuples for every translation unit. Processed elements are
+    freed, so memory usage does not depend on file size.
+    """
+    srclang = None
+    for _event, element in etree.iterparse(
+        fileobj, tag=("{*}header", "{*}tu"), resolve_entities=False
+    ):
+        if etree.QName(element).localname == "header":
+            srclang = element.get("srclang")
+            if srclang:
+                yield srclang
+        elif srclang:
+            xml_space = getXMLspace(element, "preserve")
+            translations = []
+            for node in element.iterchildren("{*}tuv"):
+                # The language should be present as xml:lang, but in some
+                # cases it's there only as lang
+                lang_code = getXMLlang(node) or node.get("lang")
+                segment = next(node.iterdescendants("{*}seg"), None)
+                if segment is None:
+                    continue
+                translations.append((lang_code, getText(segment, xml_space)))
+            yield translations
+        # Free already processed elements
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
 
 
 class MemoryQuerySet(models.QuerySet):
@@ -70,7 +98,22 @@ class MemoryQuerySet(models.QuerySet):
             query.append(models.Q(user=user))
         return self.filter(reduce(lambda x, y: x | y, query))
 
-    def lookup(self, source_language, target_language, text, user, project, use_shared):
+    def lookup(
+        self,
+        source_language,
+        target_language,
+        text,
+        user,
+        project,
+        use_shared,
+        limit=50,
+    ):
+        """Find fuzzy match candidates for text.
+
+        The candidates have to share at least one index band and have length
+        which can reach minimal similarity, the ones sharing most bands are
+        returned.
+        """
         # Type filtering
         result = self.filter_type(
             user=user, project=project, use_shared=use_shared, from_file=True
@@ -79,8 +122,32 @@ class MemoryQuerySet(models.QuerySet):
         result = result.filter(
             source_language=source_language, target_language=target_language
         )
-        # Full-text search on source
-        return result.filter(source__search=text)
+        # Length filtering
+        min_length, max_length = get_length_range(text)
+        result = result.filter(
+            source_length__gte=min_length, source_length__lte=max_length
+        )
+        # Index lookup
+        bands = get_lookup_index(text)
+        result = result.filter(
+            reduce(
+                lambda x, y: x | y,
+                (models.Q(**{field: value}) for field, value in bands),
+            )
+        )
+        # Prefer entries sharing most bands
+        matches = reduce(
+            lambda x, y: x + y,
+            (
+                models.Case(
+                    models.When(then=1, **{field: value}),
+                    default=0,
+                    output_field=models.IntegerField(),
+                )
+                for field, value in bands
+            ),
+        )
+        return result.annotate(matches=matches).order_by("-matches")[:limit]
 
     def prefetch_lang(self):
         return self.prefetch_related("source_language", "target_language")
@@ -115,81 +182,97 @@ class MemoryManager(models.Manager):
         except ValidationError as error:
             report_error(error, request, prefix="Failed to validate memory")
             raise MemoryImportError(_("Failed to parse JSON file: {!s}").format(error))
-        found = 0
         lang_cache = {}
-        for entry in data:
-            try:
-                self.update_entry(
-                    source_language=Language.objects.get_by_code(
-                        entry["source_language"], lang_cache
-                    ),
-                    target_language=Language.objects.get_by_code(
-                        entry["target_language"], lang_cache
-                    ),
-                    source=entry["source"],
-                    target=entry["target"],
-                    origin=origin,
-                    **kwargs
-                )
-                found += 1
-            except Language.DoesNotExist:
-                continue
-        return found
+
+        def get_entries():
+            for entry in data:
+                try:
+                    yield self.model(
+                        source_language=Language.objects.get_by_code(
+                            entry["source_language"], lang_cache
+                        ),
+                        target_language=Language.objects.get_by_code(
+                            entry["target_language"], lang_cache
+                        ),
+                        source=entry["source"],
+                        target=entry["target"],
+                        origin=origin,
+                        **kwargs
+                    )
+                except Language.DoesNotExist:
+                    continue
+
+        return self.bulk_import(get_entries())
 
     def import_tmx(self, request, fileobj, origin=None, langmap=None, **kwargs):
         if not kwargs:
             kwargs = {"from_file": True}
+        lang_cache = {}
+
+        def get_entries(parser):
+            try:
+                source_language = Language.objects.get_by_code(
+                    next(parser), lang_cache, langmap
+                )
+            except (StopIteration, Language.DoesNotExist):
+                raise MemoryImportError(_("Failed to find source languge!"))
+
+            for unit in parser:
+                translations = {}
+                for lang_code, text in unit:
+                    if not lang_code or not text:
+                        continue
+                    language = Language.objects.get_by_code(
+                        lang_code, lang_cache, langmap
+                    )
+                    translations[language] = text
+
+                try:
+                    source = translations.pop(source_language)
+                except KeyError:
+                    # Skip if source language is not present
+                    continue
+
+                for language, text in translations.items():
+                    yield self.model(
+                        source_language=source_language,
+                        target_language=language,
+                        source=source,
+                        target=text,
+                        origin=origin,
+                        **kwargs
+                    )
+
         try:
-            storage = tmxfile.parsefile(fileobj)
-        except (SyntaxError, AssertionError) as error:
+            with transaction.atomic():
+                return self.bulk_import(get_entries(parse_tmx(fileobj)))
+        except SyntaxError as error:
             report_error(error, request, prefix="Failed to parse")
             raise MemoryImportError(_("Failed to parse TMX file!"))
-        header = next(
-            storage.document.getroot().iterchildren(storage.namespaced("header"))
-        )
-        lang_cache = {}
-        try:
-            source_language = Language.objects.get_by_code(
-                header.get("srclang"), lang_cache, langmap
-            )
-        except Language.DoesNotExist:
-            raise MemoryImportError(_("Failed to find source languge!"))
 
-        found = 0
-        for unit in storage.units:
-            # Parse translations (translate-toolkit does not care about
-            # languages here, it just picks first and second XML elements)
-            translations = {}
-            for node in unit.getlanguageNodes():
-                lang_code, text = get_node_data(unit, node)
-                if not lang_code or not text:
-                    continue
-                language = Language.objects.get_by_code(lang_code, lang_cache, langmap)
-                translations[language.code] = text
+    def bulk_import(self, entries, batch_size=1000):
+        """Insert memory entries in batches.
 
-            try:
-                source = translations.pop(source_language.code)
-            except KeyError:
-                # Skip if source language is not present
-                continue
-
-            for lang, text in translations.items():
-                self.update_entry(
-                    source_language=source_language,
-                    target_language=Language.objects.get_by_code(
-                        lang, lang_cache, langmap
-                    ),
-                    source=source,
-                    target=text,
-                    origin=origin,
-                    **kwargs
-                )
-                found += 1
+        The entries are consumed lazily and the ones already present in the
+        database are skipped using the unique checksum.
+
+        Returns number of processed entries.
+        """
+        found = 0
+        batch = {}
+        for memory in entries:
+            memory.update_index()
+            batch[memory.checksum] = memory
+            found += 1
+            if len(batch) >= batch_size:
+                self.bulk_create(batch.values(), ignore_conflicts=True)
+                batch = {}
+        if batch:
+            self.bulk_create(batch.values(), ignore_conflicts=True)
         return found
 
     def update_entry(self, **kwargs):
-        if not self.filter(**kwargs).exists():
-            self.create(**kwargs)
+        self.bulk_import([self.model(**kwargs)])
 
 
 class Memory(models.Model):
@@ -222,12 +305,43 @@ class Memory(models.Model):
     )
     from_file = models.BooleanField(db_index=True, default=False)
     shared = models.BooleanField(db_index=True, default=False)
+    # Deduplication key, see weblate.memory.utils.get_checksum
+    checksum = models.BigIntegerField(unique=True, default=0)
+    # Fuzzy lookup index, see weblate.memory.utils.get_index
+    source_length = models.IntegerField(db_index=True, default=0)
+    index_0 = models.BigIntegerField(db_index=True, default=0)
+    index_1 = models.BigIntegerField(db_index=True, default=0)
+    index_2 = models.BigIntegerField(db_index=True, default=0)
+    index_3 = models.BigIntegerField(db_index=True, default=0)
+    index_4 = models.BigIntegerField(db_index=True, default=0)
+    index_5 = models.BigIntegerField(db_index=True, default=0)
+    index_6 = models.BigIntegerField(db_index=True, default=0)
+    index_7 = models.BigIntegerField(db_index=True, default=0)
+    index_8 = models.BigIntegerField(db_index=True, default=0)
+    index_9 = models.BigIntegerField(db_index=True, default=0)
+    index_10 = models.BigIntegerField(db_index=True, default=0)
+    index_11 = models.BigIntegerField(db_index=True, default=0)
+    index_12 = models.BigIntegerField(db_index=True, default=0)
+    index_13 = models.BigIntegerField(db_index=True, default=0)
+    index_14 = models.BigIntegerField(db_index=True, default=0)
+    index_15 = models.BigIntegerField(db_index=True, default=0)
 
     objects = MemoryManager.from_queryset(MemoryQuerySet)()
 
     def __str__(self):
         return "Memory: {}:{}".format(self.source_language, self.target_language)
 
+    def save(self, *args, **kwargs):
+        self.update_index()
+        super().save(*args, **kwargs)
+
+    def update_index(self):
+        """Update fuzzy lookup index and checksum for current content."""
+        self.checksum = get_checksum(self)
+        self.source_length = len(self.source)
+        for field, value in zip(INDEX_FIELDS, get_index(self.source)):
+            setattr(self, field, value)
+
     def get_origin_display(self):
         if self.project:
             text = pgettext("Translation memory category", "Project: {}")
@@ -262,3 +376,27 @@ class Memory(models.Model):
             "origin": self.origin,
             "category": self.get_category(),
         }
+
+
+class PendingMemoryManager(models.Manager):
+    def add_units(self, units, user=None):
+        """Queue units for translation memory update."""
+        self.bulk_create([self.model(unit=unit, user=user) for unit in units])
+
+
+class PendingMemory(models.Model):
+    """Unit waiting for translation memory update."""
+
+    unit = models.ForeignKey("trans.Unit", on_delete=models.deletion.CASCADE)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.deletion.CASCADE,
+        null=True,
+        blank=True,
+        default=None,
+    )
+
+    objects = PendingMemoryManager()
+
+    def __str__(self):
+        return "Pending memory: {}".format(self.unit_id)
@@ -17,9 +17,11 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 
+from itertools import chain
+
 from django.db import transaction
 
-from weblate.memory.models import Memory
+from weblate.memory.models import Memory, PendingMemory
 from weblate.utils.celery import app
 from weblate.utils.state import STATE_TRANSLATED
 
@@ -41,13 +43,17 @@ def import_memory(project_id, component_id=None):
                     translation__component=component, state__gte=STATE_TRANSLATED
                 )
                 .exclude(translation__language=project.source_language)
-                .prefetch_related("translation", "translation__language")
+                .select_related("translation__language")
+            )
+            Memory.objects.bulk_import(
+                chain.from_iterable(
+                    get_memory_entries(None, unit, component, project)
+                    for unit in units.iterator()
+                )
             )
-            for unit in units:
-                update_memory(None, unit, component, project)
 
 
-def update_memory(user, unit, component=None, project=None):
+def get_memory_entries(user, unit, component=None, project=None):
     component = component or unit.translation.component
     project = project or component.project
     params = {
@@ -58,14 +64,38 @@ def update_memory(user, unit, component=None, project=None):
         "origin": component.full_slug,
     }
 
-    Memory.objects.update_entry(
-        user=None, project=project, from_file=False, shared=False, **params
-    )
+    yield Memory(user=None, project=project, from_file=False, shared=False, **params)
     if project.contribute_shared_tm:
-        Memory.objects.update_entry(
-            user=None, project=None, from_file=False, shared=True, **params
-        )
+        yield Memory(user=None, project=None, from_file=False, shared=True, **params)
     if user:
-        Memory.objects.update_entry(
-            user=user, project=None, from_file=False, shared=False, **params
-        )
+        yield Memory(user=user, project=None, from_file=False, shared=False, **params)
+
+
+@app.task(trail=False)
+def update_pending_memory(batch_size=1000):
+    """Update translation memory from units queued by PendingMemory."""
+    while True:
+        with transaction.atomic():
+            pending = list(
+                PendingMemory.objects.select_related(
+                    "user",
+                    "unit__translation__language",
+                    "unit__translation__component__project__source_language",
+                ).order_by("id")[:batch_size]
+            )
+            if not pending:
+                return
+            Memory.objects.bulk_import(
+                chain.from_iterable(
+                    get_memory_entries(item.user, item.unit)
+                    for item in pending
+                    if item.unit.state >= STATE_TRANSLATED
+                    and not item.unit.translation.is_source
+                )
+            )
+            PendingMemory.objects.filter(pk__in=[item.pk for item in pending]).delete()
+
+
+@app.on_after_finalize.connect
+def setup_periodic_tasks(sender, **kwargs):
+    sender.add_periodic_task(300, update_pending_memory.s(), name="update-memory")
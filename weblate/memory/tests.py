@@ -28,10 +28,12 @@ from weblate_schemas import load_schema
 from jsonschema import validate
 from weblate.lang.models import Language
 from weblate.memory.machine import WeblateMemory
-from weblate.memory.models import Memory
+from weblate.memory.models import Memory, PendingMemory
+from weblate.memory.tasks import update_pending_memory
 from weblate.memory.utils import CATEGORY_FILE
 from weblate.trans.tests.test_views import FixtureTestCase
 from weblate.trans.tests.utils import get_test_file
+from weblate.utils.state import STATE_TRANSLATED
 
 
 def add_document():
@@ -63,10 +65,98 @@ class MemoryModelTest(FixtureTestCase):
             ],
         )
 
+    def test_lookup(self):
+        for source in ("Hello, world!", "Hello world", "Goodbye, my friend"):
+            Memory.objects.create(
+                source_language=Language.objects.get(code="en"),
+                target_language=Language.objects.get(code="cs"),
+                source=source,
+                target="Ahoj",
+                origin="test",
+                from_file=True,
+                shared=False,
+            )
+        result = Memory.objects.lookup(
+            Language.objects.get(code="en"),
+            Language.objects.get(code="cs"),
+            "Hello, world!",
+            None,
+            None,
+            False,
+        )
+        self.assertEqual(
+            [memory.source for memory in result], ["Hello, world!", "Hello world"]
+        )
+
+    def test_lookup_similar(self):
+        pairs = (
+            ("Save changes", "Save chanegs"),
+            ("Add new translation", "Add a new translation"),
+            ("The file could not be uploaded.", "The file could not be uploaded!"),
+            (
+                "Please enter a valid email address.",
+                "Please enter valid e-mail address.",
+            ),
+        )
+        for source, text in pairs:
+            Memory.objects.create(
+                source_language=Language.objects.get(code="en"),
+                target_language=Language.objects.get(code="cs"),
+                source=source,
+                target="Ahoj",
+                origin="test",
+                from_file=True,
+                shared=False,
+            )
+        for source, text in pairs:
+            result = Memory.objects.lookup(
+                Language.objects.get(code="en"),
+                Language.objects.get(code="cs"),
+                text,
+                None,
+                None,
+                False,
+            )
+            self.assertEqual([memory.source for memory in result], [source])
+
     def test_import_tmx_command(self):
         call_command("import_memory", get_test_file("memory.tmx"))
         self.assertEqual(Memory.objects.count(), 2)
 
+    def test_import_tmx_duplicate(self):
+        output = StringIO()
+        call_command("import_memory", get_test_file("memory.tmx"), stdout=output)
+        self.assertIn("Imported 2 entries", output.getvalue())
+        call_command("import_memory", get_test_file("memory.tmx"), stdout=output)
+        self.assertEqual(Memory.objects.count(), 2)
+
+    def test_update_entry(self):
+        params = {
+            "source_language": Language.objects.get(code="en"),
+            "target_language": Language.objects.get(code="cs"),
+            "source": "Hello",
+            "target": "Ahoj",
+            "origin": "test",
+            "from_file": True,
+        }
+        Memory.objects.update_entry(**params)
+        Memory.objects.update_entry(**params)
+        self.assertEqual(Memory.objects.count(), 1)
+        Memory.objects.update_entry(shared=True, **params)
+        self.assertEqual(Memory.objects.count(), 2)
+
+    def test_pending(self):
+        unit = self.get_unit()
+        unit.translate(self.user, "Nazdar svete!\n", STATE_TRANSLATED)
+        self.assertEqual(PendingMemory.objects.count(), 1)
+        update_pending_memory()
+        self.assertEqual(PendingMemory.objects.count(), 0)
+        memory = Memory.objects.filter(
+            source="Hello, world!\n", target="Nazdar svete!\n"
+        )
+        self.assertTrue(memory.filter(project=self.project).exists())
+        self.assertTrue(memory.filter(user=self.user).exists())
+
     def test_import_tmx2_command(self):
         call_command("import_memory", get_test_file("memory2.tmx"))
         self.assertEqual(Memory.objects.count(), 1)
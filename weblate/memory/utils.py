@@ -17,6 +17,12 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 
+from random import Random
+
+from siphashc import siphash
+
+from weblate.utils.hash import calculate_fingerprint
+
 CATEGORY_FILE = 1
 CATEGORY_SHARED = 2
 CATEGORY_PRIVATE_OFFSET = 10000000
@@ -36,3 +42,122 @@ def parse_category(category):
     if CATEGORY_PRIVATE_OFFSET <= category < CATEGORY_USER_OFFSET:
         return False, False, category - CATEGORY_PRIVATE_OFFSET, None
     return False, False, None, category - CATEGORY_USER_OFFSET
+
+
+# Fields identifying memory entry, see get_checksum
+CHECKSUM_FIELDS = (
+    "source_language_id",
+    "target_language_id",
+    "source",
+    "target",
+    "origin",
+    "user_id",
+    "project_id",
+    "from_file",
+    "shared",
+)
+
+
+def get_checksum(memory):
+    """Return checksum used to detect duplicate memory entries."""
+    return calculate_fingerprint(*(getattr(memory, field) for field in CHECKSUM_FIELDS))
+
+
+# MinHash index configuration, the signature consists of INDEX_BANDS bands
+# with INDEX_ROWS hashes each. Shorter n-grams are used for short texts as
+# single edit changes large portion of their n-grams.
+NGRAM_LENGTH = 3
+SHORT_NGRAM_LENGTH = 2
+SHORT_TEXT_LENGTH = 30
+INDEX_BANDS = 16
+INDEX_ROWS = 2
+INDEX_FIELDS = ["index_{}".format(band) for band in range(INDEX_BANDS)]
+
+# Minimal similarity of memory entries (see weblate.utils.search.Comparer)
+MIN_SIMILARITY = 75
+
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+def get_permutations(count):
+    """Return coefficients of hash functions used for MinHash."""
+    # Fixed seed to get same index across processes
+    generator = Random(count)
+    return [
+        (
+            generator.randint(1, MERSENNE_PRIME - 1),
+            generator.randint(0, MERSENNE_PRIME - 1),
+        )
+        for _i in range(count)
+    ]
+
+
+PERMUTATIONS = get_permutations(INDEX_BANDS * INDEX_ROWS)
+
+
+def get_ngrams(text, length=NGRAM_LENGTH):
+    """Return set of character n-grams of normalized text."""
+    text = " {} ".format(" ".join(text.lower().split()))
+    if len(text) <= length:
+        return {text}
+    return {text[i : i + length] for i in range(len(text) - length + 1)}
+
+
+def get_ngram_length(length):
+    """Return n-gram length used for text of given length."""
+    if length < SHORT_TEXT_LENGTH:
+        return SHORT_NGRAM_LENGTH
+    return NGRAM_LENGTH
+
+
+def get_index(text, ngram_length=None):
+    """Return MinHash band hashes for a text.
+
+    Texts with similar n-grams are likely to share at least one band.
+    """
+    if ngram_length is None:
+        ngram_length = get_ngram_length(len(text))
+    hashes = [
+        siphash("Weblate Sip Hash", ngram) for ngram in get_ngrams(text, ngram_length)
+    ]
+    signature = [
+        min((mult * value + add) % MERSENNE_PRIME for value in hashes)
+        for mult, add in PERMUTATIONS
+    ]
+    return [
+        siphash(
+            "Weblate Sip Hash",
+            "{}:{}:{}".format(
+                ngram_length,
+                band,
+                signature[band * INDEX_ROWS : (band + 1) * INDEX_ROWS],
+            ),
+        )
+        - 2 ** 63
+        for band in range(INDEX_BANDS)
+    ]
+
+
+def get_lookup_index(text):
+    """Return index fields and band hashes to look up similar texts.
+
+    The similar texts can be indexed using different n-gram length when
+    their length is close to SHORT_TEXT_LENGTH, bands for both are returned
+    in that case.
+    """
+    min_length, max_length = get_length_range(text)
+    lengths = {get_ngram_length(min_length), get_ngram_length(max_length)}
+    return [
+        band
+        for length in sorted(lengths)
+        for band in zip(INDEX_FIELDS, get_index(text, length))
+    ]
+
+
+def get_length_range(text):
+    """Return range of source lengths which can reach minimal similarity."""
+    length = len(text)
+    return (
+        (length * MIN_SIMILARITY + 99) // 100,
+        (length * 100) // MIN_SIMILARITY,
+    )
@@ -17,14 +17,20 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 
+from itertools import groupby, islice
+
 from celery import current_task
 from django.core.exceptions import PermissionDenied
 from django.db import transaction
 
 from weblate.machinery import MACHINE_TRANSLATION_SERVICES
+from weblate.machinery.query import get_batch_translations
 from weblate.trans.models import Change, Component, Suggestion, Unit
 from weblate.utils.state import STATE_FUZZY, STATE_TRANSLATED
 
+# Number of strings translated at once using machine translation
+MT_BATCH_SIZE = 100
+
 
 class AutoTranslate:
     def __init__(self, user, translation, filter_type, mode):
@@ -34,6 +40,7 @@ class AutoTranslate:
         self.mode = mode
         self.updated = 0
         self.total = 0
+        self.errors = {}
         self.target_state = STATE_FUZZY if mode == "fuzzy" else STATE_TRANSLATED
 
     def get_units(self):
@@ -100,50 +107,69 @@ class AutoTranslate:
 
         self.post_process()
 
+    @staticmethod
+    def get_service_groups(engines):
+        """Group services by the order in which they are queried.
+
+        Services accessing the database and the ones with higher maximal score
+        go first, the services with same rank are queried concurrently.
+        """
+        services = sorted(
+            (MACHINE_TRANSLATION_SERVICES[engine] for engine in engines),
+            key=lambda service: (not service.concurrent, service.get_rank()),
+            reverse=True,
+        )
+        return [
+            list(group)
+            for _key, group in groupby(
+                services,
+                key=lambda service: (not service.concurrent, service.get_rank()),
+            )
+        ]
+
     def fetch_mt(self, engines, threshold):
         """Get the translations."""
         translations = {}
-
-        for pos, unit in enumerate(self.get_units()):
-            # a list to store all found translations
-            max_quality = threshold - 1
-            translation = None
-
-            # Run engines with higher maximal score first
-            engines = sorted(
-                engines,
-                key=lambda x: MACHINE_TRANSLATION_SERVICES[x].get_rank(),
-                reverse=True,
-            )
-            for engine in engines:
-                translation_service = MACHINE_TRANSLATION_SERVICES[engine]
-
-                # Skip service if it can not provide better results.
-                # Typically we skip machine translation when we have
-                # a terminology match.
-                if max_quality >= translation_service.max_score:
+        groups = self.get_service_groups(engines)
+        language = self.translation.language.code
+        units = self.get_units().iterator()
+        pos = 0
+
+        while True:
+            batch = list(islice(units, MT_BATCH_SIZE))
+            if not batch:
+                break
+
+            max_quality = {unit.pk: threshold - 1 for unit in batch}
+            for services in groups:
+                # Skip strings where the services can not provide better
+                # results. Typically we skip machine translation when we
+                # have a terminology match.
+                max_score = max(service.max_score for service in services)
+                pending = [unit for unit in batch if max_quality[unit.pk] < max_score]
+                if not pending:
                     continue
 
-                result = translation_service.translate(
-                    self.translation.language.code,
-                    unit.get_source_plurals()[0],
-                    unit,
+                results, errors = get_batch_translations(
+                    services,
+                    language,
+                    [(unit.get_source_plurals()[0], unit) for unit in pending],
                     self.user,
+                    wait=True,
                 )
-
-                for item in result:
-                    if item["quality"] > max_quality:
-                        max_quality = item["quality"]
-                        translation = item["text"]
-
-                # Break if we can't get better match
-                if max_quality == 100:
-                    break
-
-            if translation is None:
-                continue
-
-            translations[unit.pk] = translation
+                for name, error in errors.items():
+                    if name not in self.errors:
+                        self.translation.log_warning(
+                            "machine translation using %s failed: %s", name, error
+                        )
+                        self.errors[name] = error
+
+                for unit, result in zip(pending, results):
+                    if result and result[0]["quality"] > max_quality[unit.pk]:
+                        max_quality[unit.pk] = result[0]["quality"]
+                        translations[unit.pk] = result[0]["text"]
+
+            pos += len(batch)
             self.set_progress(pos / 2)
 
         return translations
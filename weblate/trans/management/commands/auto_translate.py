@@ -106,6 +106,10 @@ class Command(WeblateTranslationCommand):
         auto = AutoTranslate(user, translation, filter_type, "translate")
         if options["mt"]:
             auto.process_mt(options["mt"], options["threshold"])
+            for name, error in sorted(auto.errors.items()):
+                self.stderr.write(
+                    "Machine translation {} failed: {}".format(name, error)
+                )
         else:
             auto.process_others(source)
         self.stdout.write("Updated {0} units".format(auto.updated))
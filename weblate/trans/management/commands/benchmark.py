@@ -19,6 +19,11 @@
 
 import cProfile
 import pstats
+from time import time
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import override_settings
 
 from weblate.trans.models import Component, Project
 from weblate.utils.management.base import BaseCommand
@@ -48,6 +53,12 @@ class Command(BaseCommand):
             "--delete", action="store_true", help="delete after testing"
         )
         parser.add_argument("--format", default="po", help="file format")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.UNIT_IMPORT_BATCH_SIZE,
+            help="number of strings stored in single query, 0 to disable bulk import",
+        )
         parser.add_argument("project", help="Existing project slug for tests")
         parser.add_argument("repo", help="Test VCS repository URL")
         parser.add_argument("mask", help="File mask")
@@ -57,15 +68,30 @@ class Command(BaseCommand):
         # Delete any possible previous tests
         Component.objects.filter(project=project, slug="benchmark").delete()
         profiler = cProfile.Profile()
-        component = profiler.runcall(
-            Component.objects.create,
-            name="Benchmark",
-            slug="benchmark",
-            repo=options["repo"],
-            filemask=options["mask"],
-            template=options["template"],
-            file_format=options["format"],
-            project=project,
+        queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        start = time()
+        with override_settings(UNIT_IMPORT_BATCH_SIZE=options["batch_size"]):
+            with connection.execute_wrapper(count_queries):
+                component = profiler.runcall(
+                    Component.objects.create,
+                    name="Benchmark",
+                    slug="benchmark",
+                    repo=options["repo"],
+                    filemask=options["mask"],
+                    template=options["template"],
+                    file_format=options["format"],
+                    project=project,
+                )
+        self.stdout.write(
+            "Import took {:.2f} seconds, {} database queries".format(
+                time() - start, queries
+            )
         )
         stats = pstats.Stats(profiler, stream=self.stdout)
         stats.sort_stats(options["profile_sort"])
@@ -0,0 +1,34 @@
+#
+# Copyright © 2012 - 2020 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <https://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+from weblate.trans.management.commands import WeblateComponentCommand
+from weblate.utils.stats import rebuild_stats
+
+
+class Command(WeblateComponentCommand):
+    help = "rebuilds stored stats"
+
+    def handle(self, *args, **options):
+        if options["all"]:
+            components = None
+        else:
+            components = self.get_components(**options)
+        rebuild_stats(
+            components, self.stdout.write if int(options["verbosity"]) >= 1 else None
+        )
@@ -1,5 +1,6 @@
 # Generated by Django 2.2.5 on 2019-12-24 12:17
 
+from django.core.cache import cache
 from django.db import migrations
 
 from weblate.utils.stats import BaseStats
@@ -22,9 +23,9 @@ def fixup_source_translations(apps, schema_editor):
     # Invalidate caches for bilingual source translation as it might
     # now show different numbers
     for translation in Translation.objects.using(db_alias).filter(filename=""):
-        BaseStats(translation).invalidate()
-        BaseStats(translation.component).invalidate()
-        BaseStats(translation.component.project).invalidate()
+        cache.delete(BaseStats(translation).cache_key)
+        cache.delete(BaseStats(translation.component).cache_key)
+        cache.delete(BaseStats(translation.component.project).cache_key)
 
 
 class Migration(migrations.Migration):
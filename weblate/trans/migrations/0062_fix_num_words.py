@@ -1,5 +1,6 @@
 # Generated by Django 3.0.3 on 2020-02-21 10:19
 
+from django.core.cache import cache
 from django.db import migrations
 
 from weblate.trans.util import split_plural
@@ -21,9 +22,9 @@ def fixup_num_words(apps, schema_editor):
 
     # Invalidate caches
     for translation in translations.values():
-        BaseStats(translation).invalidate()
-        BaseStats(translation.component).invalidate()
-        BaseStats(translation.component.project).invalidate()
+        cache.delete(BaseStats(translation).cache_key)
+        cache.delete(BaseStats(translation.component).cache_key)
+        cache.delete(BaseStats(translation.component.project).cache_key)
 
 
 class Migration(migrations.Migration):
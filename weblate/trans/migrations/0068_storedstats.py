@@ -0,0 +1,30 @@
+# Generated by Django 3.0.4 on 2020-03-20 10:12
+
+from django.db import migrations, models
+
+import weblate.utils.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("trans", "0067_fill_change_language")]
+
+    operations = [
+        migrations.CreateModel(
+            name="StoredStats",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=190, unique=True)),
+                ("data", weblate.utils.fields.JSONField(default={})),
+                ("timestamp", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 3.0.4 on 2020-03-23 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("trans", "0068_storedstats")]
+
+    operations = [
+        migrations.AddField(
+            model_name="unit",
+            name="fingerprint",
+            field=models.BigIntegerField(default=0),
+        )
+    ]
@@ -20,6 +20,7 @@
 
 import os
 import shutil
+from copy import copy
 
 from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
@@ -35,6 +36,7 @@ from weblate.trans.models.dictionary import Dictionary
 from weblate.trans.models.label import Label
 from weblate.trans.models.project import Project
 from weblate.trans.models.shaping import Shaping
+from weblate.trans.models.stats import StoredStats
 from weblate.trans.models.suggestion import Suggestion, Vote
 from weblate.trans.models.translation import Translation
 from weblate.trans.models.unit import Unit
@@ -60,6 +62,7 @@ __all__ = [
     "Alert",
     "Shaping",
     "Label",
+    "StoredStats",
 ]
 
 
@@ -153,8 +156,10 @@ def change_labels(sender, instance, **kwargs):
 def update_comment_flag(sender, instance, **kwargs):
     """Update related unit comment flags."""
     # Update unit stats
-    if instance.unit.update_has_comment():
-        instance.unit.translation.invalidate_cache()
+    unit = instance.unit
+    old_unit = copy(unit)
+    if unit.update_has_comment():
+        unit.translation.update_unit_stats(old_unit, unit)
 
 
 @receiver(post_delete, sender=Suggestion)
@@ -163,8 +168,10 @@ def update_comment_flag(sender, instance, **kwargs):
 def update_suggestion_flag(sender, instance, **kwargs):
     """Update related unit suggestion flags."""
     # Update unit stats
-    if instance.unit.update_has_suggestion():
-        instance.unit.translation.invalidate_cache()
+    unit = instance.unit
+    old_unit = copy(unit)
+    if unit.update_has_suggestion():
+        unit.translation.update_unit_stats(old_unit, unit)
 
 
 @receiver(user_pre_delete)
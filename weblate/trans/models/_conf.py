@@ -55,6 +55,18 @@ class WeblateConf(AppConf):
     # Enable lazy commits
     COMMIT_PENDING_HOURS = 24
 
+    # Recalculate invalidated stats in background
+    STATS_BACKGROUND_UPDATE = False
+
+    # Number of strings stored in single query when importing files
+    UNIT_IMPORT_BATCH_SIZE = 1000
+
+    # Number of processes used to parse translation files
+    PARSE_PROCESSES = 1
+
+    # Size of disk cache for parsed translation files in bytes
+    STORE_CACHE_SIZE = 0
+
     # Automatically update vcs repositories daily
     AUTO_UPDATE = False
 
@@ -17,8 +17,10 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 
+from functools import partial
+
 from django.conf import settings
-from django.db import models, transaction
+from django.db import connections, models, transaction
 from django.db.models import Count
 from django.utils import timezone
 from django.utils.translation import gettext as _
@@ -145,6 +147,22 @@ class ChangeManager(models.Manager):
             user = None
         return super().create(user=user, **kwargs)
 
+    def bulk_create(self, objs, **kwargs):
+        """Wrapper to fill in related objects and send notifications."""
+        from weblate.accounts.tasks import notify_change
+
+        if not connections[self.db].features.can_return_rows_from_bulk_insert:
+            # We need primary keys for notifications
+            for change in objs:
+                change.save()
+            return objs
+        for change in objs:
+            change.fill_related()
+        result = super().bulk_create(objs, **kwargs)
+        for change in result:
+            transaction.on_commit(partial(notify_change.delay, change.pk))
+        return result
+
 
 class Change(models.Model, UserDisplayMixin):
     ACTION_UPDATE = 0
@@ -518,9 +536,8 @@ class Change(models.Model, UserDisplayMixin):
 
         return ""
 
-    def save(self, *args, **kwargs):
-        from weblate.accounts.tasks import notify_change
-
+    def fill_related(self):
+        """Fill in denormalized relations based on unit or translation."""
         if self.unit:
             self.translation = self.unit.translation
         if self.translation:
@@ -531,5 +548,10 @@ class Change(models.Model, UserDisplayMixin):
         if self.dictionary:
             self.project = self.dictionary.project
             self.language = self.dictionary.language
+
+    def save(self, *args, **kwargs):
+        from weblate.accounts.tasks import notify_change
+
+        self.fill_related()
         super().save(*args, **kwargs)
         transaction.on_commit(lambda: notify_change.delay(self.pk))
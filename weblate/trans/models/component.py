@@ -25,6 +25,7 @@ import time
 from collections import Counter
 from copy import copy
 from glob import glob
+from multiprocessing import current_process
 from urllib.parse import urlparse
 
 from celery import current_task
@@ -43,8 +44,8 @@ from django.utils.translation import gettext_lazy, ngettext
 
 from weblate.checks.flags import Flags
 from weblate.formats.models import FILE_FORMATS
+from weblate.formats.parallel import parse_parallel
 from weblate.lang.models import Language
-from weblate.memory.tasks import import_memory
 from weblate.trans.defines import (
     COMPONENT_NAME_LENGTH,
     FILENAME_LENGTH,
@@ -1102,16 +1103,23 @@ class Component(models.Model, URLMixin, PathMixin):
         )
         components = {}
 
-        # Commit pending changes
-        for translation in translations:
-            if translation.component_id == self.id:
-                translation.component = self
-            if translation.component.linked_component_id == self.id:
-                translation.component.linked_component = self
-            translation.commit_pending(
-                reason, user, skip_push=True, force=True, signals=False
-            )
-            components[translation.component.pk] = translation.component
+        with self.repository.lock:
+            # Linked components share the repository, so all commits are
+            # written at once
+            batch = self.repository.commit_batch()
+
+            # Commit pending changes
+            for translation in translations:
+                if translation.component_id == self.id:
+                    translation.component = self
+                if translation.component.linked_component_id == self.id:
+                    translation.component.linked_component = self
+                translation.commit_pending(
+                    reason, user, skip_push=True, force=True, signals=False, batch=batch
+                )
+                components[translation.component.pk] = translation.component
+
+            batch.finish()
 
         # Fire postponed post commit signals
         for component in components.values():
@@ -1250,6 +1258,39 @@ class Component(models.Model, URLMixin, PathMixin):
             return [self.template] + sorted(matches)
         return sorted(matches)
 
+    def parse_translations(self, matches, langs=None, force=False):
+        """Parse translation files in parallel processes.
+
+        Returns iterator over parsed stores matching the files to process or
+        None in case parallel parsing is not used.
+        """
+        if (
+            settings.PARSE_PROCESSES <= 1
+            or len(matches) <= 1
+            or current_process().daemon
+        ):
+            return None
+        # Parse only if we expect a full reload, otherwise most of
+        # the files are skipped as unchanged
+        if not force and self.translation_set.exclude(revision="").exists():
+            return None
+        template = self.get_template_filename() if self.has_template() else None
+        jobs = [
+            (
+                self.file_format,
+                os.path.join(self.full_path, path),
+                template,
+                self.get_lang_code(path),
+                path == self.template,
+            )
+            for path in matches
+            if langs is None or self.get_lang_code(path) in langs
+        ]
+        self.log_info(
+            "parsing %d files in %d processes", len(jobs), settings.PARSE_PROCESSES
+        )
+        return parse_parallel(jobs, settings.PARSE_PROCESSES)
+
     def update_source_checks(self):
         self.log_debug("running source checks")
         for unit in self.updated_sources.values():
@@ -1341,6 +1382,9 @@ class Component(models.Model, URLMixin, PathMixin):
             self.translations_count = len(matches) + sum(
                 (c.translation_set.count() for c in self.linked_childs)
             )
+        parsed = self.parse_translations(matches, langs, force)
+        # Get hashes of unchanged files at once instead of reading them
+        hashes = self.get_object_hashes(matches)
         for pos, path in enumerate(matches):
             if not self._sources_prefetched and path != self.template:
                 self.preload_sources()
@@ -1350,6 +1394,8 @@ class Component(models.Model, URLMixin, PathMixin):
                     self.log_info("skipping %s", path)
                     continue
 
+                store = next(parsed) if parsed is not None else None
+
                 self.log_info(
                     "checking %s (%s) [%d/%d]", path, code, pos + 1, len(matches)
                 )
@@ -1369,7 +1415,14 @@ class Component(models.Model, URLMixin, PathMixin):
                     )
                     continue
                 translation = Translation.objects.check_sync(
-                    self, lang, code, path, force, request=request
+                    self,
+                    lang,
+                    code,
+                    path,
+                    force,
+                    request=request,
+                    store=store,
+                    hashes=hashes,
                 )
                 was_change |= bool(translation.reason)
                 translations[translation.id] = translation
@@ -1438,8 +1491,6 @@ class Component(models.Model, URLMixin, PathMixin):
         if was_change:
             self.update_shapings()
             component_post_update.send(sender=self.__class__, component=self)
-            # Update translation memory
-            transaction.on_commit(lambda: import_memory.delay(self.project_id, self.id))
 
         self.log_info("updating completed")
         return was_change
@@ -1723,6 +1774,13 @@ class Component(models.Model, URLMixin, PathMixin):
                 {"suggestion_autoaccept": msg, "suggestion_voting": msg}
             )
 
+    def get_object_hashes(self, matches):
+        """Return repository hashes of translation and template files."""
+        filenames = [os.path.join(self.full_path, path) for path in matches]
+        if self.has_template():
+            filenames.append(self.get_template_filename())
+        return self.repository.get_object_hashes(filenames)
+
     def get_template_filename(self):
         """Create absolute filename for template."""
         return os.path.join(self.full_path, self.template)
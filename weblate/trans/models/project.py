@@ -18,13 +18,12 @@
 #
 
 
-import functools
 import os
 import os.path
 
 from django.conf import settings
 from django.db import models, transaction
-from django.db.models import Q
+from django.db.models import Exists, OuterRef
 from django.urls import reverse
 from django.utils.functional import cached_property
 from django.utils.translation import gettext as _
@@ -310,10 +309,13 @@ class Project(models.Model, URLMixin, PathMixin):
         )
 
     def run_batch_checks(self, attr_name):
-        """Run batch executed checks."""
+        """Run batch executed checks.
+
+        The checks return matching content hashes and languages, these are
+        applied using set operations in the database.
+        """
         from weblate.trans.models import Unit
 
-        create = []
         meth_name = "check_{}_project".format(attr_name)
         for check, check_obj in CHECKS.items():
             if not getattr(check_obj, attr_name) or not check_obj.batch_update:
@@ -321,42 +323,60 @@ class Project(models.Model, URLMixin, PathMixin):
             self.log_info("running batch check: %s", check)
             # List of triggered checks
             data = getattr(check_obj, meth_name)(self)
-            # Fetch existing check instances
-            existing = set(
-                Check.objects.filter(
-                    unit__translation__component__project=self, check=check
-                ).values_list("unit__content_hash", "unit__translation__language_id")
+            units = Unit.objects.filter(translation__component__project=self)
+            checks = Check.objects.filter(
+                unit__translation__component__project=self, check=check
             )
-            # Create new check instances
-            for item in data:
-                if "translation__language" not in item:
-                    item["translation__language"] = self.source_language.id
-                key = (item["content_hash"], item["translation__language"])
-                if key in existing:
-                    existing.discard(key)
-                else:
-                    units = Unit.objects.filter(
-                        translation__component__project=self,
-                        translation__language_id=item["translation__language"],
-                        content_hash=item["content_hash"],
+            if attr_name == "source":
+                # Source checks are reported on source strings only
+                units = units.filter(translation__language=self.source_language)
+                checks = checks.annotate(
+                    matches=Exists(
+                        data.filter(content_hash=OuterRef("unit__content_hash"))
+                    )
+                ).exclude(
+                    matches=True, unit__translation__language=self.source_language
+                )
+                units = units.filter(
+                    Exists(data.filter(content_hash=OuterRef("content_hash")))
+                )
+            else:
+                checks = checks.annotate(
+                    matches=Exists(
+                        data.filter(
+                            content_hash=OuterRef("unit__content_hash"),
+                            translation__language=OuterRef(
+                                "unit__translation__language"
+                            ),
+                        )
+                    )
+                ).filter(matches=False)
+                units = units.filter(
+                    Exists(
+                        data.filter(
+                            content_hash=OuterRef("content_hash"),
+                            translation__language=OuterRef("translation__language"),
+                        )
                     )
-                    for unit in units:
-                        create.append(Check(unit=unit, check=check, ignore=False))
-            # Remove stale instances
-            if existing:
-                query = functools.reduce(
-                    lambda q, value: q
-                    | (
-                        Q(unit__content_hash=value[0])
-                        & Q(unit__translation__language_id=value[1])
-                    ),
-                    existing,
-                    Q(),
                 )
-                Check.objects.filter(check=check).filter(query).delete()
-        # Create new checks
-        if create:
-            Check.objects.bulk_create(create, batch_size=500, ignore_conflicts=True)
+
+            # Remove stale instances
+            stale = list(checks.values_list("pk", flat=True))
+            if stale:
+                Check.objects.filter(pk__in=stale).delete()
+
+            # Create new check instances
+            missing = units.filter(
+                ~Exists(Check.objects.filter(unit=OuterRef("pk"), check=check))
+            )
+            Check.objects.bulk_create(
+                [
+                    Check(unit_id=pk, check=check, ignore=False)
+                    for pk in missing.values_list("pk", flat=True)
+                ],
+                batch_size=500,
+                ignore_conflicts=True,
+            )
 
     def run_target_checks(self):
         """Run batch executed target checks."""
@@ -0,0 +1,48 @@
+#
+# Copyright © 2012 - 2020 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <https://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+from django.db import models
+from django.utils.dateparse import parse_datetime
+
+from weblate.utils.fields import JSONField
+
+
+class StoredStats(models.Model):
+    """Persistent copy of the cached stats.
+
+    The cache is used as read-through layer on top of this, so that losing
+    the cache content does not lead to recalculating all stats.
+    """
+
+    key = models.CharField(max_length=190, unique=True)
+    data = JSONField()
+    timestamp = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        app_label = "trans"
+
+    def __str__(self):
+        return self.key
+
+    def get_data(self):
+        """Return stats data with timestamps converted back from JSON."""
+        data = self.data or {}
+        if data.get("last_changed"):
+            data["last_changed"] = parse_datetime(data["last_changed"])
+        return data
@@ -20,11 +20,14 @@
 
 import codecs
 import os
+import time
+from functools import partial
 
+from django.conf import settings
 from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.db import models, transaction
-from django.db.models.aggregates import Max
+from django.db.models import OuterRef, Subquery
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.functional import cached_property
@@ -34,8 +37,11 @@ from weblate.checks import CHECKS
 from weblate.checks.flags import Flags
 from weblate.formats.auto import try_load
 from weblate.formats.base import UnitNotFound
+from weblate.formats.cache import get_store_cache
 from weblate.formats.helpers import BytesIOMode
+from weblate.formats.parallel import ParsedStore
 from weblate.lang.models import Language, Plural
+from weblate.memory.models import PendingMemory
 from weblate.trans.checklists import TranslationChecklist
 from weblate.trans.defines import FILENAME_LENGTH
 from weblate.trans.exceptions import FileParseError, PluralFormsMismatch
@@ -47,18 +53,30 @@ from weblate.trans.models.unit import (
     STATE_FUZZY,
     STATE_TRANSLATED,
     Unit,
+    UnitImportBatch,
 )
 from weblate.trans.signals import store_post_load, vcs_post_commit, vcs_pre_commit
 from weblate.trans.util import split_plural
 from weblate.trans.validators import validate_check_flags
 from weblate.utils.errors import report_error
+from weblate.utils.hash import calculate_fingerprint
 from weblate.utils.render import render_template
 from weblate.utils.site import get_site_url
-from weblate.utils.stats import TranslationStats
+from weblate.utils.stats import TranslationStats, get_unit_stats_delta
 
 
 class TranslationManager(models.Manager):
-    def check_sync(self, component, lang, code, path, force=False, request=None):
+    def check_sync(
+        self,
+        component,
+        lang,
+        code,
+        path,
+        force=False,
+        request=None,
+        store=None,
+        hashes=None,
+    ):
         """Parse translation meta info and updates translation object."""
         translation = self.get_or_create(
             language=lang,
@@ -80,7 +98,7 @@ class TranslationManager(models.Manager):
             force = True
             translation.check_flags = flags
             translation.save(update_fields=["check_flags"])
-        translation.check_sync(force, request=request)
+        translation.check_sync(force, request=request, store=store, hashes=hashes)
 
         return translation
 
@@ -265,8 +283,37 @@ class Translation(models.Model, URLMixin, LoggerMixin):
         except Exception as exc:
             self.component.handle_parse_error(exc, self)
 
-    def check_sync(self, force=False, request=None, change=None):
-        """Check whether database is in sync with git and possibly updates."""
+    def get_parsed_store(self, revision):
+        """Return parsed store for reading units.
+
+        It is loaded from the store cache if enabled, the cached content is
+        identified by the file format and blob hashes of the files.
+        """
+        cache = get_store_cache()
+        if cache is None:
+            return self.store
+        key = (
+            self.component.file_format,
+            revision,
+            self.language_code,
+            self.is_template,
+        )
+        store = cache.get(key)
+        if store is None:
+            self.log_debug("parsed store not in cache")
+            store = ParsedStore(self.store)
+            cache.set(key, store)
+        return store
+
+    def check_sync(
+        self, force=False, request=None, change=None, store=None, hashes=None
+    ):
+        """Check whether database is in sync with git and possibly updates.
+
+        The store can be passed when the file was already parsed elsewhere,
+        it is used only for reading the units. The hashes of files already
+        known from the repository can be passed as well.
+        """
         if change is None:
             change = Change.ACTION_UPDATE
         if request is None:
@@ -275,9 +322,10 @@ class Translation(models.Model, URLMixin, LoggerMixin):
             user = request.user
 
         # Check if we're not already up to date
+        revision = self.get_git_blob_hash(hashes)
         if not self.revision:
             self.reason = "new file"
-        elif self.revision != self.get_git_blob_hash():
+        elif self.revision != revision:
             self.reason = "content changed"
         elif force:
             self.reason = "check forced"
@@ -287,11 +335,20 @@ class Translation(models.Model, URLMixin, LoggerMixin):
 
         self.log_info("processing %s, %s", self.filename, self.reason)
 
-        # List of updated units (used for cleanup and duplicates detection)
+        # List of updated units and all seen ids (used for cleanup and
+        # duplicates detection)
         updated = {}
+        seen = set()
+        duplicates = []
+
+        # Collect database changes and store them in bulk
+        batch = None
+        if settings.UNIT_IMPORT_BATCH_SIZE and not self.is_template:
+            batch = UnitImportBatch(self, settings.UNIT_IMPORT_BATCH_SIZE)
 
         try:
-            store = self.store
+            if store is None:
+                store = self.get_parsed_store(revision)
 
             # Store plural
             plural = store.get_plural(self.language)
@@ -304,9 +361,16 @@ class Translation(models.Model, URLMixin, LoggerMixin):
             # Position of current unit
             pos = 0
 
-            # Select all current units for update
-            dbunits = {unit.id_hash: unit for unit in self.unit_set.select_for_update()}
+            # Fingerprints and positions of current units
+            fingerprints = {
+                id_hash: (fingerprint, position)
+                for id_hash, fingerprint, position in self.unit_set.values_list(
+                    "id_hash", "fingerprint", "position"
+                )
+            }
 
+            # Find changed units, unchanged ones are skipped unless forced
+            pending = []
             for unit in store.content_units:
                 id_hash = unit.id_hash
 
@@ -314,27 +378,30 @@ class Translation(models.Model, URLMixin, LoggerMixin):
                 pos += 1
 
                 # Check for possible duplicate units
-                if id_hash in updated:
-                    newunit = updated[id_hash]
-                    self.log_warning(
-                        "duplicate string to translate: %s (%s)",
-                        newunit,
-                        repr(newunit.source),
-                    )
-                    Change.objects.create(
-                        unit=newunit,
-                        action=Change.ACTION_DUPLICATE_STRING,
-                        user=user,
-                        author=user,
-                    )
-                    self.component.trigger_alert(
-                        "DuplicateString",
-                        language_code=self.language.code,
-                        source=newunit.source,
-                        unit_pk=newunit.pk,
-                    )
+                if id_hash in seen:
+                    duplicates.append(id_hash)
                     continue
+                seen.add(id_hash)
+
+                fingerprint = self.get_unit_fingerprint(unit)
+                if (
+                    not force
+                    and fingerprint
+                    and fingerprints.get(id_hash) == (fingerprint, pos)
+                ):
+                    continue
+                pending.append((pos, unit, fingerprint))
+
+            # Select changed units for update, all of them on large changes
+            dbunits = self.unit_set.select_for_update()
+            if len(pending) <= 1000:
+                dbunits = dbunits.filter(
+                    id_hash__in=[unit.id_hash for _pos, unit, _fingerprint in pending]
+                )
+            dbunits = {unit.id_hash: unit for unit in dbunits}
 
+            for pos, unit, fingerprint in pending:
+                id_hash = unit.id_hash
                 try:
                     newunit = dbunits[id_hash]
                     is_new = False
@@ -342,7 +409,7 @@ class Translation(models.Model, URLMixin, LoggerMixin):
                     newunit = Unit(translation=self, id_hash=id_hash, state=-1)
                     is_new = True
 
-                newunit.update_from_unit(unit, pos, is_new)
+                newunit.update_from_unit(unit, pos, is_new, batch, fingerprint)
 
                 # Check if unit is worth notification:
                 # - new and untranslated
@@ -358,14 +425,52 @@ class Translation(models.Model, URLMixin, LoggerMixin):
                     )
                 )
 
-                # Store current unit ID
+                # Store current unit
                 updated[id_hash] = newunit
         except FileParseError as error:
             self.log_warning("skipping update due to parse error: %s", error)
             return
 
+        if batch is not None:
+            batch.save()
+
+        # Report duplicate units, this needs saved units
+        for id_hash in duplicates:
+            if id_hash in updated:
+                newunit = updated[id_hash]
+            else:
+                newunit = self.unit_set.get(id_hash=id_hash)
+            self.log_warning(
+                "duplicate string to translate: %s (%s)", newunit, repr(newunit.source)
+            )
+            Change.objects.create(
+                unit=newunit,
+                action=Change.ACTION_DUPLICATE_STRING,
+                user=user,
+                author=user,
+            )
+            self.component.trigger_alert(
+                "DuplicateString",
+                language_code=self.language.code,
+                source=newunit.source,
+                unit_pk=newunit.pk,
+            )
+
+        # Queue translation memory update for changed translations
+        if not self.is_source:
+            PendingMemory.objects.add_units(
+                unit
+                for unit in updated.values()
+                if unit.state >= STATE_TRANSLATED
+                and (
+                    unit.target != unit.old_unit.target
+                    or unit.source != unit.old_unit.source
+                    or unit.state != unit.old_unit.state
+                )
+            )
+
         # Delete stale units
-        stale = set(dbunits) - set(updated)
+        stale = set(fingerprints) - seen
         if stale:
             self.unit_set.filter(id_hash__in=stale).delete()
             self.component.needs_cleanup = True
@@ -373,7 +478,7 @@ class Translation(models.Model, URLMixin, LoggerMixin):
         # We should also do cleanup on source strings tracking objects
 
         # Update revision and stats
-        self.store_hash()
+        self.store_hash(hashes)
 
         # Store change entry
         Change.objects.create(translation=self, action=change, user=user, author=user)
@@ -381,6 +486,33 @@ class Translation(models.Model, URLMixin, LoggerMixin):
         # Invalidate keys cache
         transaction.on_commit(self.invalidate_keys)
 
+    def get_unit_fingerprint(self, unit):
+        """Calculate fingerprint of all unit attributes synchronized from file.
+
+        Returns zero if it can not be calculated, such unit is always updated.
+        """
+        try:
+            return calculate_fingerprint(
+                unit.source,
+                unit.target,
+                unit.context,
+                unit.flags,
+                unit.locations,
+                unit.notes,
+                unit.previous_source,
+                unit.content_hash,
+                unit.template is not None,
+                bool(unit.is_readonly()),
+                bool(unit.is_translated()),
+                bool(unit.is_fuzzy(False)),
+                bool(unit.is_fuzzy(True)),
+                bool(unit.is_approved(False)),
+                bool(unit.is_approved(True)),
+                self.component.project.enable_review,
+            )
+        except Exception:
+            return 0
+
     def do_update(self, request=None, method=None):
         return self.component.do_update(request, method=method)
 
@@ -396,20 +528,28 @@ class Translation(models.Model, URLMixin, LoggerMixin):
     def can_push(self):
         return self.component.can_push()
 
-    def get_git_blob_hash(self):
-        """Return current VCS blob hash for file."""
-        ret = self.component.repository.get_object_hash(self.get_filename())
-
-        if not self.component.has_template():
-            return ret
+    def get_git_blob_hash(self, hashes=None):
+        """Return current VCS blob hash for file.
 
-        return ",".join(
-            [ret, self.component.repository.get_object_hash(self.component.template)]
-        )
+        The hashes already known from the repository can be passed to avoid
+        hashing the files again.
+        """
+        repository = self.component.repository
+        filenames = [self.get_filename()]
+        if self.component.has_template():
+            filenames.append(self.component.get_template_filename())
+
+        result = []
+        for filename in filenames:
+            if hashes and filename in hashes:
+                result.append(hashes[filename])
+            else:
+                result.append(repository.get_object_hash(filename))
+        return ",".join(result)
 
-    def store_hash(self):
+    def store_hash(self, hashes=None):
         """Store current hash in database."""
-        self.revision = self.get_git_blob_hash()
+        self.revision = self.get_git_blob_hash(hashes)
         self.save(update_fields=["revision"])
 
     def get_last_author(self, email=False):
@@ -420,43 +560,123 @@ class Translation(models.Model, URLMixin, LoggerMixin):
 
         return User.objects.get(pk=self.stats.last_author).get_author_name(email)
 
-    def commit_pending(self, reason, user, skip_push=False, force=False, signals=True):
-        """Commit any pending changes."""
+    def commit_pending(
+        self, reason, user, skip_push=False, force=False, signals=True, batch=None
+    ):
+        """Commit any pending changes.
+
+        The commits can be added to a batch shared with other translations,
+        the caller is then responsible for finishing it.
+        """
         if not force and not self.needs_commit():
             return False
 
         self.log_info("committing pending changes (%s)", reason)
 
-        with self.component.repository.lock, transaction.atomic():
-            while True:
-                # Find oldest change break loop if there is none left
-                try:
-                    unit = (
-                        self.unit_set.filter(pending=True)
-                        .annotate(Max("change__timestamp"))
-                        .order_by("change__timestamp__max")[0]
-                    )
-                except IndexError:
-                    break
-
-                # Get last change metadata
-                author, timestamp = unit.get_last_content_change()
-
+        repository = self.component.repository
+        with repository.lock, transaction.atomic():
+            start = time.time()
+            pending = self.get_pending_units()
+            timings = {"load": time.time() - start, "store": 0, "commit": 0}
+            own_batch = batch is None
+            if own_batch:
+                batch = repository.commit_batch()
+            committed = False
+
+            for author, timestamp, units in pending:
                 author_name = author.get_author_name()
 
                 # Flush pending units for this author
-                self.update_units(author_name, author.id)
+                start = time.time()
+                self.update_units(units, author_name)
+                timings["store"] += time.time() - start
 
                 # Commit changes
-                self.git_commit(
-                    user, author_name, timestamp, skip_push=skip_push, signals=signals
+                start = time.time()
+                committed |= self.git_commit(
+                    user, author_name, timestamp, skip_push=True, batch=batch
                 )
+                timings["commit"] += time.time() - start
+
+            # Write all commits at once
+            if own_batch:
+                start = time.time()
+                batch.finish()
+                timings["commit"] += time.time() - start
+
+            if committed:
+                # Post commit hook
+                if signals:
+                    vcs_post_commit.send(
+                        sender=self.__class__,
+                        component=self.component,
+                        translation=self,
+                    )
+
+                # Push if we should
+                if not skip_push:
+                    self.component.push_if_needed()
+
+            self.log_info(
+                "committed %d authors: loading %.2f seconds, "
+                "store update %.2f seconds, commit %.2f seconds",
+                len(pending),
+                timings["load"],
+                timings["store"],
+                timings["commit"],
+            )
 
         # Update stats (the translated flag might have changed)
         self.invalidate_cache()
 
         return True
 
+    def get_pending_units(self):
+        """Return pending units grouped by author of their last content change.
+
+        Returns list of author, timestamp and units tuples ordered by the
+        oldest change.
+        """
+        from weblate.auth.models import get_anonymous
+
+        units = (
+            self.unit_set.filter(pending=True)
+            .annotate(
+                last_change_id=Subquery(
+                    Change.objects.content()
+                    .filter(unit=OuterRef("pk"))
+                    .order_by("-timestamp")
+                    .values("pk")[:1]
+                )
+            )
+            .select_for_update()
+        )
+        units = list(units)
+        changes = Change.objects.select_related("author").in_bulk(
+            {unit.last_change_id for unit in units if unit.last_change_id}
+        )
+
+        result = {}
+        for unit in units:
+            unit.translation = self
+            try:
+                change = changes[unit.last_change_id]
+                author = change.author or get_anonymous()
+                timestamp = change.timestamp
+            except KeyError:
+                self.log_error("missing content change: %s", unit)
+                author = get_anonymous()
+                timestamp = timezone.now()
+            if author.id in result:
+                result[author.id][2].append(unit)
+                result[author.id][1] = min(result[author.id][1], timestamp)
+            else:
+                result[author.id] = [author, timestamp, [unit]]
+
+        return sorted(
+            (tuple(item) for item in result.values()), key=lambda item: item[1]
+        )
+
     def get_commit_message(self, author):
         """Format commit message based on project configuration."""
         if self.commit_template == "add":
@@ -470,32 +690,46 @@ class Translation(models.Model, URLMixin, LoggerMixin):
 
         return render_template(template, translation=self, author=author)
 
-    def __git_commit(self, author, timestamp, signals=True):
-        """Commit translation to git."""
+    def __git_commit(self, author, timestamp, signals=True, batch=None):
+        """Commit translation to git.
+
+        With batch the commit is only added to it and sending post commit
+        signal is left to the caller once the batch is finished.
+        """
         # Format commit message
         msg = self.get_commit_message(author)
 
         # Pre commit hook
-        vcs_pre_commit.send(sender=self.__class__, translation=self, author=author)
+        responses = vcs_pre_commit.send(
+            sender=self.__class__, translation=self, author=author
+        )
+        if batch is not None and any(response for _receiver, response in responses):
+            # The files might have been modified by the hooks
+            batch.invalidate()
 
         # Create list of files to commit
         files = self.filenames
 
         # Do actual commit
-        if self.repo_needs_commit():
+        hashes = None
+        if batch is not None:
+            hashes = batch.commit(
+                msg, author, timestamp, files + self.addon_commit_files
+            )
+        elif self.repo_needs_commit():
             self.component.repository.commit(
                 msg, author, timestamp, files + self.addon_commit_files
             )
         self.addon_commit_files = []
 
         # Post commit hook
-        if signals:
+        if signals and batch is None:
             vcs_post_commit.send(
                 sender=self.__class__, component=self.component, translation=self
             )
 
         # Store updated hash
-        self.store_hash()
+        self.store_hash(hashes)
 
     def needs_commit(self):
         """Check whether there are some not committed changes."""
@@ -518,12 +752,22 @@ class Translation(models.Model, URLMixin, LoggerMixin):
     def repo_needs_commit(self):
         return self.component.repository.needs_commit(*self.filenames)
 
-    def git_commit(self, user, author, timestamp, skip_push=False, signals=True):
-        """Wrapper for committing translation to git."""
+    def git_commit(
+        self, user, author, timestamp, skip_push=False, signals=True, batch=None
+    ):
+        """Wrapper for committing translation to git.
+
+        The commit can be added to a batch from the repository, it is then
+        created once the caller finishes the batch.
+        """
         repository = self.component.repository
         with repository.lock:
             # Is there something for commit?
-            if not self.repo_needs_commit():
+            if batch is None:
+                needs_commit = self.repo_needs_commit()
+            else:
+                needs_commit = batch.needs_commit(self.filenames)
+            if not needs_commit:
                 return False
 
             # Do actual commit with git lock
@@ -531,7 +775,7 @@ class Translation(models.Model, URLMixin, LoggerMixin):
             Change.objects.create(
                 action=Change.ACTION_COMMIT, translation=self, user=user
             )
-            self.__git_commit(author, timestamp, signals=signals)
+            self.__git_commit(author, timestamp, signals=signals, batch=batch)
 
             # Push if we should
             if not skip_push:
@@ -540,15 +784,10 @@ class Translation(models.Model, URLMixin, LoggerMixin):
         return True
 
     @transaction.atomic
-    def update_units(self, author_name, author_id):
-        """Update backend file and unit."""
+    def update_units(self, units, author_name):
+        """Update backend file and units."""
         updated = False
-        for unit in self.unit_set.filter(pending=True).select_for_update():
-            # Skip changes by other authors
-            change_author = unit.get_last_content_change()[0]
-            if change_author.id != author_id:
-                continue
-
+        for unit in units:
             try:
                 pounit, add = self.store.find_unit(unit.context, unit.source)
             except UnitNotFound as error:
@@ -919,6 +1158,24 @@ class Translation(models.Model, URLMixin, LoggerMixin):
         # Invalidate summary stats
         transaction.on_commit(self.stats.invalidate)
 
+    def update_unit_stats(self, old_unit, unit, timestamp=None, author=None):
+        """Update cached stats based on a single unit change.
+
+        The cached counters are adjusted in place, so that editing a single
+        string does not trigger recalculation of the stats for all parent
+        objects.
+        """
+        # Editing source strings affects source stats of parent objects
+        if self.is_source:
+            self.invalidate_cache()
+            return
+        delta = get_unit_stats_delta(old_unit, unit)
+        if timestamp is not None:
+            delta["last_changed"] = timestamp
+            delta["last_author"] = author.id if author else None
+        if delta:
+            transaction.on_commit(partial(self.stats.apply_delta, delta))
+
     @property
     def keys_cache_key(self):
         return "translation-keys-{}".format(self.pk)
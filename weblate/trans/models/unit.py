@@ -19,12 +19,15 @@
 
 
 import re
+from collections import defaultdict
 from copy import copy
+from itertools import chain
 
 from django.conf import settings
 from django.core.cache import cache
 from django.db import models, transaction
 from django.db.models import Q
+from django.db.models.signals import post_save
 from django.utils import timezone
 from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy
@@ -33,7 +36,7 @@ from weblate.checks import CHECKS
 from weblate.checks.flags import Flags
 from weblate.checks.models import Check
 from weblate.formats.helpers import CONTROLCHARS
-from weblate.memory.tasks import update_memory
+from weblate.memory.models import PendingMemory
 from weblate.trans.mixins import LoggerMixin
 from weblate.trans.models.change import Change
 from weblate.trans.models.comment import Comment
@@ -168,6 +171,9 @@ class Unit(models.Model, LoggerMixin):
     has_failing_check = models.BooleanField(default=False, db_index=True)
 
     num_words = models.IntegerField(default=0)
+    # Fingerprint of file content at last synchronization, see
+    # Translation.get_unit_fingerprint
+    fingerprint = models.BigIntegerField(default=0)
 
     priority = models.IntegerField(default=100)
 
@@ -277,8 +283,13 @@ class Unit(models.Model, LoggerMixin):
             if any(char in text for char in CONTROLCHARS):
                 raise ValueError("String contains control char")
 
-    def update_from_unit(self, unit, pos, created):
-        """Update Unit from ttkit unit."""
+    def update_from_unit(self, unit, pos, created, batch=None, fingerprint=0):
+        """Update Unit from ttkit unit.
+
+        With batch given, the database changes are collected there instead of
+        being stored immediately. The fingerprint is stored to allow skipping
+        unchanged units on next update.
+        """
         component = self.translation.component
         self.is_batch_update = True
         # Get unit attributes
@@ -355,6 +366,13 @@ class Unit(models.Model, LoggerMixin):
             and content_hash == self.content_hash
             and previous_source == self.previous_source
         ):
+            # Store changed fingerprint, the unit itself is not changed
+            if fingerprint != self.fingerprint:
+                self.fingerprint = fingerprint
+                if batch is not None:
+                    batch.add_fingerprint(self)
+                else:
+                    Unit.objects.filter(pk=self.pk).update(fingerprint=fingerprint)
             return
 
         # Store updated values
@@ -368,6 +386,7 @@ class Unit(models.Model, LoggerMixin):
         self.note = note
         self.content_hash = content_hash
         self.previous_source = previous_source
+        self.fingerprint = fingerprint
         self.update_priority(save=False)
 
         # Sanitize number of plurals
@@ -377,6 +396,17 @@ class Unit(models.Model, LoggerMixin):
         if created:
             unit_pre_create.send(sender=self.__class__, unit=self)
 
+        # Defer saving to the batch
+        if batch is not None:
+            batch.add(
+                self,
+                created,
+                same_content=same_source and same_target,
+                same_state=same_state,
+                previous_source=previous_source if not same_source else "",
+            )
+            return
+
         # Save into database
         self.save(
             force_insert=created,
@@ -521,12 +551,18 @@ class Unit(models.Model, LoggerMixin):
         # Save updated unit to database
         self.save()
 
+        # Queue translation memory update
+        if self.state >= STATE_TRANSLATED and not self.translation.is_source:
+            PendingMemory.objects.add_units([self], user)
+
         # Generate Change object for this change
-        self.generate_change(user or author, author, change_action)
+        change = self.generate_change(user or author, author, change_action)
 
         if change_action not in (Change.ACTION_UPLOAD, Change.ACTION_AUTO):
             # Update translation stats
-            self.translation.invalidate_cache()
+            self.translation.update_unit_stats(
+                self.old_unit, self, change.timestamp, change.author
+            )
 
             # Update user stats
             author.profile.translated += 1
@@ -611,7 +647,7 @@ class Unit(models.Model, LoggerMixin):
             action = Change.ACTION_NEW
 
         # Create change object
-        Change.objects.create(
+        return Change.objects.create(
             unit=self,
             action=action,
             user=user,
@@ -631,11 +667,16 @@ class Unit(models.Model, LoggerMixin):
     ):
         """Wrapper around save to run checks or update fulltext."""
         # Store number of words
-        if not same_content or not self.num_words:
-            self.num_words = len(self.get_source_plurals()[0].split())
+        if self.update_num_words(same_content):
             if update_fields and "num_words" not in update_fields:
                 update_fields.append("num_words")
 
+        # Content no longer matches the file, force update on next sync
+        if not self.is_batch_update and (not same_content or not same_state):
+            self.fingerprint = 0
+            if update_fields and "fingerprint" not in update_fields:
+                update_fields.append("fingerprint")
+
         # Actually save the unit
         super().save(
             force_insert=force_insert,
@@ -648,6 +689,13 @@ class Unit(models.Model, LoggerMixin):
         if not same_content or not same_state:
             self.run_checks(same_state, same_content)
 
+    def update_num_words(self, same_content=False):
+        """Update number of words, returns whether it was calculated."""
+        if same_content and self.num_words:
+            return False
+        self.num_words = len(self.get_source_plurals()[0].split())
+        return True
+
     @cached_property
     def suggestions(self):
         """Return all suggestions for this unit."""
@@ -679,10 +727,31 @@ class Unit(models.Model, LoggerMixin):
         was_change = False
         has_checks = None
 
+        old_checks = set(self.check_set.values_list("check", flat=True))
+        create, old_checks = self.evaluate_checks(old_checks)
+        if create:
+            was_change = True
+            has_checks = True
+            Check.objects.bulk_create(create, batch_size=500, ignore_conflicts=True)
+
+        # Delete no longer failing checks
+        if old_checks:
+            was_change = True
+            Check.objects.filter(unit=self, check__in=old_checks).delete()
+
+        # Update failing checks flag
+        if not self.is_batch_update and (was_change or not same_content):
+            self.update_has_failing_check(was_change, has_checks)
+
+    def evaluate_checks(self, old_checks):
+        """Evaluate checks for this unit against existing ones.
+
+        Returns list of checks to create and set of no longer failing checks.
+        """
         src = self.get_source_plurals()
         tgt = self.get_target_plurals()
 
-        old_checks = set(self.check_set.values_list("check", flat=True))
+        old_checks = set(old_checks)
         create = []
 
         if self.translation.is_source:
@@ -709,20 +778,8 @@ class Unit(models.Model, LoggerMixin):
                 else:
                     # Create new check
                     create.append(Check(unit=self, ignore=False, check=check))
-                    was_change = True
-                    has_checks = True
-
-        if create:
-            Check.objects.bulk_create(create, batch_size=500, ignore_conflicts=True)
-
-        # Delete no longer failing checks
-        if old_checks:
-            was_change = True
-            Check.objects.filter(unit=self, check__in=old_checks).delete()
 
-        # Update failing checks flag
-        if not self.is_batch_update and (was_change or not same_content):
-            self.update_has_failing_check(was_change, has_checks)
+        return create, old_checks
 
     def update_has_failing_check(
         self, recurse=False, has_checks=None, invalidate=False
@@ -733,12 +790,13 @@ class Unit(models.Model, LoggerMixin):
 
         # Change attribute if it has changed
         if has_checks != self.has_failing_check:
+            old_unit = copy(self)
             self.has_failing_check = has_checks
             self.save(
                 same_content=True, same_state=True, update_fields=["has_failing_check"]
             )
             if invalidate:
-                self.translation.invalidate_cache()
+                self.translation.update_unit_stats(old_unit, self)
 
         if recurse:
             for unit in Unit.objects.prefetch().same(self):
@@ -845,16 +903,10 @@ class Unit(models.Model, LoggerMixin):
                 check__in=self.translation.component.enforced_checks
             ).exists()
         ):
+            old_unit = copy(self)
             self.state = self.original_state = STATE_FUZZY
             self.save(same_state=True, same_content=True, update_fields=["state"])
-
-        if (
-            propagate
-            and user
-            and self.target != self.old_unit.target
-            and self.state >= STATE_TRANSLATED
-        ):
-            update_memory(user, self)
+            self.translation.update_unit_stats(old_unit, self)
 
         return saved
 
@@ -948,3 +1000,179 @@ class Unit(models.Model, LoggerMixin):
                 filename = location_parts[0]
                 line = 0
             yield location, filename, line
+
+
+class UnitImportBatch:
+    """Collects units updated from the file and stores them in bulk.
+
+    This avoids several queries per unit when importing large files, the
+    checks are evaluated in memory against the preloaded ones and the
+    checks, labels and changes are stored in bulk as well.
+    """
+
+    # Fields which can be changed by Unit.update_from_unit
+    fields = (
+        "position",
+        "location",
+        "flags",
+        "source",
+        "target",
+        "state",
+        "original_state",
+        "context",
+        "note",
+        "content_hash",
+        "previous_source",
+        "priority",
+        "num_words",
+        "extra_flags",
+        "extra_context",
+        "fingerprint",
+    )
+
+    def __init__(self, translation, batch_size):
+        self.translation = translation
+        self.batch_size = batch_size
+        self.created = []
+        self.updated = []
+        self.fingerprints = []
+        self.check_units = []
+        self.source_changes = []
+
+    def __len__(self):
+        return len(self.created) + len(self.updated) + len(self.fingerprints)
+
+    def add(self, unit, created, same_content, same_state, previous_source):
+        unit.update_num_words(same_content)
+        if created:
+            self.created.append(unit)
+        else:
+            self.updated.append(unit)
+        # Update checks if content or fuzzy flag has changed
+        if not same_content or not same_state:
+            self.check_units.append(unit)
+        # Indicate source string change
+        if previous_source:
+            self.source_changes.append((unit, previous_source))
+
+    def add_fingerprint(self, unit):
+        """Add unit with only changed fingerprint."""
+        self.fingerprints.append(unit)
+
+    def save(self):
+        """Store all collected changes in the database."""
+        if not self:
+            return
+        self.save_units()
+        # Units with changed fingerprint only need no further processing
+        if not self.created and not self.updated:
+            return
+        self.save_checks()
+        self.save_labels()
+        self.save_changes()
+        # Emulate signals not sent by bulk operations
+        for created, units in ((True, self.created), (False, self.updated)):
+            for unit in units:
+                post_save.send(
+                    sender=Unit,
+                    instance=unit,
+                    created=created,
+                    update_fields=None,
+                    raw=False,
+                    using=unit._state.db,
+                )
+
+    def save_units(self):
+        if self.created:
+            Unit.objects.bulk_create(self.created, batch_size=self.batch_size)
+            # Some database backends do not return primary keys
+            if self.created[0].pk is None:
+                pks = dict(self.translation.unit_set.values_list("id_hash", "pk"))
+                for unit in self.created:
+                    unit.pk = pks[unit.id_hash]
+        if self.updated:
+            Unit.objects.bulk_update(
+                self.updated, self.fields, batch_size=self.batch_size
+            )
+        if self.fingerprints:
+            Unit.objects.bulk_update(
+                self.fingerprints, ["fingerprint"], batch_size=self.batch_size
+            )
+
+    def save_checks(self):
+        if not self.check_units:
+            return
+        existing = defaultdict(set)
+        if self.updated:
+            checks = Check.objects.filter(unit__translation=self.translation)
+            for unit_id, check in checks.values_list("unit_id", "check"):
+                existing[unit_id].add(check)
+
+        create = []
+        delete = defaultdict(list)
+        for unit in self.check_units:
+            new_checks, old_checks = unit.evaluate_checks(existing[unit.pk])
+            create.extend(new_checks)
+            for check in old_checks:
+                delete[check].append(unit.pk)
+
+        if create:
+            Check.objects.bulk_create(
+                create, batch_size=self.batch_size, ignore_conflicts=True
+            )
+        for check, unit_ids in delete.items():
+            Check.objects.filter(unit_id__in=unit_ids, check=check).delete()
+
+    def save_labels(self):
+        if self.translation.is_source:
+            return
+        through = Unit.labels.through
+        source_translation = self.translation.component.source_translation
+        source_labels = defaultdict(set)
+        for unit_id, label_id in through.objects.filter(
+            unit__translation=source_translation
+        ).values_list("unit_id", "label_id"):
+            source_labels[unit_id].add(label_id)
+
+        existing = defaultdict(dict)
+        if self.updated:
+            for pk, unit_id, label_id in through.objects.filter(
+                unit__translation=self.translation
+            ).values_list("pk", "unit_id", "label_id"):
+                existing[unit_id][label_id] = pk
+
+        create = []
+        delete = []
+        for unit in chain(self.created, self.updated):
+            labels = source_labels[unit.source_info.pk]
+            current = existing[unit.pk]
+            create.extend(
+                through(unit_id=unit.pk, label_id=label_id)
+                for label_id in labels
+                if label_id not in current
+            )
+            delete.extend(
+                pk for label_id, pk in current.items() if label_id not in labels
+            )
+
+        if create:
+            through.objects.bulk_create(
+                create, batch_size=self.batch_size, ignore_conflicts=True
+            )
+        if delete:
+            through.objects.filter(pk__in=delete).delete()
+
+    def save_changes(self):
+        if self.source_changes:
+            Change.objects.bulk_create(
+                [
+                    Change(
+                        unit=unit,
+                        action=Change.ACTION_SOURCE_CHANGE,
+                        old=previous_source,
+                        target=unit.source,
+                    )
+                    for unit, previous_source in self.source_changes
+                ],
+                batch_size=self.batch_size,
+            )
@@ -27,6 +27,8 @@ from time import time
 
 from celery.schedules import crontab
 from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
 from django.utils import timezone
 from django.utils.translation import gettext as _
@@ -35,13 +37,17 @@ from filelock import Timeout
 
 from weblate.addons.models import Addon
 from weblate.auth.models import User, get_anonymous
+from weblate.checks import CHECKS
+from weblate.lang.models import Language
 from weblate.trans.autotranslate import AutoTranslate
 from weblate.trans.exceptions import FileParseError
 from weblate.trans.models import (
     Change,
     Comment,
     Component,
+    ComponentList,
     Project,
+    StoredStats,
     Suggestion,
     Translation,
     Unit,
@@ -49,6 +55,7 @@ from weblate.trans.models import (
 from weblate.utils.celery import app
 from weblate.utils.data import data_dir
 from weblate.utils.files import remove_readonly
+from weblate.utils.stats import GlobalStats
 
 SEARCH_LOGGER = logging.getLogger("weblate.search")
 
@@ -323,16 +330,28 @@ def auto_translate(
             auto.process_others(component)
 
         if auto.updated == 0:
-            return _("Automatic translation completed, no strings were updated.")
+            message = _("Automatic translation completed, no strings were updated.")
+        else:
+            message = (
+                ngettext(
+                    "Automatic translation completed, %d string was updated.",
+                    "Automatic translation completed, %d strings were updated.",
+                    auto.updated,
+                )
+                % auto.updated
+            )
 
-        return (
-            ngettext(
-                "Automatic translation completed, %d string was updated.",
-                "Automatic translation completed, %d strings were updated.",
-                auto.updated,
+        if auto.errors:
+            message = "{} {}".format(
+                message,
+                _("Some machine translation services failed: %s")
+                % ", ".join(
+                    "{}: {}".format(name, error)
+                    for name, error in sorted(auto.errors.items())
+                ),
             )
-            % auto.updated
-        )
+
+        return message
 
 
 @app.task(trail=False)
@@ -354,17 +373,68 @@ def create_component(addons_from=None, **kwargs):
 @app.task(trail=False)
 def update_checks(pk):
     component = Component.objects.get(pk=pk)
-    for translation in component.translation_set.exclude(
-        pk=component.source_translation.pk
-    ).iterator():
-        for unit in translation.unit_set.iterator():
-            unit.run_checks()
-    for unit in component.source_translation.unit_set.iterator():
-        unit.run_checks()
-    for translation in component.translation_set.iterator():
+    translations = component.translation_set.prefetch()
+    for translation in translations:
+        with transaction.atomic():
+            CHECKS.update_translation(translation)
+    # Batch checks are run on the project level
+    project = component.project
+    project.run_target_checks()
+    project.run_source_checks()
+    project.update_unit_flags()
+    for translation in translations:
         translation.invalidate_cache()
 
 
+def get_stats_object(key):
+    """Return stats object for given cache key."""
+    if key == "stats-global":
+        return GlobalStats()
+    parts = key.split("-")
+    name, pk = parts[1], int(parts[2])
+    if name == "Project":
+        project = Project.objects.get(pk=pk)
+        if len(parts) == 4:
+            return project.stats.get_single_language_stats(
+                Language.objects.get(pk=int(parts[3]))
+            )
+        return project.stats
+    models = {
+        "Translation": Translation,
+        "Component": Component,
+        "ComponentList": ComponentList,
+        "Language": Language,
+    }
+    return models[name].objects.get(pk=pk).stats
+
+
+@app.task(trail=False)
+def update_stale_stats(key):
+    """Recalculate stale stats in the background.
+
+    The lock avoids concurrent recalculation of same stats, the task is
+    postponed in that case.
+    """
+    cache.delete("stats-pending-{}".format(key))
+    try:
+        stats = get_stats_object(key)
+    except ObjectDoesNotExist:
+        # The object was removed meanwhile
+        cache.delete(key)
+        StoredStats.objects.filter(key=key).delete()
+        return
+    lock_key = "stats-lock-{}".format(key)
+    if not cache.add(lock_key, True, 600):
+        update_stale_stats.apply_async(args=(key,), countdown=60)
+        return
+    try:
+        # The stats might have been recalculated with their parent already
+        if stats.is_stale:
+            stats.revalidate()
+    finally:
+        cache.delete(lock_key)
+
+
 @app.on_after_finalize.connect
 def setup_periodic_tasks(sender, **kwargs):
     sender.add_periodic_task(3600, commit_pending.s(), name="commit-pending")
@@ -19,10 +19,15 @@
 
 """Test for automatic translation."""
 
+from unittest.mock import patch
+
 from django.core.management import call_command
 from django.core.management.base import CommandError
 from django.urls import reverse
 
+from weblate.machinery import MACHINE_TRANSLATION_SERVICES
+from weblate.machinery.base import MachineTranslationError
+from weblate.machinery.dummy import DummyTranslation
 from weblate.trans.models import Component
 from weblate.trans.tests.test_views import ViewTestCase
 
@@ -201,6 +206,7 @@ class AutoTranslationMtTest(ViewTestCase):
         translation = self.component3.translation_set.get(language_code="cs")
         translation.invalidate_cache()
         self.assertEqual(translation.stats.translated, expected)
+        return response
 
     def test_different(self):
         """Test for automatic translation with different content."""
@@ -213,3 +219,37 @@ class AutoTranslationMtTest(ViewTestCase):
 
     def test_overwrite(self):
         self.perform_auto(overwrite="1", engines=["weblate"], threshold=80)
+
+    def test_skip_exact(self):
+        """Test that strings with exact match are not sent to other services."""
+        service = DummyTranslation()
+        with patch.dict(
+            MACHINE_TRANSLATION_SERVICES.data, {service.mtid: service}
+        ), patch.object(
+            service, "translate_batch", wraps=service.translate_batch
+        ) as translate_batch:
+            self.perform_auto(engines=["weblate", service.mtid], threshold=80)
+        queried = [
+            text
+            for call in translate_batch.call_args_list
+            for text, _unit in call[0][1]
+        ]
+        self.assertTrue(queried)
+        self.assertNotIn("Hello, world!\n", queried)
+
+    def test_service_error(self):
+        """Test that errors of the services are reported."""
+        service = DummyTranslation()
+        with patch.dict(
+            MACHINE_TRANSLATION_SERVICES.data, {service.mtid: service}
+        ), patch.object(
+            service,
+            "translate_batch",
+            side_effect=MachineTranslationError("Service failure"),
+        ):
+            response = self.perform_auto(
+                engines=["weblate", service.mtid], threshold=80
+            )
+        self.assertContains(
+            response, "Some machine translation services failed: Dummy: Service failure"
+        )
@@ -23,13 +23,14 @@ import sys
 from io import StringIO
 from unittest import SkipTest
 
+from django.core.cache import cache
 from django.core.management import call_command
 from django.core.management.base import CommandError, SystemCheckError
 from django.test import SimpleTestCase
 
 from weblate.accounts.models import Profile
 from weblate.runner import main
-from weblate.trans.models import Component, Translation
+from weblate.trans.models import Component, StoredStats, Translation
 from weblate.trans.tests.test_models import RepoTestCase
 from weblate.trans.tests.test_views import FixtureTestCase, ViewTestCase
 from weblate.trans.tests.utils import create_test_user, get_test_file
@@ -378,6 +379,23 @@ class UpdateChecksTest(CheckGitTest):
     expected_string = "Processing"
 
 
+class UpdateStatsTest(CheckGitTest):
+    command_name = "updatestats"
+    expected_string = "Updating stats for"
+
+    def test_stored(self):
+        self.do_test("test/test")
+        translation = self.get_translation()
+        key = translation.stats.cache_key
+        self.assertTrue(StoredStats.objects.filter(key=key).exists())
+        # The stored stats are used when cache is lost
+        StoredStats.objects.filter(key=key).update(data={"all": 42})
+        cache.delete(key)
+        translation = Translation.objects.get(pk=translation.pk)
+        self.assertEqual(translation.stats.all, 42)
+        self.assertEqual(cache.get(key), {"all": 42})
+
+
 class UpdateGitTest(CheckGitTest):
     command_name = "updategit"
     expected_string = ""
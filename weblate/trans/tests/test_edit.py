@@ -22,14 +22,42 @@
 
 import time
 
+from django.core.cache import cache
+from django.test import SimpleTestCase
 from django.urls import reverse
 
 from weblate.trans.models import Change
 from weblate.trans.tests.test_views import ViewTestCase
+from weblate.trans.views.edit import SEARCH_CHUNK_SIZE, SearchResultIds
 from weblate.utils.hash import hash_to_checksum
 from weblate.utils.state import STATE_FUZZY, STATE_READONLY, STATE_TRANSLATED
 
 
+class SearchResultIdsTest(SimpleTestCase):
+    def test_positions(self):
+        unit_ids = list(range(10, 10 + 3 * SEARCH_CHUNK_SIZE))
+        SearchResultIds("search-test", len(unit_ids)).store(unit_ids)
+        result = SearchResultIds("search-test", len(unit_ids))
+        self.assertEqual(len(result), len(unit_ids))
+        self.assertEqual(result[0], 10)
+        self.assertEqual(result[len(unit_ids) - 1], unit_ids[-1])
+        self.assertEqual(
+            result[SEARCH_CHUNK_SIZE - 5 : SEARCH_CHUNK_SIZE + 5],
+            unit_ids[SEARCH_CHUNK_SIZE - 5 : SEARCH_CHUNK_SIZE + 5],
+        )
+        self.assertEqual(result.index(unit_ids[2500]), 2500)
+        with self.assertRaises(ValueError):
+            result.index(1)
+
+    def test_expired(self):
+        unit_ids = list(range(2 * SEARCH_CHUNK_SIZE))
+        SearchResultIds("search-expired", len(unit_ids)).store(unit_ids)
+        cache.delete("search-expired-1")
+        result = SearchResultIds("search-expired", len(unit_ids))
+        self.assertTrue(result.has_position(0))
+        self.assertFalse(result.has_position(SEARCH_CHUNK_SIZE))
+
+
 class EditTest(ViewTestCase):
     """Test for manipulating translation."""
 
@@ -518,6 +518,25 @@ class DownloadMultiTest(ViewTestCase):
         response = self.client.get(reverse("download_project", kwargs=self.kw_project))
         self.assert_zip(response)
 
+    def test_project_pending(self):
+        self.edit_unit("Hello, world!\n", "Nazdar svete!\n")
+        self.assertTrue(self.component.needs_commit())
+        response = self.client.get(reverse("download_project", kwargs=self.kw_project))
+        self.assert_zip(response)
+        self.assertFalse(self.component.needs_commit())
+
+    def test_project_lang_pending(self):
+        self.edit_unit("Hello, world!\n", "Nazdar svete!\n")
+        self.assertTrue(self.component.needs_commit())
+        response = self.client.get(
+            reverse(
+                "download_lang_project",
+                kwargs={"lang": "cs", "project": self.project.slug},
+            )
+        )
+        self.assert_zip(response)
+        self.assertFalse(self.component.needs_commit())
+
     def test_project_lang(self):
         response = self.client.get(
             reverse(
@@ -22,13 +22,17 @@
 
 import os
 import shutil
+from unittest.mock import patch
 
+from django.core.cache import cache
 from django.core.management.color import no_style
 from django.db import connection
+from django.db.models.signals import post_save
 from django.test import LiveServerTestCase, TestCase
 from django.test.utils import override_settings
 
 from weblate.auth.models import Group, User
+from weblate.checks import CHECKS
 from weblate.checks.models import Check
 from weblate.lang.models import Language, Plural
 from weblate.trans.models import (
@@ -36,12 +40,16 @@ from weblate.trans.models import (
     Component,
     ComponentList,
     Project,
+    StoredStats,
+    Translation,
     Unit,
     WhiteboardMessage,
 )
+from weblate.trans.tasks import update_stale_stats
 from weblate.trans.tests.utils import RepoTestMixin, create_test_user
 from weblate.utils.django_hacks import immediate_on_commit, immediate_on_commit_leave
 from weblate.utils.state import STATE_TRANSLATED
+from weblate.utils.stats import GlobalStats, rebuild_stats
 
 
 def fixup_languages_seq():
@@ -205,6 +213,272 @@ class TranslationTest(RepoTestCase):
         self.assertEqual(translation.stats.all, 0)
         self.assertEqual(translation.stats.all_words, 0)
 
+    def test_stats_delta(self):
+        """Check stats are updated in place on unit edit."""
+        component = self.create_component()
+        translation = component.translation_set.get(language_code="cs")
+        objects = (translation, component, component.project)
+        # Make sure stats are cached
+        translated = [obj.stats.translated for obj in objects]
+        user = create_test_user()
+        unit = translation.unit_set.get(source="Hello, world!\n")
+        unit.translate(user, "Nazdar svete!\n", STATE_TRANSLATED)
+        # Values updated by delta
+        expected = []
+        for obj, count in zip(objects, translated):
+            obj = obj.__class__.objects.get(pk=obj.pk)
+            self.assertEqual(obj.stats.translated, count + 1)
+            self.assertEqual(obj.stats.last_author, user.id)
+            expected.append((obj, obj.stats.get_data()))
+        # Compare with values calculated from scratch
+        translation.stats.invalidate()
+        for obj, data in expected:
+            obj = obj.__class__.objects.get(pk=obj.pk)
+            obj.stats.ensure_basic()
+            for key in data:
+                if key != "last_changed":
+                    self.assertEqual(getattr(obj.stats, key), data[key], key)
+
+    def test_stats_delta_interleaved(self):
+        """Check concurrent deltas are not lost."""
+        component = self.create_component()
+        translation = component.translation_set.get(language_code="cs")
+        key = translation.stats.cache_key
+        translated = translation.stats.translated
+        # Other process has loaded the stats before the first delta
+        snapshot = cache.get(key)
+        Translation.objects.get(pk=translation.pk).stats.apply_delta({"translated": 1})
+        # And applies its delta on top of the outdated copy
+        cache.set(key, snapshot)
+        Translation.objects.get(pk=translation.pk).stats.apply_delta({"translated": 1})
+        translation = Translation.objects.get(pk=translation.pk)
+        self.assertEqual(translation.stats.translated, translated + 2)
+        self.assertEqual(
+            StoredStats.objects.get(key=key).data["translated"], translated + 2
+        )
+
+    def test_stats_delta_parent_conflict(self):
+        """Check parent stats delta is retried on concurrent modification."""
+        component = self.create_component()
+        translated = component.stats.translated
+        stats = Component.objects.get(pk=component.pk).stats
+        update_data = stats.update_data
+        calls = []
+
+        def concurrent_update(data, delta):
+            if not calls:
+                # Other process applies its delta meanwhile
+                Component.objects.get(pk=component.pk).stats.apply_delta(delta)
+            calls.append(delta)
+            return update_data(data, delta)
+
+        with patch.object(stats, "update_data", side_effect=concurrent_update):
+            stats.apply_delta({"translated": 1})
+        self.assertEqual(len(calls), 2)
+        component = Component.objects.get(pk=component.pk)
+        self.assertEqual(component.stats.translated, translated + 2)
+
+    def test_stats_prefetch(self):
+        """Check translation stats are calculated at once for parents."""
+        component = self.create_component()
+        expected = {
+            translation.pk: translation.stats.all_words
+            for translation in component.translation_set.all()
+        }
+        cache.clear()
+        StoredStats.objects.all().delete()
+        project = Project.objects.get(pk=component.project.pk)
+        self.assertEqual(project.stats.all_words, sum(expected.values()))
+        # Translation stats were calculated and stored as well
+        for translation in component.translation_set.all():
+            data = cache.get(translation.stats.cache_key)
+            self.assertEqual(data["all_words"], expected[translation.pk])
+            self.assertTrue(
+                StoredStats.objects.filter(key=translation.stats.cache_key).exists()
+            )
+
+    def test_stats_lazy(self):
+        """Check lazily calculated stats are stored in the cache only."""
+        component = self.create_component()
+        translation = component.translation_set.get(language_code="cs")
+        key = translation.stats.cache_key
+        translation.stats.invalidate()
+        translation.stats.ensure_basic()
+        translation = Translation.objects.get(pk=translation.pk)
+        recent = translation.stats.recent_changes
+        self.assertEqual(cache.get(key)["recent_changes"], recent)
+        stored = StoredStats.objects.get(key=key)
+        self.assertIn("all", stored.data)
+        self.assertNotIn("recent_changes", stored.data)
+
+    @override_settings(STATS_BACKGROUND_UPDATE=True)
+    def test_stats_stale(self):
+        """Check stale stats are served until recalculated."""
+        component = self.create_component()
+        translation = component.translation_set.get(language_code="cs")
+        key = translation.stats.cache_key
+        self.assertEqual(translation.stats.all, 4)
+        translation.unit_set.all().delete()
+        # Pretend the recalculation is already scheduled
+        cache.set("stats-pending-{}".format(key), True)
+        self.assertTrue(translation.stats.mark_stale())
+        translation = Translation.objects.get(pk=translation.pk)
+        self.assertTrue(translation.stats.is_stale)
+        self.assertEqual(translation.stats.all, 4)
+        # Background recalculation
+        update_stale_stats(key)
+        translation = Translation.objects.get(pk=translation.pk)
+        self.assertFalse(translation.stats.is_stale)
+        self.assertEqual(translation.stats.all, 0)
+
+    @override_settings(STATS_BACKGROUND_UPDATE=True)
+    def test_stats_stale_parent(self):
+        """Check parent revalidation recalculates stale children."""
+        component = self.create_component()
+        translation = component.translation_set.get(language_code="cs")
+        total = component.stats.all
+        self.assertEqual(translation.stats.all, 4)
+        translation.unit_set.all().delete()
+        # Pretend the recalculation is already scheduled
+        cache.set("stats-pending-{}".format(translation.stats.cache_key), True)
+        cache.set("stats-pending-{}".format(component.stats.cache_key), True)
+        self.assertTrue(translation.stats.mark_stale())
+        self.assertTrue(component.stats.mark_stale())
+        # Component is recalculated before the translation
+        update_stale_stats(component.stats.cache_key)
+        component = Component.objects.get(pk=component.pk)
+        self.assertFalse(component.stats.is_stale)
+        self.assertEqual(component.stats.all, total - 4)
+        translation = Translation.objects.get(pk=translation.pk)
+        self.assertFalse(translation.stats.is_stale)
+        self.assertEqual(translation.stats.all, 0)
+
+    @override_settings(STATS_BACKGROUND_UPDATE=True)
+    def test_rebuild_stats(self):
+        """Check rebuild calculates parent stats instead of marking them stale."""
+        component = self.create_component()
+        translation = component.translation_set.get(language_code="cs")
+        total = component.project.stats.all
+        self.assertEqual(GlobalStats().all, total)
+        translation.unit_set.all().delete()
+        rebuild_stats(Component.objects.filter(pk=component.pk))
+        project = Project.objects.get(pk=component.project_id)
+        self.assertFalse(project.stats.is_stale)
+        self.assertEqual(project.stats.all, total - 4)
+        stats = GlobalStats()
+        self.assertFalse(stats.is_stale)
+        self.assertEqual(stats.all, total - 4)
+
+    def test_bulk_import(self):
+        """Check bulk import stores same data as importing string by string."""
+
+        def get_units(translation):
+            return sorted(
+                (
+                    unit.id_hash,
+                    unit.target,
+                    unit.state,
+                    unit.position,
+                    unit.num_words,
+                    sorted(unit.checks(values=True)),
+                )
+                for unit in translation.unit_set.all()
+            )
+
+        component = self.create_component()
+        translation = component.translation_set.get(language_code="cs")
+        bulk = get_units(translation)
+        self.assertEqual(len(bulk), 4)
+        translation.unit_set.all().delete()
+        with override_settings(UNIT_IMPORT_BATCH_SIZE=0):
+            translation.check_sync(force=True)
+        self.assertEqual(get_units(translation), bulk)
+
+    def test_sync_unchanged(self):
+        """Check unchanged units are skipped on update."""
+        component = self.create_component()
+        translation = component.translation_set.get(language_code="cs")
+        self.assertFalse(translation.unit_set.filter(fingerprint=0).exists())
+        # Change not reflected in the fingerprint is kept
+        translation.unit_set.update(note="Changed")
+        translation.revision = ""
+        translation.check_sync()
+        self.assertEqual(translation.unit_set.filter(note="Changed").count(), 4)
+        # Saving unit resets the fingerprint
+        unit = translation.unit_set.all()[0]
+        unit.target = "Changed"
+        unit.save()
+        self.assertEqual(unit.fingerprint, 0)
+        translation.revision = ""
+        translation.check_sync()
+        self.assertEqual(translation.unit_set.filter(note="Changed").count(), 3)
+        # Forced update processes all units
+        translation.check_sync(force=True)
+        self.assertFalse(translation.unit_set.filter(note="Changed").exists())
+
+    def test_sync_fingerprint(self):
+        """Check units with changed fingerprint only are not saved."""
+        component = self.create_component()
+        translation = component.translation_set.get(language_code="cs")
+        fingerprints = dict(translation.unit_set.values_list("pk", "fingerprint"))
+        # Fingerprints are reset by the migration
+        translation.unit_set.update(fingerprint=0)
+        translation.revision = ""
+        saved = []
+
+        def receiver(sender, instance, **kwargs):
+            saved.append(instance)
+
+        post_save.connect(receiver, sender=Unit)
+        try:
+            translation.check_sync()
+        finally:
+            post_save.disconnect(receiver, sender=Unit)
+        self.assertEqual(saved, [])
+        self.assertEqual(
+            dict(translation.unit_set.values_list("pk", "fingerprint")), fingerprints
+        )
+
+    def test_update_checks(self):
+        """Check batch update of checks matches per string checks."""
+        component = self.create_component()
+        translation = component.translation_set.get(language_code="cs")
+        checks = translation.unit_set.filter(check__isnull=False)
+        expected = sorted(checks.values_list("id", "check__check"))
+        unit = translation.unit_set.all()[0]
+        Check.objects.filter(unit__translation=translation).delete()
+        Check.objects.create(unit=unit, check="nonexisting", ignore=False)
+        CHECKS.update_translation(translation)
+        self.assertEqual(sorted(checks.values_list("id", "check__check")), expected)
+        self.assertEqual(
+            translation.unit_set.filter(has_failing_check=True).count(),
+            len({item[0] for item in expected}),
+        )
+
+    def test_batch_checks(self):
+        """Check batch checks are created and removed."""
+        component = self.create_component()
+        translation = component.translation_set.get(language_code="cs")
+        first, second = translation.unit_set.all()[:2]
+        # Stale check is removed
+        Check.objects.create(unit=first, check="inconsistent", ignore=False)
+        component.project.run_target_checks()
+        self.assertFalse(Check.objects.filter(check="inconsistent").exists())
+        # Make strings with same source inconsistent
+        translation.unit_set.filter(pk=first.pk).update(target="First")
+        translation.unit_set.filter(pk=second.pk).update(
+            target="Second", content_hash=first.content_hash
+        )
+        component.project.run_target_checks()
+        self.assertEqual(
+            set(
+                Check.objects.filter(check="inconsistent").values_list(
+                    "unit_id", flat=True
+                )
+            ),
+            {first.pk, second.pk},
+        )
+
     def test_commit_groupping(self):
         component = self.create_component()
         translation = component.translation_set.get(language_code="cs")
@@ -243,6 +517,7 @@ class TranslationTest(RepoTestCase):
         # Commit pending changes
         translation.commit_pending("test", None)
         self.assertNotEqual(start_rev, component.repository.last_revision)
+        self.assertFalse(translation.unit_set.filter(pending=True).exists())
 
 
 class ComponentListTest(RepoTestCase):
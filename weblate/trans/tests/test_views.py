@@ -31,8 +31,9 @@ from django.contrib.messages.storage.fallback import FallbackStorage
 from django.core import mail
 from django.core.cache import cache
 from django.core.management import call_command
+from django.db import connection
 from django.test.client import RequestFactory
-from django.test.utils import override_settings
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse
 from PIL import Image
 
@@ -205,7 +206,8 @@ class ViewTestCase(RepoTestCase):
     def assert_zip(self, response):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response["Content-Type"], "application/zip")
-        with ZipFile(BytesIO(response.content), "r") as zipfile:
+        content = b"".join(response.streaming_content)
+        with ZipFile(BytesIO(content), "r") as zipfile:
             self.assertIsNone(zipfile.testzip())
 
     def assert_svg(self, response):
@@ -526,6 +528,28 @@ class BasicViewTest(ViewTestCase):
         response = self.client.get(reverse("translation", kwargs=self.kw_translation))
         self.assertContains(response, "Test/Test")
 
+    @override_settings(STATS_BACKGROUND_UPDATE=True)
+    def test_view_translation_stale(self):
+        url = reverse("translation", kwargs=self.kw_translation)
+        # Calculate all stats
+        self.client.get(url)
+        stats = self.get_translation().stats
+        # Pretend the recalculation is already scheduled
+        cache.set("stats-pending-{}".format(stats.cache_key), True)
+        self.assertTrue(stats.mark_stale())
+        # Stale stats are served without calculating them
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertContains(response, "Test/Test")
+        self.assertEqual(
+            [
+                query["sql"]
+                for query in queries.captured_queries
+                if "SUM(" in query["sql"] and "num_words" in query["sql"]
+            ],
+            [],
+        )
+
     def test_view_unit(self):
         unit = self.get_unit()
         response = self.client.get(unit.get_absolute_url())
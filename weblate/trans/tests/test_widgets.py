@@ -51,6 +51,25 @@ class WidgetsTest(FixtureTestCase):
         response = self.client.get(reverse("og-image"))
         self.assert_png(response)
 
+    def test_conditional(self):
+        url = reverse(
+            "widget-image",
+            kwargs={
+                "project": self.project.slug,
+                "widget": "svg",
+                "color": "badge",
+                "extension": "svg",
+            },
+        )
+        response = self.client.get(url)
+        self.assert_svg(response)
+        etag = response["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='"other"')
+        self.assert_svg(response)
+
 
 class WidgetsMeta(type):
     def __new__(mcs, name, bases, attrs):  # noqa
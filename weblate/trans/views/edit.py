@@ -18,11 +18,13 @@
 #
 
 
-import time
+from array import array
+from uuid import uuid4
 
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.messages import get_messages
+from django.core.cache import cache
 from django.core.exceptions import PermissionDenied
 from django.db.models import Q
 from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
@@ -51,7 +53,7 @@ from weblate.trans.tasks import auto_translate
 from weblate.trans.util import get_state_css, join_plural, redirect_next, render
 from weblate.utils import messages
 from weblate.utils.antispam import is_spam
-from weblate.utils.hash import hash_to_checksum
+from weblate.utils.hash import calculate_fingerprint, hash_to_checksum
 from weblate.utils.ratelimit import revert_rate_limit, session_ratelimit_post
 from weblate.utils.state import STATE_FUZZY
 from weblate.utils.views import get_translation, show_form_errors
@@ -95,16 +97,89 @@ def get_other_units(unit):
     return result
 
 
-def cleanup_session(session):
-    """Delete old search results from session storage."""
-    now = int(time.time())
-    keys = list(session.keys())
-    for key in keys:
-        if not key.startswith("search_"):
-            continue
-        value = session[key]
-        if not isinstance(value, dict) or value["ttl"] < now or "items" not in value:
-            del session[key]
+# Number of unit ids stored in single cache entry
+SEARCH_CHUNK_SIZE = 1000
+SEARCH_TTL = 86400
+
+
+class SearchResultIds:
+    """Unit ids of stored search results.
+
+    The ids are stored in the cache as packed arrays split into chunks, only
+    chunks for the accessed positions are loaded.
+    """
+
+    def __init__(self, key, count):
+        self.key = key
+        self.count = count
+        self.chunks = {}
+
+    def __len__(self):
+        return self.count
+
+    def get_chunk_key(self, chunk):
+        return "{}-{}".format(self.key, chunk)
+
+    def get_chunk(self, chunk):
+        if chunk not in self.chunks:
+            self.chunks[chunk] = array("q", cache.get(self.get_chunk_key(chunk), b""))
+        return self.chunks[chunk]
+
+    def store(self, unit_ids):
+        cache.set_many(
+            {
+                self.get_chunk_key(chunk): array(
+                    "q", unit_ids[start : start + SEARCH_CHUNK_SIZE]
+                ).tobytes()
+                for chunk, start in enumerate(
+                    range(0, len(unit_ids), SEARCH_CHUNK_SIZE)
+                )
+            },
+            SEARCH_TTL,
+        )
+
+    def has_position(self, position):
+        """Check whether the chunk for given position is still stored."""
+        if not 0 <= position < self.count:
+            return True
+        return bool(self.get_chunk(position // SEARCH_CHUNK_SIZE))
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            # Skip positions from chunks which are no longer stored
+            return [
+                self[pos]
+                for pos in range(*item.indices(self.count))
+                if pos % SEARCH_CHUNK_SIZE
+                < len(self.get_chunk(pos // SEARCH_CHUNK_SIZE))
+            ]
+        if not 0 <= item < self.count:
+            raise IndexError("search result index out of range")
+        return self.get_chunk(item // SEARCH_CHUNK_SIZE)[item % SEARCH_CHUNK_SIZE]
+
+    def index(self, value):
+        for chunk, start in enumerate(range(0, self.count, SEARCH_CHUNK_SIZE)):
+            try:
+                return start + self.get_chunk(chunk).index(value)
+            except ValueError:
+                continue
+        raise ValueError("{} is not in search results".format(value))
+
+
+def get_search_key(request, translation, search_url):
+    """Return cache key for search results.
+
+    The key is unique for the session, the query and the translation
+    revision, so results are not reused once the translation file changes.
+    """
+    if "search_id" not in request.session:
+        request.session["search_id"] = uuid4().hex
+    return "search-{}-{}-{}-{}".format(
+        request.session["search_id"],
+        translation.pk,
+        translation.revision,
+        calculate_fingerprint(search_url),
+    )
 
 
 def search(translation, request):
@@ -123,17 +198,18 @@ def search(translation, request):
         "checksum": form.cleaned_data.get("checksum"),
     }
     search_url = form.urlencode()
-    session_key = "search_{0}_{1}".format(translation.pk, search_url)
-
-    if (
-        session_key in request.session
-        and "offset" in request.GET
-        and "items" in request.session[session_key]
-    ):
-        search_result.update(request.session[session_key])
-        return search_result
+    search_key = get_search_key(request, translation, search_url)
+
+    if "offset" in request.GET:
+        stored_result = cache.get(search_key)
+        if stored_result is not None:
+            unit_ids = SearchResultIds(search_key, stored_result["count"])
+            if unit_ids.has_position(search_result["offset"] - 1):
+                search_result.update(stored_result)
+                search_result["ids"] = unit_ids
+                return search_result
 
-    allunits = translation.unit_set.search(form.cleaned_data.get("q", "")).distinct()
+    allunits = translation.unit_set.search(form.cleaned_data.get("q", ""))
 
     search_query = form.get_search_query() if form_valid else ""
     name = form.get_name() if form_valid else ""
@@ -146,21 +222,20 @@ def search(translation, request):
         messages.warning(request, _("No string matched your search!"))
         return redirect(translation)
 
-    # Remove old search results
-    cleanup_session(request.session)
-
     store_result = {
         "query": search_query,
         "url": search_url,
         "items": form.items(),
-        "key": session_key,
+        "key": search_key,
         "name": force_str(name),
-        "ids": unit_ids,
-        "ttl": int(time.time()) + 86400,
+        "count": len(unit_ids),
     }
-    request.session[session_key] = store_result
+    result_ids = SearchResultIds(search_key, len(unit_ids))
+    result_ids.store(unit_ids)
+    cache.set(search_key, store_result, SEARCH_TTL)
 
     search_result.update(store_result)
+    search_result["ids"] = result_ids
     return search_result
 
 
@@ -417,7 +492,7 @@ def translate(request, project, component, lang):
     if not 0 < offset <= num_results:
         messages.info(request, _("The translation has come to an end."))
         # Delete search
-        del request.session[search_result["key"]]
+        cache.delete(search_result["key"])
         # Redirect to translation
         return redirect(translation)
 
@@ -51,7 +51,8 @@ def download_multi(translations, fmt=None):
 def download_component_list(request, name):
     obj = get_object_or_404(ComponentList, slug=name)
     components = obj.components.filter(project_id__in=request.user.allowed_project_ids)
-    for component in components:
+    # Commit only components with pending changes
+    for component in components.filter(translation__unit__pending=True).distinct():
         component.commit_pending("download", None)
     return download_multi(
         Translation.objects.filter(component__in=components), request.GET.get("format")
@@ -66,7 +67,10 @@ def download_component(request, project, component):
 
 def download_project(request, project):
     obj = get_project(request, project)
-    obj.commit_pending("download", None)
+    components = obj.component_set.filter(translation__unit__pending=True)
+    # Commit only components with pending changes
+    for component in components.distinct():
+        component.commit_pending("download", None)
     return download_multi(
         Translation.objects.filter(component__project=obj), request.GET.get("format")
     )
@@ -74,12 +78,12 @@ def download_project(request, project):
 
 def download_lang_project(request, lang, project):
     obj = get_project(request, project)
-    obj.commit_pending("download", None)
     langobj = get_object_or_404(Language, code=lang)
-    return download_multi(
-        Translation.objects.filter(component__project=obj, language=langobj),
-        request.GET.get("format"),
-    )
+    translations = Translation.objects.filter(component__project=obj, language=langobj)
+    # Commit only translations with pending changes
+    for translation in translations.filter(unit__pending=True).distinct():
+        translation.commit_pending("download", None)
+    return download_multi(translations, request.GET.get("format"))
 
 
 def download_translation(request, project, component, lang):
@@ -93,7 +97,7 @@ def download_translation(request, project, component, lang):
             show_form_errors(request, form)
             return redirect(obj)
 
-        kwargs["units"] = obj.unit_set.search(form.cleaned_data.get("q", "")).distinct()
+        kwargs["units"] = obj.unit_set.search(form.cleaned_data.get("q", ""))
         kwargs["fmt"] = form.cleaned_data["format"]
 
     return download_translation_file(obj, **kwargs)
@@ -186,7 +186,7 @@ def search(request, project=None, component=None, lang=None):
             units = Unit.objects.filter(
                 translation__component__project_id__in=request.user.allowed_project_ids
             )
-        units = units.search(search_form.cleaned_data.get("q", "")).distinct()
+        units = units.search(search_form.cleaned_data.get("q", ""))
         if lang:
             units = units.filter(translation__language=context["language"])
 
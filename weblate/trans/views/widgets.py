@@ -17,10 +17,13 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 
+from django.core.cache import cache
 from django.http import Http404, HttpResponse
 from django.shortcuts import redirect
 from django.urls import reverse
+from django.utils.cache import get_conditional_response
 from django.utils.html import escape
+from django.utils.http import http_date
 from django.utils.safestring import mark_safe
 from django.views.decorators.cache import cache_control
 from django.views.decorators.vary import vary_on_cookie
@@ -34,6 +37,35 @@ from weblate.utils.site import get_site_url
 from weblate.utils.views import get_component, get_project, try_set_language
 
 
+def widget_response(request, widget_obj):
+    """Return rendered widget.
+
+    The rendered content is cached by the widget fingerprint, which changes
+    with the statistics it displays, and conditional requests are answered
+    without rendering.
+    """
+    etag = '"{}"'.format(widget_obj.fingerprint)
+    last_modified = None
+    if widget_obj.last_changed:
+        last_modified = int(widget_obj.last_changed.timestamp())
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        cache_key = "widget-{}".format(widget_obj.fingerprint)
+        content = cache.get(cache_key)
+        if content is None:
+            response = HttpResponse(content_type=widget_obj.content_type)
+            widget_obj.render(response)
+            cache.set(cache_key, response.content, 86400)
+        else:
+            response = HttpResponse(content, content_type=widget_obj.content_type)
+
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
 def widgets_sorter(widget):
     """Provide better ordering of widgets."""
     return WIDGETS[widget].order
@@ -156,10 +188,7 @@ def render_widget(
             return redirect("widget-image", permanent=True, **kwargs)
         return redirect("widget-image", permanent=True, **kwargs)
 
-    # Render widget
-    response = HttpResponse(content_type=widget_obj.content_type)
-    widget_obj.render(response)
-    return response
+    return widget_response(request, widget_obj)
 
 
 @vary_on_cookie
@@ -168,7 +197,4 @@ def render_og(request):
     # Construct object
     widget_obj = SiteOpenGraphWidget()
 
-    # Render widget
-    response = HttpResponse(content_type=widget_obj.content_type)
-    widget_obj.render(response)
-    return response
+    return widget_response(request, widget_obj)
@@ -27,12 +27,14 @@ from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils.encoding import force_str
 from django.utils.formats import number_format
+from django.utils.functional import cached_property
 from django.utils.html import escape
 from django.utils.translation import get_language
 from django.utils.translation import gettext as _
 from django.utils.translation import gettext_lazy, npgettext, pgettext
 
 from weblate.fonts.utils import configure_fontconfig, render_size
+from weblate.utils.hash import calculate_fingerprint, hash_to_checksum
 from weblate.utils.site import get_site_url
 from weblate.utils.stats import GlobalStats
 
@@ -66,6 +68,7 @@ class Widget:
     content_type = "image/png"
     order = 100
     show = True
+    last_changed = None
 
     def __init__(self, obj, color=None, lang=None):
         """Create Widget object."""
@@ -74,6 +77,21 @@ class Widget:
         self.color = self.get_color_name(color)
         self.lang = lang
 
+    def get_state(self):
+        """Return values the rendered widget depends on."""
+        return [
+            self.obj.stats.cache_key,
+            self.name,
+            self.color,
+            self.lang.code if self.lang else "",
+            get_language(),
+        ]
+
+    @cached_property
+    def fingerprint(self):
+        """Fingerprint of the widget content used for caching."""
+        return hash_to_checksum(calculate_fingerprint(*self.get_state()))
+
     def get_color_name(self, color):
         """Return color name based on allowed ones."""
         if color not in self.colors:
@@ -93,6 +111,10 @@ class ContentWidget(Widget):
         else:
             stats = obj.stats
         self.percent = stats.translated_percent
+        self.last_changed = stats.last_changed
+
+    def get_state(self):
+        return super().get_state() + [self.percent]
 
     def get_percent_text(self):
         return pgettext("Translated percents", "%(percent)s%%") % {
@@ -127,6 +149,13 @@ class BitmapWidget(ContentWidget):
         self.draw = None
         self.width = 0
 
+    def get_state(self):
+        return super().get_state() + [
+            self.total,
+            self.languages,
+            sorted(self.params.items()),
+        ]
+
     def get_text_params(self):
         """Create dictionary used for text formatting."""
         return {
@@ -410,6 +439,15 @@ class MultiLanguageWidget(SVGWidget):
 
     COLOR_MAP = {"red": "#fa3939", "green": "#3fed48", "blue": "#3f85ed", "auto": None}
 
+    def get_state(self):
+        return super().get_state() + [
+            self.obj.slug,
+            [
+                (stats.language.code, stats.translated_percent)
+                for stats in self.obj.stats.get_language_stats()
+            ],
+        ]
+
     def render(self, response):
         translations = []
         offset = 20
@@ -31,6 +31,12 @@ def calculate_hash(source, context):
     return siphash("Weblate Sip Hash", data) - 2 ** 63
 
 
+def calculate_fingerprint(*values):
+    """Calculates checksum of all given values."""
+    data = "\x00".join(str(value) for value in values).encode()
+    return siphash("Weblate Sip Hash", data) - 2 ** 63
+
+
 def checksum_to_hash(checksum):
     """Converts hex to id_hash (signed 64-bit int)."""
     return int(checksum, 16) - 2 ** 63
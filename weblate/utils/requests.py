@@ -17,10 +17,23 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 
+from threading import local
+
 import requests
 
 from weblate import USER_AGENT
 
+SESSIONS = local()
+
+
+def get_session():
+    """Return per thread session, it keeps the HTTP connections open."""
+    try:
+        return SESSIONS.session
+    except AttributeError:
+        SESSIONS.session = requests.Session()
+        return SESSIONS.session
+
 
 def request(method, url, headers=None, **kwargs):
     agent = {"User-Agent": USER_AGENT}
@@ -28,7 +41,7 @@ def request(method, url, headers=None, **kwargs):
         headers.update(agent)
     else:
         headers = agent
-    response = requests.request(method, url, headers=headers, **kwargs)
+    response = get_session().request(method, url, headers=headers, **kwargs)
     response.raise_for_status()
     return response
 
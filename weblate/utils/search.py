@@ -174,16 +174,28 @@ class QueryParser(whoosh.qparser.QueryParser):
 PARSER = QueryParser()
 
 PLAIN_FIELDS = ("source", "target", "context", "note", "location")
-FIELD_MAP = {"changed": "change__timestamp", "added": "timestamp"}
-STRING_FIELD_MAP = {"suggestion": "suggestion__target", "comment": "comment__comment"}
+FIELD_MAP = {"changed": "timestamp", "added": "timestamp"}
+STRING_FIELD_MAP = {"suggestion": "target", "comment": "comment"}
 EXACT_FIELD_MAP = {
-    "check": "check__check",
-    "ignored_check": "check__check",
+    "check": "check",
+    "ignored_check": "check",
     "language": "translation__language__code",
-    "changed_by": "change__author__username",
-    "suggestion_author": "suggestion__user__username",
-    "comment_author": "comment__user__username",
-    "label": "labels__name",
+    "changed_by": "author__username",
+    "suggestion_author": "user__username",
+    "comment_author": "user__username",
+    "label": "label__name",
+}
+# Fields stored in related models, the lookups above are relative to these
+RELATED_FIELDS = {
+    "changed": "change",
+    "changed_by": "change",
+    "check": "check",
+    "ignored_check": "check",
+    "suggestion": "suggestion",
+    "suggestion_author": "suggestion",
+    "comment": "comment",
+    "comment_author": "comment",
+    "label": "label",
 }
 
 
@@ -202,30 +214,48 @@ def field_name(field, suffix="search"):
     return field
 
 
-def field_extra(field, query):
-    from weblate.trans.models import Change
+def related_queryset(field):
+    """Return queryset of the related model storing given field."""
+    from weblate.checks.models import Check
+    from weblate.trans.models import Change, Comment, Suggestion, Unit
 
-    if field in {"changed", "changed_by"}:
-        return query & Q(change__action__in=Change.ACTIONS_CONTENT)
-    if field == "check":
-        return query & Q(check__ignore=False)
-    if field == "ignored_check":
-        return query & Q(check__ignore=True)
-    return query
+    model = RELATED_FIELDS[field]
+    if model == "change":
+        return Change.objects.filter(
+            unit__isnull=False, action__in=Change.ACTIONS_CONTENT
+        )
+    if model == "check":
+        return Check.objects.filter(ignore=field == "ignored_check")
+    if model == "suggestion":
+        return Suggestion.objects.all()
+    if model == "comment":
+        return Comment.objects.all()
+    return Unit.labels.through.objects.all()
 
 
-def range_sql(field, start, end, startexcl, endexcl, conv=int):
-    def range_lookup(field, op, value):
-        return {"{}__{}".format(field_name(field), op): conv(value)}
+def lookup_sql(field, **lookups):
+    """Build query for lookups on a field.
+
+    Fields stored in related models are matched in a subquery on the
+    related table, which yields matching unit ids. This avoids joining
+    the related tables to units and the duplicate rows it produces.
+    """
+    if field in RELATED_FIELDS:
+        return Q(pk__in=related_queryset(field).filter(**lookups).values("unit_id"))
+    return Q(**lookups)
 
-    gte = "gt" if startexcl else "gte"
-    lte = "lt" if endexcl else "lte"
 
-    if start is not None and end is not None:
-        return Q(**range_lookup(field, gte, start)) & Q(**range_lookup(field, lte, end))
+def range_sql(field, start, end, startexcl, endexcl, conv=int):
+    def range_lookup(op, value):
+        return "{}__{}".format(field_name(field), op), conv(value)
+
+    lookups = []
     if start is not None:
-        return Q(**range_lookup(field, gte, start))
-    return Q(**range_lookup(field, lte, end))
+        lookups.append(range_lookup("gt" if startexcl else "gte", start))
+    if end is not None:
+        lookups.append(range_lookup("lt" if endexcl else "lte", end))
+
+    return lookup_sql(field, **dict(lookups))
 
 
 def has_sql(text):
@@ -238,13 +268,13 @@ def has_sql(text):
     if text in ("check", "failing-check", "failing_check"):
         return Q(has_failing_check=True)
     if text in ("ignored-check", "ignored_check"):
-        return Q(check__ignore=True)
+        return lookup_sql("ignored_check")
     if text == "translation":
         return Q(state__gte=STATE_TRANSLATED)
     if text == "shaping":
         return Q(shaping__isnull=False)
     if text == "label":
-        return Q(labels__isnull=False)
+        return lookup_sql("label")
 
     raise ValueError("Unsupported has lookup: {}".format(text))
 
@@ -282,25 +312,24 @@ def query_sql(obj):
             return has_sql(obj.text)
         if obj.fieldname == "is":
             return is_sql(obj.text)
-        return field_extra(obj.fieldname, Q(**{field_name(obj.fieldname): obj.text}))
+        return lookup_sql(obj.fieldname, **{field_name(obj.fieldname): obj.text})
     if isinstance(obj, whoosh.query.DateRange):
-        return field_extra(
+        return range_sql(
             obj.fieldname,
-            range_sql(
-                obj.fieldname,
-                obj.startdate,
-                obj.enddate,
-                obj.startexcl,
-                obj.endexcl,
-                timezone.make_aware,
-            ),
+            obj.startdate,
+            obj.enddate,
+            obj.startexcl,
+            obj.endexcl,
+            timezone.make_aware,
         )
     if isinstance(obj, whoosh.query.NumericRange):
         return range_sql(obj.fieldname, obj.start, obj.end, obj.startexcl, obj.endexcl)
     if isinstance(obj, whoosh.query.Regex):
         try:
             re.compile(obj.text)
-            return Q(**{field_name(obj.fieldname, "regex"): obj.text})
+            return lookup_sql(
+                obj.fieldname, **{field_name(obj.fieldname, "regex"): obj.text}
+            )
         except re.error as error:
             raise ValueError(_("Invalid regular expression: {}").format(error))
 
@@ -18,12 +18,16 @@
 #
 
 
+from collections import defaultdict
 from copy import copy
 from datetime import timedelta
+from threading import local
 
+from django.conf import settings
 from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Count, Sum
+from django.db import transaction
+from django.db.models import Count, Max, Sum
 from django.db.models.functions import Length
 from django.utils import timezone
 from django.utils.functional import cached_property
@@ -70,6 +74,10 @@ BASIC_KEYS = frozenset(
 SOURCE_KEYS = frozenset(
     list(BASIC_KEYS) + ["source_strings", "source_words", "source_chars"]
 )
+PERCENT_KEYS = frozenset(key for key in BASIC_KEYS if key.endswith("_percent"))
+
+# Whether stale stats are being revalidated in current thread
+REVALIDATION = local()
 
 
 def aggregate(stats, item, stats_obj):
@@ -93,6 +101,84 @@ def zero_stats(keys):
     return stats
 
 
+def get_basic_aggregates():
+    """Return aggregations used to calculate basic translation stats."""
+    return {
+        "all": Count("id"),
+        "all_words": Sum("num_words"),
+        "all_chars": Sum(Length("source")),
+        "fuzzy": conditional_sum(1, state=STATE_FUZZY),
+        "fuzzy_words": conditional_sum("num_words", state=STATE_FUZZY),
+        "fuzzy_chars": conditional_sum(Length("source"), state=STATE_FUZZY),
+        "translated": conditional_sum(1, state__gte=STATE_TRANSLATED),
+        "translated_words": conditional_sum("num_words", state__gte=STATE_TRANSLATED),
+        "translated_chars": conditional_sum(
+            Length("source"), state__gte=STATE_TRANSLATED
+        ),
+        "todo": conditional_sum(1, state__lt=STATE_TRANSLATED),
+        "todo_words": conditional_sum("num_words", state__lt=STATE_TRANSLATED),
+        "todo_chars": conditional_sum(Length("source"), state__lt=STATE_TRANSLATED),
+        "nottranslated": conditional_sum(1, state=STATE_EMPTY),
+        "nottranslated_words": conditional_sum("num_words", state=STATE_EMPTY),
+        "nottranslated_chars": conditional_sum(Length("source"), state=STATE_EMPTY),
+        "approved": conditional_sum(1, state__gte=STATE_APPROVED),
+        "approved_words": conditional_sum("num_words", state__gte=STATE_APPROVED),
+        "approved_chars": conditional_sum(Length("source"), state__gte=STATE_APPROVED),
+        "allchecks": conditional_sum(1, has_failing_check=True),
+        "allchecks_words": conditional_sum("num_words", has_failing_check=True),
+        "allchecks_chars": conditional_sum(Length("source"), has_failing_check=True),
+        "suggestions": conditional_sum(1, has_suggestion=True),
+        "suggestions_words": conditional_sum("num_words", has_suggestion=True),
+        "suggestions_chars": conditional_sum(Length("source"), has_suggestion=True),
+        "comments": conditional_sum(1, has_comment=True),
+        "comments_words": conditional_sum("num_words", has_comment=True),
+        "comments_chars": conditional_sum(Length("source"), has_comment=True),
+        "approved_suggestions": conditional_sum(
+            1, state__gte=STATE_APPROVED, has_suggestion=True
+        ),
+        "approved_suggestions_words": conditional_sum(
+            "num_words", state__gte=STATE_APPROVED, has_suggestion=True
+        ),
+        "approved_suggestions_chars": conditional_sum(
+            Length("source"), state__gte=STATE_APPROVED, has_suggestion=True
+        ),
+    }
+
+
+def get_unit_stats(unit):
+    """Return contribution of a single unit to the basic stats.
+
+    This has to match the aggregation done in TranslationStats.prefetch_basic.
+    """
+    words = unit.num_words
+    chars = len(unit.source)
+    matches = {
+        "all": True,
+        "fuzzy": unit.state == STATE_FUZZY,
+        "translated": unit.state >= STATE_TRANSLATED,
+        "todo": unit.state < STATE_TRANSLATED,
+        "nottranslated": unit.state == STATE_EMPTY,
+        "approved": unit.state >= STATE_APPROVED,
+        "allchecks": unit.has_failing_check,
+        "suggestions": unit.has_suggestion,
+        "comments": unit.has_comment,
+        "approved_suggestions": unit.state >= STATE_APPROVED and unit.has_suggestion,
+    }
+    result = {}
+    for item, match in matches.items():
+        result[item] = 1 if match else 0
+        result["{}_words".format(item)] = words if match else 0
+        result["{}_chars".format(item)] = chars if match else 0
+    return result
+
+
+def get_unit_stats_delta(old_unit, new_unit):
+    """Return changes in basic stats caused by unit change."""
+    old = get_unit_stats(old_unit)
+    new = get_unit_stats(new_unit)
+    return {key: new[key] - old[key] for key in new if new[key] != old[key]}
+
+
 def prefetch_stats(queryset):
     objects = list(queryset)
     if not objects:
@@ -105,6 +191,45 @@ def prefetch_stats(queryset):
     return queryset
 
 
+def rebuild_stats(components=None, logger=None):
+    """Rebuild stored stats in bulk.
+
+    Stats for all translations within a component are calculated by single
+    query, the rolled up stats are calculated from these afterwards. All
+    stats are rebuilt when no components are given.
+    """
+    from weblate.lang.models import Language
+    from weblate.trans.models import Component, ComponentList, StoredStats
+
+    if components is None:
+        components = Component.objects.all()
+        # Full rebuild, this removes stats for no longer existing objects
+        StoredStats.objects.all().delete()
+
+    projects = set()
+    languages = set()
+    for component in components.prefetch():
+        if logger:
+            logger("Updating stats for {0}".format(component))
+        component.stats.rebuild()
+        projects.add(component.project)
+        languages.update(
+            translation.language_id for translation in component.stats.translation_set
+        )
+
+    # Parent stats are calculated directly, invalidating them would only
+    # mark them stale with background updates
+    for language in Language.objects.filter(pk__in=languages):
+        language.stats.revalidate()
+    for project in projects:
+        project.stats.revalidate()
+        for stats in project.stats.get_language_stats():
+            stats.revalidate()
+    for clist in ComponentList.objects.filter(components__in=components).distinct():
+        clist.stats.revalidate()
+    GlobalStats().revalidate()
+
+
 class ParentStats:
     def __init__(self, stats, parent):
         self.translated_percent = stats.calculate_percents(
@@ -123,6 +248,7 @@ class BaseStats:
         self._object = obj
         self._data = None
         self._pending_save = False
+        self._pending_persist = False
 
     @property
     def pk(self):
@@ -158,6 +284,17 @@ class BaseStats:
         if not lookup:
             return
         data = cache.get_many(lookup.keys())
+        missing = set(lookup.keys()) - set(data.keys())
+        if missing:
+            from weblate.trans.models import StoredStats
+
+            stored = {
+                item.key: item.get_data()
+                for item in StoredStats.objects.filter(key__in=missing)
+            }
+            if stored:
+                cache.set_many(stored, 30 * 86400)
+                data.update(stored)
         for item, value in data.items():
             lookup[item].set_data(value)
         for item in set(lookup.keys()) - set(data.keys()):
@@ -179,26 +316,172 @@ class BaseStats:
             self._pending_save = True
             if name in self.basic_keys:
                 self.prefetch_basic()
+                self._pending_persist = True
             elif name.endswith("_percent"):
                 self.store_percents(name)
             else:
                 self.calculate_item(name)
             if not was_pending:
-                self.save()
+                # Only basic stats are stored in the database
+                if self._pending_persist:
+                    self.save()
+                else:
+                    self.save_cache()
                 self._pending_save = False
+                self._pending_persist = False
         return self._data[name]
 
     def load(self):
-        return cache.get(self.cache_key, {})
+        """Load stats from cache falling back to the database."""
+        data = cache.get(self.cache_key)
+        if data is None:
+            from weblate.trans.models import StoredStats
 
-    def save(self):
-        """Save stats to cache."""
+            try:
+                data = StoredStats.objects.get(key=self.cache_key).get_data()
+            except StoredStats.DoesNotExist:
+                return {}
+            cache.set(self.cache_key, data, 30 * 86400)
+        return data
+
+    def save_cache(self):
+        """Save stats to cache only."""
         cache.set(self.cache_key, self._data, 30 * 86400)
 
+    def save(self):
+        """Save stats to cache and database."""
+        from weblate.trans.models import StoredStats
+
+        self.save_cache()
+        updated = StoredStats.objects.filter(key=self.cache_key).update(
+            data=self._data, timestamp=timezone.now()
+        )
+        if not updated:
+            StoredStats.objects.get_or_create(
+                key=self.cache_key, defaults={"data": self._data}
+            )
+
+    @staticmethod
+    def save_many(stats):
+        """Save multiple stats objects at once."""
+        from weblate.trans.models import StoredStats
+
+        data = {item.cache_key: item.get_data() for item in stats}
+        cache.set_many(data, 30 * 86400)
+        StoredStats.objects.filter(key__in=data.keys()).delete()
+        StoredStats.objects.bulk_create(
+            [StoredStats(key=key, data=value) for key, value in data.items()],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
     def invalidate(self, language=None):
-        """Invalidate local and cache data."""
+        """Invalidate local, cache and database data.
+
+        With background updates enabled the stats are only marked as stale
+        and recalculated by a Celery task.
+        """
+        from weblate.trans.models import StoredStats
+
+        if settings.STATS_BACKGROUND_UPDATE and self.mark_stale():
+            return
         self._data = {}
         cache.delete(self.cache_key)
+        StoredStats.objects.filter(key=self.cache_key).delete()
+
+    def mark_stale(self):
+        """Mark stats as stale and schedule their recalculation.
+
+        Returns False if there is nothing to mark.
+        """
+        from weblate.trans.tasks import update_stale_stats
+
+        data = self.load()
+        if "all" not in data:
+            return False
+        if not data.get("stale"):
+            data["stale"] = True
+            self._data = data
+            self.save()
+        # Deduplicate the recalculation requests
+        if cache.add("stats-pending-{}".format(self.cache_key), True, 3600):
+            key = self.cache_key
+            transaction.on_commit(lambda: update_stale_stats.delay(key))
+        return True
+
+    @property
+    def is_stale(self):
+        if self._data is None:
+            self._data = self.load()
+        return bool(self._data.get("stale"))
+
+    def revalidate(self):
+        """Recalculate stale stats.
+
+        Stale stats of the children are recalculated as well, so that their
+        outdated data is not summed up.
+        """
+        active = getattr(REVALIDATION, "active", False)
+        REVALIDATION.active = True
+        try:
+            self._data = {}
+            self.ensure_basic()
+        finally:
+            REVALIDATION.active = active
+
+    def update_data(self, data, delta):
+        """Apply counter changes to stored basic stats.
+
+        Returns False when there is nothing to update.
+        """
+        # Stale stats will be recalculated anyway
+        if "all" not in data or data.get("stale"):
+            return False
+        self._data = {
+            key: value
+            for key, value in data.items()
+            if key in self.basic_keys and key not in PERCENT_KEYS
+        }
+        for key, value in delta.items():
+            if key == "last_changed":
+                last = self._data.get("last_changed")
+                if value and (not last or last < value):
+                    self._data["last_changed"] = value
+                    self._data["last_author"] = delta.get("last_author")
+            elif key != "last_author":
+                self._data[key] += value
+        self.calculate_basic_percents()
+        return True
+
+    def apply_delta(self, delta, language=None):
+        """Update stored stats in place by given counter changes.
+
+        Only basic stats are adjusted, all other cached values are dropped
+        and will be calculated on demand. Nothing is done when basic stats
+        are not stored as they will be calculated from scratch anyway.
+
+        The database copy is updated only if it was not modified meanwhile,
+        the stats are invalidated when that fails repeatedly.
+        """
+        from weblate.trans.models import StoredStats
+
+        for _attempt in range(5):
+            try:
+                stored = StoredStats.objects.get(key=self.cache_key)
+            except StoredStats.DoesNotExist:
+                # Drop possibly cached copy, it is outdated now
+                self._data = {}
+                cache.delete(self.cache_key)
+                return
+            if not self.update_data(stored.get_data(), delta):
+                return
+            updated = StoredStats.objects.filter(
+                key=self.cache_key, timestamp=stored.timestamp
+            ).update(data=self._data, timestamp=timezone.now())
+            if updated:
+                self.save_cache()
+                return
+        BaseStats.invalidate(self)
 
     def store(self, key, value):
         if self._data is None:
@@ -213,17 +496,28 @@ class BaseStats:
         raise NotImplementedError()
 
     def ensure_basic(self, save=True):
-        """Ensure we have basic stats."""
+        """Ensure we have basic stats.
+
+        Stale stats are kept, only the background update recalculates them.
+        """
         # Prefetch basic stats at once
-        if self._data is None:
-            self._data = self.load()
-        if "all" not in self._data:
+        if not self.has_basic:
+            self._data = {}
             self.prefetch_basic()
             if save:
                 self.save()
             return True
         return False
 
+    @property
+    def has_basic(self):
+        if self._data is None:
+            self._data = self.load()
+        if "all" not in self._data:
+            return False
+        # Stale stats are served, but not used while revalidating parent
+        return not self._data.get("stale") or not getattr(REVALIDATION, "active", False)
+
     def prefetch_basic(self):
         raise NotImplementedError()
 
@@ -277,6 +571,9 @@ class DummyTranslationStats(BaseStats):
     def cache_key(self):
         return None
 
+    def save_cache(self):
+        return
+
     def save(self):
         return
 
@@ -298,6 +595,29 @@ class TranslationStats(BaseStats):
         self._object.component.stats.invalidate(language=self._object.language)
         self._object.language.stats.invalidate()
 
+    def apply_delta(self, delta, language=None):
+        """Update stored stats in place by given counter changes.
+
+        The translation stats are locked while updating, the parent stats
+        are updated afterwards without holding the lock.
+        """
+        from weblate.trans.models import StoredStats
+
+        with transaction.atomic():
+            try:
+                stored = StoredStats.objects.select_for_update().get(key=self.cache_key)
+            except StoredStats.DoesNotExist:
+                # Drop possibly cached copy, it is outdated now
+                self._data = {}
+                cache.delete(self.cache_key)
+                stored = None
+            if stored is not None and self.update_data(stored.get_data(), delta):
+                stored.data = self._data
+                stored.save(update_fields=["data", "timestamp"])
+                self.save_cache()
+        self._object.component.stats.apply_delta(delta, language=self._object.language)
+        self._object.language.stats.apply_delta(delta)
+
     @property
     def language(self):
         return self._object.language
@@ -307,46 +627,7 @@ class TranslationStats(BaseStats):
         return self._object.component.project.enable_review
 
     def prefetch_basic(self):
-        stats = self._object.unit_set.aggregate(
-            all=Count("id"),
-            all_words=Sum("num_words"),
-            all_chars=Sum(Length("source")),
-            fuzzy=conditional_sum(1, state=STATE_FUZZY),
-            fuzzy_words=conditional_sum("num_words", state=STATE_FUZZY),
-            fuzzy_chars=conditional_sum(Length("source"), state=STATE_FUZZY),
-            translated=conditional_sum(1, state__gte=STATE_TRANSLATED),
-            translated_words=conditional_sum("num_words", state__gte=STATE_TRANSLATED),
-            translated_chars=conditional_sum(
-                Length("source"), state__gte=STATE_TRANSLATED
-            ),
-            todo=conditional_sum(1, state__lt=STATE_TRANSLATED),
-            todo_words=conditional_sum("num_words", state__lt=STATE_TRANSLATED),
-            todo_chars=conditional_sum(Length("source"), state__lt=STATE_TRANSLATED),
-            nottranslated=conditional_sum(1, state=STATE_EMPTY),
-            nottranslated_words=conditional_sum("num_words", state=STATE_EMPTY),
-            nottranslated_chars=conditional_sum(Length("source"), state=STATE_EMPTY),
-            approved=conditional_sum(1, state__gte=STATE_APPROVED),
-            approved_words=conditional_sum("num_words", state__gte=STATE_APPROVED),
-            approved_chars=conditional_sum(Length("source"), state__gte=STATE_APPROVED),
-            allchecks=conditional_sum(1, has_failing_check=True),
-            allchecks_words=conditional_sum("num_words", has_failing_check=True),
-            allchecks_chars=conditional_sum(Length("source"), has_failing_check=True),
-            suggestions=conditional_sum(1, has_suggestion=True),
-            suggestions_words=conditional_sum("num_words", has_suggestion=True),
-            suggestions_chars=conditional_sum(Length("source"), has_suggestion=True),
-            comments=conditional_sum(1, has_comment=True),
-            comments_words=conditional_sum("num_words", has_comment=True),
-            comments_chars=conditional_sum(Length("source"), has_comment=True),
-            approved_suggestions=conditional_sum(
-                1, state__gte=STATE_APPROVED, has_suggestion=True
-            ),
-            approved_suggestions_words=conditional_sum(
-                "num_words", state__gte=STATE_APPROVED, has_suggestion=True
-            ),
-            approved_suggestions_chars=conditional_sum(
-                Length("source"), state__gte=STATE_APPROVED, has_suggestion=True
-            ),
-        )
+        stats = self._object.unit_set.aggregate(**get_basic_aggregates())
         for key, value in stats.items():
             self.store(key, value)
 
@@ -359,6 +640,64 @@ class TranslationStats(BaseStats):
         # Last change timestamp
         self.fetch_last_change()
 
+    @staticmethod
+    def prefetch_basic_many(stats):
+        """Calculate basic stats for multiple translations at once.
+
+        Uses single grouped aggregation instead of a query per translation.
+        """
+        from weblate.trans.models import Change, Unit
+
+        lookup = {item.pk: item for item in stats}
+        if not lookup:
+            return
+        for item in stats:
+            item.set_data(zero_stats(BASIC_KEYS))
+
+        units = (
+            Unit.objects.filter(translation_id__in=lookup.keys())
+            .values("translation_id")
+            .annotate(**get_basic_aggregates())
+            .order_by()
+        )
+        for values in units:
+            item = lookup[values.pop("translation_id")]
+            for key, value in values.items():
+                item.store(key, value)
+
+        last_changes = (
+            Change.objects.content()
+            .filter(translation_id__in=lookup.keys())
+            .values("translation_id")
+            .annotate(last_id=Max("id"))
+            .order_by()
+            .values_list("last_id", flat=True)
+        )
+        for translation_id, timestamp, author_id in Change.objects.filter(
+            pk__in=list(last_changes)
+        ).values_list("translation_id", "timestamp", "author_id"):
+            item = lookup[translation_id]
+            item.store("last_changed", timestamp)
+            item.store("last_author", author_id)
+
+        for item in stats:
+            item.store("languages", 1)
+            item.calculate_basic_percents()
+
+    @classmethod
+    def ensure_basic_many(cls, stats):
+        """Ensure we have basic stats for all translations.
+
+        The missing ones are calculated by single query and stored at once.
+        """
+        if not stats:
+            return
+        stats[0].prefetch_many(stats)
+        missing = [item for item in stats if not item.has_basic]
+        if missing:
+            cls.prefetch_basic_many(missing)
+            cls.save_many(missing)
+
     def get_last_change_obj(self):
         from weblate.trans.models import Change
 
@@ -425,12 +764,16 @@ class TranslationStats(BaseStats):
         # Prefetch basic stats at once
         save = self.ensure_basic(save=False)
         # Fetch remaining ones
+        changed = False
         for item, _unused in get_filter_choice(self.obj.component.project):
             if item not in self._data:
                 self.calculate_item(item)
-                save = True
+                changed = True
+        # Only basic stats are stored in the database
         if save:
             self.save()
+        elif changed:
+            self.save_cache()
 
 
 class LanguageStats(BaseStats):
@@ -450,6 +793,9 @@ class LanguageStats(BaseStats):
 
     def prefetch_basic(self):
         stats = zero_stats(self.basic_keys)
+        TranslationStats.ensure_basic_many(
+            [translation.stats for translation in self.translation_set]
+        )
         for translation in self.translation_set:
             stats_obj = translation.stats
             stats_obj.ensure_basic()
@@ -499,11 +845,67 @@ class ComponentStats(LanguageStats):
         for clist in self._object.componentlist_set.iterator():
             clist.stats.invalidate()
 
+    def apply_delta(self, delta, language=None):
+        super().apply_delta(delta)
+        self._object.project.stats.apply_delta(delta, language=language)
+        for clist in self._object.componentlist_set.iterator():
+            clist.stats.apply_delta(delta)
+
     def get_language_stats(self):
         yield from (
             TranslationStats(translation) for translation in self.translation_set
         )
 
+    @classmethod
+    def ensure_basic_many(cls, stats):
+        """Ensure we have basic stats for all components.
+
+        Stats for translations of the components missing them are calculated
+        by single query.
+        """
+        from weblate.trans.models import Translation
+
+        if not stats:
+            return
+        stats[0].prefetch_many(stats)
+        missing = {item.pk: item for item in stats if not item.has_basic}
+        if not missing:
+            return
+
+        # Fetch translations for all components at once
+        translations = defaultdict(list)
+        for translation in Translation.objects.filter(
+            component_id__in=missing.keys()
+        ).prefetch_related("language"):
+            item = missing[translation.component_id]
+            translation.component = item.obj
+            translations[translation.component_id].append(translation)
+            if translation.language_id == item.obj.project.source_language_id:
+                item.obj.__dict__["source_translation"] = translation
+        TranslationStats.ensure_basic_many(
+            [
+                translation.stats
+                for values in translations.values()
+                for translation in values
+            ]
+        )
+
+        # Calculate component stats from the translations
+        for pk, item in missing.items():
+            item.__dict__["translation_set"] = translations[pk]
+            item.ensure_basic(save=False)
+        cls.save_many(missing.values())
+
+    def rebuild(self):
+        """Recalculate and store stats for the component and its translations.
+
+        Updating stats of the parent objects is left to the caller.
+        """
+        stats = [translation.stats for translation in self.translation_set]
+        TranslationStats.prefetch_basic_many(stats)
+        self.save_many(stats)
+        self.revalidate()
+
     def get_single_language_stats(self, language):
         try:
             return TranslationStats(self._object.translation_set.get(language=language))
@@ -530,12 +932,13 @@ class ProjectLanguageStats(LanguageStats):
 
     @cached_property
     def translation_set(self):
-        result = []
-        for component in self._object.component_set.iterator():
-            result.extend(
-                component.translation_set.filter(language_id=self.language.pk)
-            )
-        return prefetch_stats(result)
+        from weblate.trans.models import Translation
+
+        return prefetch_stats(
+            Translation.objects.filter(
+                component__project=self._object, language_id=self.language.pk
+            ).prefetch()
+        )
 
     def calculate_source(self, stats_obj, stats):
         return
@@ -572,6 +975,12 @@ class ProjectStats(BaseStats):
                 self.get_single_language_stats(lang).invalidate()
         GlobalStats().invalidate()
 
+    def apply_delta(self, delta, language=None):
+        super().apply_delta(delta)
+        if language:
+            self.get_single_language_stats(language).apply_delta(delta)
+        GlobalStats().apply_delta(delta)
+
     @cached_property
     def component_set(self):
         return prefetch_stats(self._object.component_set.all())
@@ -587,6 +996,9 @@ class ProjectStats(BaseStats):
 
     def prefetch_basic(self):
         stats = zero_stats(self.basic_keys)
+        ComponentStats.ensure_basic_many(
+            [component.stats for component in self.component_set]
+        )
         for component in self.component_set:
             stats_obj = component.stats
             stats_obj.ensure_basic()
@@ -24,7 +24,8 @@ from django.db.models import Q
 from django.test import SimpleTestCase, TestCase
 from pytz import utc
 
-from weblate.trans.models import Change, Unit
+from weblate.checks.models import Check
+from weblate.trans.models import Change, Comment, Suggestion, Unit
 from weblate.trans.util import PLURAL_SEPARATOR
 from weblate.utils.search import Comparer, parse_query
 from weblate.utils.state import (
@@ -56,7 +57,10 @@ class ComparerTest(SimpleTestCase):
 class QueryParserTest(TestCase):
     def assert_query(self, string, expected):
         result = parse_query(string)
-        self.assertEqual(result, expected)
+        self.assertEqual(
+            str(Unit.objects.filter(result).query),
+            str(Unit.objects.filter(expected).query),
+        )
         self.assertFalse(Unit.objects.filter(result).exists())
 
     def test_simple(self):
@@ -111,53 +115,62 @@ class QueryParserTest(TestCase):
     def test_invalid(self):
         self.assert_query("changed:inval AND target:world", Q(target__search="world"))
 
+    @staticmethod
+    def changed(**kwargs):
+        return Q(
+            pk__in=Change.objects.filter(
+                unit__isnull=False, action__in=Change.ACTIONS_CONTENT
+            )
+            .filter(**kwargs)
+            .values("unit_id")
+        )
+
     def test_dates(self):
-        action_change = Q(change__action__in=Change.ACTIONS_CONTENT)
         self.assert_query(
             "changed:2018",
-            Q(change__timestamp__gte=datetime(2018, 1, 1, 0, 0, tzinfo=utc))
-            & Q(
-                change__timestamp__lte=datetime(
-                    2018, 12, 31, 23, 59, 59, 999999, tzinfo=utc
-                )
-            )
-            & action_change,
+            self.changed(
+                timestamp__gte=datetime(2018, 1, 1, 0, 0, tzinfo=utc),
+                timestamp__lte=datetime(2018, 12, 31, 23, 59, 59, 999999, tzinfo=utc),
+            ),
         )
         self.assert_query(
             "changed:>20190301",
-            Q(change__timestamp__gte=datetime(2019, 3, 1, 0, 0, tzinfo=utc))
-            & action_change,
+            self.changed(timestamp__gte=datetime(2019, 3, 1, 0, 0, tzinfo=utc)),
         )
         self.assert_query(
             "changed:>2019-03-01",
-            Q(change__timestamp__gte=datetime(2019, 3, 1, 0, 0, tzinfo=utc))
-            & action_change,
+            self.changed(timestamp__gte=datetime(2019, 3, 1, 0, 0, tzinfo=utc)),
         )
         self.assert_query(
             "changed:2019-03-01",
-            Q(change__timestamp__gte=datetime(2019, 3, 1, 0, 0, tzinfo=utc))
-            & Q(
-                change__timestamp__lte=datetime(
-                    2019, 3, 1, 23, 59, 59, 999999, tzinfo=utc
-                )
-            )
-            & action_change,
+            self.changed(
+                timestamp__gte=datetime(2019, 3, 1, 0, 0, tzinfo=utc),
+                timestamp__lte=datetime(2019, 3, 1, 23, 59, 59, 999999, tzinfo=utc),
+            ),
         )
         self.assert_query(
             "changed:[2019-03-01 to 2019-04-01]",
-            Q(change__timestamp__gte=datetime(2019, 3, 1, 0, 0, tzinfo=utc))
-            & Q(
-                change__timestamp__lte=datetime(
-                    2019, 4, 1, 23, 59, 59, 999999, tzinfo=utc
-                )
-            )
-            & action_change,
+            self.changed(
+                timestamp__gte=datetime(2019, 3, 1, 0, 0, tzinfo=utc),
+                timestamp__lte=datetime(2019, 4, 1, 23, 59, 59, 999999, tzinfo=utc),
+            ),
         )
         self.assert_query(
             "added:>2019-03-01",
             Q(timestamp__gte=datetime(2019, 3, 1, 0, 0, tzinfo=utc)),
         )
 
+    def test_changed_by(self):
+        self.assert_query(
+            "changed_by:nijel AND check:same",
+            self.changed(author__username__iexact="nijel")
+            & Q(
+                pk__in=Check.objects.filter(ignore=False)
+                .filter(check__iexact="same")
+                .values("unit_id")
+            ),
+        )
+
     def test_bool(self):
         self.assert_query("pending:true", Q(pending=True))
 
@@ -197,10 +210,15 @@ class QueryParserTest(TestCase):
         self.assert_query("has:suggestion", Q(has_suggestion=True))
         self.assert_query("has:check", Q(has_failing_check=True))
         self.assert_query("has:comment", Q(has_comment=True))
-        self.assert_query("has:ignored-check", Q(check__ignore=True))
+        self.assert_query(
+            "has:ignored-check",
+            Q(pk__in=Check.objects.filter(ignore=True).values("unit_id")),
+        )
         self.assert_query("has:translation", Q(state__gte=STATE_TRANSLATED))
         self.assert_query("has:shaping", Q(shaping__isnull=False))
-        self.assert_query("has:label", Q(labels__isnull=False))
+        self.assert_query(
+            "has:label", Q(pk__in=Unit.labels.through.objects.values("unit_id"))
+        )
 
     def test_is(self):
         self.assert_query("is:pending", Q(pending=True))
@@ -211,21 +229,55 @@ class QueryParserTest(TestCase):
 
     def test_suggestions(self):
         self.assert_query(
-            "suggestion_author:nijel", Q(suggestion__user__username__iexact="nijel")
+            "suggestion_author:nijel",
+            Q(
+                pk__in=Suggestion.objects.filter(user__username__iexact="nijel").values(
+                    "unit_id"
+                )
+            ),
+        )
+
+    def test_comments(self):
+        self.assert_query(
+            "comment:hello",
+            Q(pk__in=Comment.objects.filter(comment__search="hello").values("unit_id")),
+        )
+        self.assert_query(
+            "NOT comment_author:nijel",
+            ~Q(
+                pk__in=Comment.objects.filter(user__username__iexact="nijel").values(
+                    "unit_id"
+                )
+            ),
         )
 
     def test_checks(self):
         self.assert_query(
             "check:ellipsis",
-            Q(check__check__iexact="ellipsis") & Q(check__ignore=False),
+            Q(
+                pk__in=Check.objects.filter(ignore=False)
+                .filter(check__iexact="ellipsis")
+                .values("unit_id")
+            ),
         )
         self.assert_query(
             "ignored_check:ellipsis",
-            Q(check__check__iexact="ellipsis") & Q(check__ignore=True),
+            Q(
+                pk__in=Check.objects.filter(ignore=True)
+                .filter(check__iexact="ellipsis")
+                .values("unit_id")
+            ),
         )
 
     def test_labels(self):
-        self.assert_query("label:'test label'", Q(labels__name__iexact="test label"))
+        self.assert_query(
+            "label:'test label'",
+            Q(
+                pk__in=Unit.labels.through.objects.filter(
+                    label__name__iexact="test label"
+                ).values("unit_id")
+            ),
+        )
 
     def test_priority(self):
         self.assert_query("priority:10", Q(priority=10))
@@ -23,7 +23,12 @@ from time import mktime
 from zipfile import ZipFile
 
 from django.core.paginator import EmptyPage, Paginator
-from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseRedirect,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404
 from django.utils.http import http_date
 from django.utils.translation import activate
@@ -158,12 +163,44 @@ def iter_files(filenames):
             yield filename
 
 
-def zip_download(root, filenames):
-    response = HttpResponse(content_type="application/zip")
-    with ZipFile(response, "w") as zipfile:
+class ZipStream:
+    """Write-only file-like object collecting data written by ZipFile."""
+
+    def __init__(self):
+        self.buffer = []
+
+    def write(self, data):
+        self.buffer.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        return
+
+    def pop(self):
+        """Return and discard data written so far."""
+        result = b"".join(self.buffer)
+        self.buffer = []
+        return result
+
+
+def iter_zip(root, filenames):
+    """Generate ZIP file content.
+
+    The files are read from disk one by one and their content is passed on
+    once written, so the archive is never kept in memory as a whole.
+    """
+    stream = ZipStream()
+    with ZipFile(stream, "w") as zipfile:
         for filename in iter_files(filenames):
-            with open(filename, "rb") as handle:
-                zipfile.writestr(os.path.relpath(filename, root), handle.read())
+            zipfile.write(filename, os.path.relpath(filename, root))
+            yield stream.pop()
+    yield stream.pop()
+
+
+def zip_download(root, filenames):
+    response = StreamingHttpResponse(
+        iter_zip(root, filenames), content_type="application/zip"
+    )
     response["Content-Disposition"] = 'attachment; filename="translations.zip"'
     return response
 
@@ -179,12 +216,14 @@ def download_translation_file(translation, fmt=None, units=None):
         exporter = exporter_cls(translation=translation)
         if units is None:
             units = translation.unit_set.all()
-        exporter.add_units(units)
-        response = exporter.get_response(
-            "{{project}}-{0}-{{language}}.{{extension}}".format(
-                translation.component.slug
-            )
+        filetemplate = "{{project}}-{0}-{{language}}.{{extension}}".format(
+            translation.component.slug
         )
+        if exporter.streaming:
+            response = exporter.get_streaming_response(units, filetemplate)
+        else:
+            exporter.add_units(units)
+            response = exporter.get_response(filetemplate)
     else:
         # Force flushing pending units
         translation.commit_pending("download", None)
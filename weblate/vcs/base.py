@@ -147,7 +147,14 @@ class Repository:
 
     @classmethod
     def _popen(
-        cls, args, cwd=None, merge_err=True, fullcmd=False, raw=False, local=False
+        cls,
+        args,
+        cwd=None,
+        merge_err=True,
+        fullcmd=False,
+        raw=False,
+        local=False,
+        stdin=None,
     ):
         """Execute the command using popen."""
         if args is None:
@@ -163,7 +170,7 @@ class Repository:
             stderr=subprocess.STDOUT if merge_err else subprocess.PIPE,
             stdin=subprocess.PIPE,
         )
-        output, stderr = process.communicate()
+        output, stderr = process.communicate(stdin)
         if not raw:
             output = output.decode()
         retcode = process.poll()
@@ -177,7 +184,7 @@ class Repository:
             raise RepositoryException(retcode, output)
         return output
 
-    def execute(self, args, needs_lock=True, fullcmd=False, merge_err=True):
+    def execute(self, args, needs_lock=True, fullcmd=False, merge_err=True, stdin=None):
         """Execute command and caches its output."""
         if needs_lock:
             if not self.lock.is_locked:
@@ -187,7 +194,12 @@ class Repository:
         is_status = args[0] == self._cmd_status[0]
         try:
             self.last_output = self._popen(
-                args, self.path, fullcmd=fullcmd, local=self.local, merge_err=merge_err
+                args,
+                self.path,
+                fullcmd=fullcmd,
+                local=self.local,
+                merge_err=merge_err,
+                stdin=stdin,
             )
         except RepositoryException as error:
             if not is_status:
@@ -374,6 +386,10 @@ class Repository:
         """Remove files and creates new revision."""
         raise NotImplementedError()
 
+    def commit_batch(self):
+        """Return batch to collect several revisions in."""
+        return CommitBatch(self)
+
     @staticmethod
     def update_hash(objhash, filename, extra=None):
         with open(filename, "rb") as handle:
@@ -406,6 +422,14 @@ class Repository:
 
         return objhash.hexdigest()
 
+    def get_object_hashes(self, paths):
+        """Return hashes of objects which are known without reading them.
+
+        Returns dictionary indexed by paths, the ones not included have
+        to be hashed using get_object_hash.
+        """
+        return {}
+
     def configure_remote(self, pull_url, push_url, branch):
         """Configure remote repository."""
         raise NotImplementedError()
@@ -483,3 +507,39 @@ class Repository:
 
     def list_remote_branches(self):
         return []
+
+
+class CommitBatch:
+    """Collection of revisions to create in the repository.
+
+    This generic implementation creates each revision immediately, VCS
+    backends can override it to write all of them once the batch is finished.
+    """
+
+    def __init__(self, repository):
+        self.repository = repository
+
+    def needs_commit(self, files):
+        """Check whether given files differ from the last revision in batch."""
+        return self.repository.needs_commit(*files)
+
+    def commit(self, message, author, timestamp, files):
+        """Add revision to the batch.
+
+        Returns dictionary mapping filenames to their object hashes, it might
+        be empty if the backend does not know them.
+        """
+        if self.repository.needs_commit(*files):
+            self.repository.commit(message, author, timestamp, files)
+        return {}
+
+    def invalidate(self):
+        """Forget state of the files checked by needs_commit.
+
+        Needs to be called when the files were modified after the check.
+        """
+        return
+
+    def finish(self):
+        """Write pending revisions to the repository."""
+        return
@@ -21,17 +21,244 @@
 
 import os
 import os.path
+import subprocess
+import threading
+from collections import OrderedDict
 from zipfile import ZipFile
 
 from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
 from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy
 from git.config import GitConfigParser
 
 from weblate.utils.xml import parse_xml
-from weblate.vcs.base import Repository, RepositoryException
+from weblate.vcs.base import CommitBatch, Repository, RepositoryException
 from weblate.vcs.gpg import get_gpg_sign_key
 
+# Number of git cat-file processes kept running in each process
+CAT_FILE_POOL_SIZE = 20
+CAT_FILE_POOL = OrderedDict()
+CAT_FILE_LOCK = threading.Lock()
+
+
+class GitCatFile:
+    """Long running git cat-file process reading objects from repository."""
+
+    def __init__(self, path, mode, env):
+        self.path = path
+        self.mode = mode
+        self.env = env
+        self.pid = os.getpid()
+        self.inode = os.stat(path).st_ino
+        self.lock = threading.Lock()
+        self.process = None
+
+    def is_valid(self):
+        """Check whether the process can be used for the repository."""
+        try:
+            return self.pid == os.getpid() and os.stat(self.path).st_ino == self.inode
+        except OSError:
+            return False
+
+    def start(self):
+        GitRepository.log("exec cat-file {} in {}".format(self.mode, self.path))
+        self.process = subprocess.Popen(
+            [GitRepository._cmd, "cat-file", self.mode],
+            cwd=self.path,
+            env=self.env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def close(self):
+        with self.lock:
+            self._close()
+
+    def _close(self):
+        if self.process is None:
+            return
+        # Process forked from other one can not be waited for
+        if self.pid == os.getpid():
+            self.process.communicate()
+        self.process = None
+
+    def query(self, name):
+        """Return hash, type and content of the object."""
+        if "\n" in name:
+            raise RepositoryException(0, "Invalid object name: {}".format(name))
+        with self.lock:
+            if self.process is None:
+                self.start()
+            try:
+                self.process.stdin.write(name.encode() + b"\n")
+                self.process.stdin.flush()
+                header = self.process.stdout.readline()
+            except OSError:
+                header = b""
+            if not header:
+                # The process exits on some errors, for example invalid branch
+                self._close()
+                raise RepositoryException(
+                    128, "git cat-file failed for {}".format(name)
+                )
+            header = header.decode().rstrip("\n")
+            if header.endswith((" missing", " ambiguous")):
+                raise RepositoryException(128, header)
+            objhash, kind, size = header.split()
+            content = None
+            if self.mode == "--batch":
+                content = self.process.stdout.read(int(size) + 1)[:-1]
+            return objhash, kind, content
+
+
+class GitCommitBatch(CommitBatch):
+    """Batch of Git commits written at once by git fast-import.
+
+    The files are stored using git hash-object, what gives hashes of the
+    committed blobs without hashing the files again. The hashes computed by
+    needs_commit are reused by following commit of the same files.
+    """
+
+    def __init__(self, repository):
+        super().__init__(repository)
+        self.commits = []
+        # Path -> (mode, blob hash) or None for files not in the tree
+        self.blobs = {}
+        # Files, hashes and changes from last needs_commit
+        self.checked = None
+
+    def hash_files(self, files):
+        """Store files as blobs and return their hashes."""
+        output = self.repository.execute(
+            ["hash-object", "-w", "--"] + list(files), merge_err=False
+        )
+        return dict(zip(files, output.split()))
+
+    def load_tree(self, paths):
+        """Load blobs from the last revision for files not yet in batch."""
+        missing = [path for path in paths if path not in self.blobs]
+        if not missing:
+            return
+        for path in missing:
+            self.blobs[path] = None
+        output = self.repository.execute(
+            ["ls-tree", "-z", "HEAD", "--"] + missing, merge_err=False
+        )
+        for item in output.split("\0"):
+            if not item:
+                continue
+            info, path = item.split("\t", 1)
+            mode, kind, objhash = info.split()
+            if kind == "blob":
+                self.blobs[path] = (mode, objhash)
+
+    def get_changes(self, files):
+        """Return blob hashes of files and changes against the batch state."""
+        hashes = self.hash_files(files)
+        paths = {
+            filename: self.repository.resolve_symlinks(filename) for filename in files
+        }
+        self.load_tree(paths.values())
+        changes = {}
+        for filename, objhash in hashes.items():
+            path = paths[filename]
+            current = self.blobs[path]
+            if current is None:
+                full_path = os.path.join(self.repository.path, path)
+                mode = "100755" if os.access(full_path, os.X_OK) else "100644"
+            elif current[1] == objhash:
+                continue
+            else:
+                mode = current[0]
+            changes[path] = (mode, objhash)
+        return hashes, changes
+
+    def needs_commit(self, files):
+        hashes, changes = self.get_changes(files)
+        self.checked = (list(files), hashes, changes)
+        return bool(changes)
+
+    def invalidate(self):
+        self.checked = None
+
+    def commit(self, message, author, timestamp, files):
+        if self.checked is not None and self.checked[0] == list(files):
+            hashes, changes = self.checked[1:]
+        else:
+            hashes, changes = self.get_changes(files)
+        self.checked = None
+        if changes:
+            self.blobs.update(changes)
+            self.commits.append((message, author, timestamp, changes))
+        return hashes
+
+    @staticmethod
+    def quote_path(path):
+        """Quote path for git fast-import if needed."""
+        if not path.startswith('"') and "\n" not in path:
+            return path
+        return '"{}"'.format(
+            path.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+
+    def finish(self):
+        if not self.commits:
+            return
+        repository = self.repository
+        head, ref = repository.execute(
+            ["rev-parse", "HEAD", "--symbolic-full-name", "HEAD"], merge_err=False
+        ).split()
+        committer = repository.execute(
+            ["var", "GIT_COMMITTER_IDENT"], merge_err=False
+        ).strip()
+        committer_name = committer.rsplit(" ", 2)[0]
+
+        stream = []
+        index = {}
+        for message, author, timestamp, changes in self.commits:
+            if timestamp is None:
+                timestamp = timezone.now()
+            message = message.encode()
+            if not message.endswith(b"\n"):
+                message += b"\n"
+            stream.append(
+                "commit {}\nauthor {} {} {}\ncommitter {}\ndata {}\n".format(
+                    ref,
+                    author or committer_name,
+                    int(timestamp.timestamp()),
+                    timestamp.strftime("%z") or "+0000",
+                    committer,
+                    len(message),
+                ).encode()
+            )
+            stream.append(message)
+            if head:
+                stream.append("from {}\n".format(head).encode())
+                head = None
+            for path, (mode, objhash) in sorted(changes.items()):
+                stream.append(
+                    "M {} {} {}\n".format(mode, objhash, self.quote_path(path)).encode()
+                )
+                index[path] = (mode, objhash)
+            stream.append(b"\n")
+        stream.append(b"done\n")
+        repository.execute(["fast-import", "--quiet", "--done"], stdin=b"".join(stream))
+
+        # Bring index in sync with the new revision
+        repository.execute(
+            ["update-index", "-z", "--index-info"],
+            stdin="".join(
+                "{} {}\t{}\0".format(mode, objhash, path)
+                for path, (mode, objhash) in sorted(index.items())
+            ).encode(),
+        )
+        repository.execute(["update-index", "-q", "--refresh"])
+        repository.clean_revision_cache()
+        self.commits = []
+
 
 class GitRepository(Repository):
     """Repository implementation for Git."""
@@ -104,11 +331,67 @@ class GitRepository(Repository):
 
     def has_rev(self, rev):
         try:
-            self.execute(["rev-parse", "--verify", rev], needs_lock=False)
+            self.get_object_info(rev)
             return True
         except RepositoryException:
             return False
 
+    def get_cat_file(self, mode):
+        """Return long running git cat-file process for the repository."""
+        key = (self.path, mode)
+        with CAT_FILE_LOCK:
+            cat_file = CAT_FILE_POOL.pop(key, None)
+            if cat_file is not None and not cat_file.is_valid():
+                cat_file.close()
+                cat_file = None
+            if cat_file is None:
+                cat_file = GitCatFile(
+                    self.path, mode, {} if self.local else self._getenv()
+                )
+            CAT_FILE_POOL[key] = cat_file
+            while len(CAT_FILE_POOL) > CAT_FILE_POOL_SIZE:
+                CAT_FILE_POOL.popitem(last=False)[1].close()
+        return cat_file
+
+    def get_object_info(self, name):
+        """Return hash and type of object."""
+        return self.get_cat_file("--batch-check").query(name)[:2]
+
+    def get_last_revision(self):
+        return self.get_object_info("HEAD")[0]
+
+    @cached_property
+    def last_remote_revision(self):
+        """Return last remote revision."""
+        return self.get_object_info("@{upstream}")[0]
+
+    def count_revisions(self, base, head):
+        """Count revisions in head which are not in base.
+
+        The count is cached for the resolved revisions, so it is calculated
+        again only after commit or fetch.
+        """
+        base = self.get_object_info(base)[0]
+        head = self.get_object_info(head)[0]
+        key = "git-count-{}-{}".format(base, head)
+        result = cache.get(key)
+        if result is None:
+            result = int(
+                self.execute(
+                    ["rev-list", "--count", "{}..{}".format(base, head), "--"],
+                    needs_lock=False,
+                    merge_err=False,
+                )
+            )
+            cache.set(key, result, 86400)
+        return result
+
+    def count_missing(self):
+        return self.count_revisions("HEAD", self.get_remote_branch_name())
+
+    def count_outgoing(self):
+        return self.count_revisions(self.get_remote_branch_name(), "HEAD")
+
     def merge(self, abort=False, message=None):
         """Merge remote branch or reverts the merge."""
         tmp = "weblate-merge-tmp"
@@ -160,6 +443,35 @@ class GitRepository(Repository):
             status = self.execute(cmd, merge_err=False)
         return status != ""
 
+    def get_object_hashes(self, paths):
+        """Return hashes of files which are not modified from the index."""
+        modified = set(
+            self.execute(
+                ["diff-files", "--name-only", "-z"], needs_lock=False, merge_err=False
+            ).split("\0")
+        )
+        index = {}
+        output = self.execute(
+            ["ls-files", "--stage", "-z"], needs_lock=False, merge_err=False
+        )
+        for item in output.split("\0"):
+            if not item:
+                continue
+            info, name = item.split("\t", 1)
+            mode, objhash, stage = info.split()
+            if stage == "0" and mode != "160000" and name not in modified:
+                index[name] = objhash
+
+        result = {}
+        for path in paths:
+            try:
+                name = self.resolve_symlinks(path)
+            except ValueError:
+                continue
+            if name in index:
+                result[path] = index[name]
+        return result
+
     def show(self, revision):
         """Helper method to get content of revision.
 
@@ -250,6 +562,16 @@ class GitRepository(Repository):
         self.execute(["rm", "--force", "--"] + files)
         self.commit(message, author)
 
+    def commit_batch(self):
+        """Return batch to collect several revisions in.
+
+        Signed commits can not be created by git fast-import, these are
+        created one by one.
+        """
+        if get_gpg_sign_key():
+            return super().commit_batch()
+        return GitCommitBatch(self)
+
     def configure_remote(self, pull_url, push_url, branch):
         """Configure remote repository."""
         self.config_update(
@@ -327,11 +649,10 @@ class GitRepository(Repository):
 
     def get_file(self, path, revision):
         """Return content of file at given revision."""
-        return self.execute(
-            ["show", "{0}:{1}".format(revision, path)],
-            needs_lock=False,
-            merge_err=False,
-        )
+        content = self.get_cat_file("--batch").query("{0}:{1}".format(revision, path))[
+            2
+        ]
+        return content.decode()
 
     def cleanup(self):
         """Remove not tracked files from the repository."""
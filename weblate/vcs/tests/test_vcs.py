@@ -22,6 +22,7 @@ import os.path
 import shutil
 import tempfile
 from unittest import SkipTest
+from unittest.mock import patch
 
 from django.test import TestCase
 from django.test.utils import override_settings
@@ -355,6 +356,58 @@ class VCSGitTest(TestCase, RepoTestMixin, TempDirMixin):
     def test_commit_unicode(self):
         self.test_commit("Zkouška Sirén")
 
+    def test_commit_batch(self):
+        with self.repo.lock:
+            self.repo.set_committer("Foo Bar", "foo@example.net")
+        oldrev = self.repo.last_revision
+        with self.repo.lock:
+            batch = self.repo.commit_batch()
+            self.assertFalse(batch.needs_commit(["README.md"]))
+            for author in ("First", "Second"):
+                with open(os.path.join(self.tempdir, "testfile"), "w") as handle:
+                    handle.write("{}\n".format(author))
+                self.assertTrue(batch.needs_commit(["testfile"]))
+                batch.commit(
+                    "Test commit",
+                    "{} <foo@example.com>".format(author),
+                    timezone.now(),
+                    ["testfile"],
+                )
+                self.assertFalse(batch.needs_commit(["testfile"]))
+            batch.finish()
+            self.assertFalse(self.repo.needs_commit())
+        # Check we have new revision
+        self.assertNotEqual(oldrev, self.repo.last_revision)
+        info = self.repo.get_revision_info(self.repo.last_revision)
+        self.assertEqual(info["author"], "Second <foo@example.com>")
+        self.assertEqual(
+            self.repo.get_object_hash("testfile"),
+            "495a7e948fe261472b6a1b15d76ffdd69a68eff0",
+        )
+
+    def test_commit_batch_hashes(self):
+        with self.repo.lock:
+            self.repo.set_committer("Foo Bar", "foo@example.net")
+            batch = self.repo.commit_batch()
+            with open(os.path.join(self.tempdir, "testfile"), "w") as handle:
+                handle.write("Test\n")
+            self.assertTrue(batch.needs_commit(["testfile"]))
+            with patch.object(self.repo, "execute", wraps=self.repo.execute) as execute:
+                batch.commit(
+                    "Test commit", "Foo <foo@example.com>", timezone.now(), ["testfile"]
+                )
+            # The file is not hashed again
+            self.assertEqual(
+                [
+                    call
+                    for call in execute.call_args_list
+                    if "hash-object" in call[0][0]
+                ],
+                [],
+            )
+            batch.finish()
+            self.assertFalse(self.repo.needs_commit())
+
     def test_remove(self):
         with self.repo.lock:
             self.repo.set_committer("Foo Bar", "foo@example.net")
@@ -367,6 +420,14 @@ class VCSGitTest(TestCase, RepoTestMixin, TempDirMixin):
         obj_hash = self.repo.get_object_hash("README.md")
         self.assertEqual(len(obj_hash), 40)
 
+    def test_object_hashes(self):
+        with open(os.path.join(self.tempdir, "README.md"), "a") as handle:
+            handle.write("CHANGE")
+        hashes = self.repo.get_object_hashes(["README.md", "po/cs.po"])
+        self.assertNotIn("README.md", hashes)
+        for path, obj_hash in hashes.items():
+            self.assertEqual(obj_hash, self.repo.get_object_hash(path))
+
     def test_configure_remote(self):
         with self.repo.lock:
             self.repo.configure_remote("pullurl", "pushurl", "branch")
@@ -402,6 +463,14 @@ class VCSGitTest(TestCase, RepoTestMixin, TempDirMixin):
     def test_get_file(self):
         self.assertIn("msgid", self.repo.get_file("po/cs.po", self.repo.last_revision))
 
+    def test_get_file_missing(self):
+        with self.assertRaises(RepositoryException):
+            self.repo.get_file("missing", self.repo.last_revision)
+        # Repository reads work after error
+        self.assertIn(
+            "Weblate", self.repo.get_file("README.md", self.repo.last_revision)
+        )
+
     def test_remote_branches(self):
         self.assertEqual(self._remote_branches, self.repo.list_remote_branches())
 